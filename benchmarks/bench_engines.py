@@ -0,0 +1,117 @@
+"""
+피치 조정 엔진 벤치마크
+
+librosa 기준 엔진과 비교하여 각 엔진의 처리 속도(실시간 대비 배속)와
+스펙트럼 오차(log-spectral distance, dB)를 측정합니다.
+--channels를 2 이상으로 주면 같은 신호의 다채널 (채널, 샘플) 배열을 한 번에 처리하는 시간도
+측정하여 모노 대비 비용(cost_vs_mono, 채널 수와 같으면 채널별 처리와 같은 비용)을 함께 표시합니다.
+
+실행:
+    python -m benchmarks.bench_engines --duration 30 --steps 2 -5
+    python -m benchmarks.bench_engines --duration 30 --channels 2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+import librosa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.pitch_engines import PITCH_ENGINES, apply_pitch_engine
+
+def make_test_signal(duration: float, sr: int, seed: int = 0) -> np.ndarray:
+    """화음 + 비브라토 + 잡음이 섞인 테스트 신호 생성"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sr)) / sr
+    vibrato = 0.005 * np.sin(2 * np.pi * 5 * t)
+    signal = np.zeros_like(t)
+    for i, freq in enumerate([220.0, 277.18, 329.63, 440.0]):
+        signal += (0.2 / (i + 1)) * np.sin(2 * np.pi * freq * t * (1 + vibrato))
+    signal += 0.01 * rng.standard_normal(len(t))
+    return signal.astype(np.float32)
+
+def make_multichannel(y: np.ndarray, sr: int, channels: int) -> np.ndarray:
+    """모노 신호를 채널마다 약간씩 지연시킨 (채널, 샘플) 배열로 변환 (완전히 같은 채널이 되지 않도록)"""
+    return np.stack([np.roll(y, channel * int(0.001 * sr)) for channel in range(channels)])
+
+def log_spectral_distance(y: np.ndarray, ref: np.ndarray) -> float:
+    """두 신호 간 로그 스펙트럼 거리 (dB, 낮을수록 유사, -80dB 이하는 무시)"""
+    spec_ref = np.abs(librosa.stft(ref, n_fft=2048))
+    floor = spec_ref.max() * 1e-4
+    spec = np.maximum(np.abs(librosa.stft(y, n_fft=2048)), floor)
+    diff = 20 * np.log10(spec / np.maximum(spec_ref, floor))
+    return float(np.mean(np.sqrt(np.mean(diff ** 2, axis=0))))
+
+def time_engine(engine: str, y: np.ndarray, sr: int, n_steps: float, repeat: int) -> float:
+    """엔진 실행 시간 측정 (최솟값, 초)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        apply_pitch_engine(engine, y, sr, n_steps)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(duration: float, sr: int, steps: List[float], repeat: int, channels: int = 1) -> List[Dict]:
+    """모든 엔진에 대해 속도와 스펙트럼 오차 측정 (channels > 1이면 다채널 처리 시간도 측정)"""
+    y = make_test_signal(duration, sr)
+    multichannel = make_multichannel(y, sr, channels) if channels > 1 else None
+    # JIT 컴파일 등 초기화 비용 제외
+    for engine in PITCH_ENGINES:
+        apply_pitch_engine(engine, y[:sr], sr, 1.0)
+        if multichannel is not None:
+            apply_pitch_engine(engine, multichannel[:, :sr], sr, 1.0)
+
+    results = []
+    for n_steps in steps:
+        reference = apply_pitch_engine("librosa", y, sr, n_steps)
+        for engine in PITCH_ENGINES:
+            elapsed = time_engine(engine, y, sr, n_steps, repeat)
+            output = apply_pitch_engine(engine, y, sr, n_steps)
+            row = {
+                "engine": engine,
+                "n_steps": n_steps,
+                "seconds": round(elapsed, 4),
+                "realtime_factor": round(duration / elapsed, 1),
+                "lsd_db_vs_librosa": round(log_spectral_distance(output, reference), 2)
+            }
+            if multichannel is not None:
+                multi_elapsed = time_engine(engine, multichannel, sr, n_steps, repeat)
+                row.update({
+                    "channels": channels,
+                    "multichannel_seconds": round(multi_elapsed, 4),
+                    "cost_vs_mono": round(multi_elapsed / elapsed, 2)
+                })
+            results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="피치 조정 엔진 벤치마크")
+    parser.add_argument("--duration", type=float, default=30.0, help="테스트 신호 길이 (초)")
+    parser.add_argument("--sr", type=int, default=44100, help="샘플레이트")
+    parser.add_argument("--steps", type=float, nargs="+", default=[2.0, -5.0], help="피치 변경량 (반음)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수")
+    parser.add_argument("--channels", type=int, default=1, help="다채널 처리 비용을 함께 측정할 채널 수 (1이면 모노만)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.duration, args.sr, args.steps, args.repeat, args.channels)
+
+    multi = args.channels > 1
+    print(f"{'engine':<10}{'steps':>7}{'seconds':>10}{'x realtime':>12}{'LSD(dB)':>10}"
+          + (f"{f'{args.channels}ch sec':>10}{'x mono':>8}" if multi else ""))
+    for row in results:
+        print(f"{row['engine']:<10}{row['n_steps']:>7}{row['seconds']:>10}"
+              f"{row['realtime_factor']:>12}{row['lsd_db_vs_librosa']:>10}"
+              + (f"{row['multichannel_seconds']:>10}{row['cost_vs_mono']:>8}" if multi else ""))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
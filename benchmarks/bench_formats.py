@@ -0,0 +1,103 @@
+"""
+출력 형식별 인코딩 벤치마크
+
+합성 신호(benchmarks/signals.py)를 각 출력 형식(OUTPUT_CONFIG["formats"])으로 인코딩하여
+인코딩 시간, 실시간 대비 배속, 파일 크기를 비교합니다. 피치 조정 결과를 저장하는 마지막 단계와
+같은 경로(encode_audio_array: WAV는 직접 기록, 나머지는 인코더 풀의 ffmpeg)를 사용합니다.
+--levels를 주면 compression_level을 바꿔 가며 같은 형식의 속도/크기 차이도 측정합니다.
+
+실행:
+    python -m benchmarks.bench_formats --durations 10 60
+    python -m benchmarks.bench_formats --formats flac opus --levels 0 5 8 --json formats.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.signals import SIGNALS, make_signal
+from config.settings import OUTPUT_CONFIG
+from utils.audio_utils import encode_audio_array
+from utils.encoder_service import get_output_extension
+
+def time_encode(y, sr: int, output_format: str, output_path: str, repeat: int) -> float:
+    """인코딩 시간 측정 (최솟값, 초)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode_audio_array(y, sr, output_path, output_format)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(formats: List[str], signals: List[str], durations: List[float], sr: int,
+                  channels: int, levels: Optional[List[int]], repeat: int) -> List[Dict]:
+    """형식(과 compression_level)별 인코딩 시간과 파일 크기 측정"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="recodicon_formats_") as work_dir:
+        for signal in signals:
+            for duration in durations:
+                y = make_signal(signal, duration, sr, channels)
+                if y.ndim == 2:
+                    y = y.T  # encode_audio_array는 피치 엔진과 같은 (채널, 샘플) 배열을 받음
+                for output_format in formats:
+                    spec = OUTPUT_CONFIG["formats"][output_format]
+                    configured = spec.get("compression_level")
+                    # compression_level이 없는 형식(WAV)은 설정값 한 번만 측정
+                    format_levels = levels if levels is not None and "compression_level" in spec else [configured]
+                    output_path = os.path.join(work_dir, f"out{get_output_extension(output_format)}")
+                    for level in format_levels:
+                        spec["compression_level"] = level
+                        try:
+                            encode_audio_array(y[..., :sr], sr, output_path, output_format)  # 프로세스 시작 비용 예열
+                            seconds = time_encode(y, sr, output_format, output_path, repeat)
+                        finally:
+                            if "compression_level" in spec:
+                                spec["compression_level"] = configured
+                        results.append({
+                            "format": output_format,
+                            "compression_level": level,
+                            "signal": signal,
+                            "duration": duration,
+                            "sample_rate": sr,
+                            "channels": channels,
+                            "seconds": round(seconds, 4),
+                            "realtime_factor": round(duration / seconds, 1),
+                            "size_mb": round(os.path.getsize(output_path) / (1024 * 1024), 3),
+                        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="출력 형식별 인코딩 벤치마크")
+    parser.add_argument("--formats", nargs="+", choices=list(OUTPUT_CONFIG["formats"]),
+                        default=list(OUTPUT_CONFIG["formats"]), help="측정할 출력 형식")
+    parser.add_argument("--signals", nargs="+", choices=sorted(SIGNALS), default=["speech", "noise"],
+                        help="합성 신호 종류")
+    parser.add_argument("--durations", type=float, nargs="+", default=[10.0, 60.0], help="신호 길이 (초)")
+    parser.add_argument("--sr", type=int, default=44100, help="샘플레이트")
+    parser.add_argument("--channels", type=int, default=1, help="채널 수")
+    parser.add_argument("--levels", type=int, nargs="+",
+                        help="compression_level을 바꿔 가며 측정 (생략하면 설정값만)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.formats, args.signals, args.durations, args.sr, args.channels,
+                            args.levels, args.repeat)
+
+    print(f"{'format':<8}{'level':>6}{'signal':>8}{'duration':>10}{'seconds':>10}{'x realtime':>12}{'MB':>9}")
+    for row in results:
+        level = "-" if row["compression_level"] is None else row["compression_level"]
+        print(f"{row['format']:<8}{level:>6}{row['signal']:>8}{row['duration']:>10}"
+              f"{row['seconds']:>10}{row['realtime_factor']:>12}{row['size_mb']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+녹음/피치 조정 파이프라인 벤치마크
+
+합성 신호(benchmarks/signals.py)로 process_recording과 shift_pitch의 각 단계
+(준비, 디코딩, 리샘플, 피치 조정, WAV 저장, MP3 인코딩)를 따로 측정하고
+케이스별 최대 메모리(peak RSS)와 함께 JSON으로 저장합니다.
+각 케이스는 별도 프로세스에서 실행되어 메모리 측정이 서로 섞이지 않습니다.
+
+실행:
+    python -m benchmarks.bench_pipeline --json results.json
+    python -m benchmarks.bench_pipeline --json new.json --baseline results.json
+    python -m benchmarks.bench_pipeline --compare results.json new.json
+"""
+import argparse
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource  # Windows에는 없음
+except ImportError:
+    resource = None
+
+from benchmarks.signals import SIGNALS, make_signal
+
+# 결과 비교 시 같은 케이스로 취급하는 필드
+_CASE_FIELDS = ("pipeline", "signal", "duration", "sample_rate", "channels", "engine")
+
+def _peak_rss_mb() -> Optional[float]:
+    """현재 프로세스의 최대 RSS (MB, Linux 기준 ru_maxrss는 KB 단위)"""
+    if resource is None:
+        return None
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def _reset_traced_peak() -> None:
+    """전체 파이프라인 측정 직전에 tracemalloc 최대값 초기화 (단계별 중간 결과 영향 제외)"""
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+def _time_stage(func: Callable, repeat: int):
+    """단계 함수를 repeat번 실행하여 (최소 시간, 마지막 결과) 반환"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_recording(y: np.ndarray, sr: int, work_dir: str, repeat: int) -> Dict[str, float]:
+    """process_recording의 단계별 시간 측정 (준비 → MP3 인코딩 → 전체)"""
+    from utils.audio_utils import prepare_pcm, convert_pcm_to_audio
+    from modules.recorder import process_recording
+
+    mp3_path = os.path.join(work_dir, "recording.mp3")
+
+    stages = {}
+    stages["prepare"], pcm = _time_stage(lambda: prepare_pcm(y, sr, sr, 2), repeat)
+    stages["mp3_encode"], _ = _time_stage(functools.partial(convert_pcm_to_audio, pcm, mp3_path, "192", sr), repeat)
+
+    def total():
+        # process_recording은 결과를 요청별 작업 폴더에 저장하므로 측정 후 바로 삭제
+        output, message = process_recording((sr, y), "192", "스테레오 (Stereo)", "원본 유지")
+        if output is None:
+            raise RuntimeError(message)
+        os.unlink(output)
+    del pcm
+    _reset_traced_peak()
+    stages["total"], _ = _time_stage(total, repeat)
+    return stages
+
+def bench_pitch(y: np.ndarray, sr: int, work_dir: str, repeat: int,
+                engine: str, n_steps: float, target_sr: int) -> Dict[str, float]:
+    """
+    shift_pitch의 단계별 시간 측정 (디코딩 → 리샘플 → 피치 조정 → WAV 저장 → MP3 인코딩 → 전체)
+
+    target_sr은 shift_pitch의 working_rate로 전달되며, 실제 처리 샘플레이트는
+    plan_working_rate()로 정해집니다. (업샘플링 없음, MP3 지원 레이트)
+    """
+    import soundfile as sf
+    from utils.audio_utils import decode_audio_to_array, encode_array_to_mp3, plan_working_rate, resample_audio
+    from modules.pitch_engines import apply_pitch_engine
+    from modules.pitch_shifter import shift_pitch
+    from modules.pitch_core import plan_pitch_channels
+
+    input_path = os.path.join(work_dir, "input.wav")
+    sf.write(input_path, y, sr, subtype="PCM_16")
+
+    # JIT 컴파일 등 초기화 비용 제외
+    apply_pitch_engine(engine, np.zeros(sr, dtype=np.float32), sr, n_steps)
+
+    stages = {}
+    work_sr = plan_working_rate(sr, target_sr)
+    # shift_pitch와 같은 채널 수로 처리 (PITCH_CONFIG["keep_channels"]가 꺼져 있으면 모노)
+    channels = plan_pitch_channels({"channels": 1 if y.ndim == 1 else y.shape[1]}, "mp3")
+    stages["decode"], (decoded, _) = _time_stage(lambda: decode_audio_to_array(input_path, sr, sr, channels),
+                                                 repeat)
+    # 배열은 partial로 바로 넘김 (이름을 참조하는 lambda는 아래 del 이후 정의되지 않은 이름이 됨)
+    if work_sr != sr:
+        stages["resample"], decoded = _time_stage(functools.partial(resample_audio, decoded, sr, work_sr), repeat)
+    stages["shift"], shifted = _time_stage(functools.partial(apply_pitch_engine, engine, decoded, work_sr, n_steps),
+                                           repeat)
+    stages["wav_write"], _ = _time_stage(
+        functools.partial(sf.write, os.path.join(work_dir, "shifted.wav"), shifted.T, work_sr), repeat)
+    stages["mp3_encode"], _ = _time_stage(functools.partial(encode_array_to_mp3, shifted, work_sr), repeat)
+
+    def total():
+        output = shift_pitch(input_path, n_steps, engine, use_cache=False, working_rate=target_sr)
+        if not os.path.isfile(output):
+            raise RuntimeError(output)
+        os.unlink(output)
+    del decoded, shifted
+    _reset_traced_peak()
+    stages["total"], _ = _time_stage(total, repeat)
+    return stages
+
+def run_case(case: Dict) -> Dict:
+    """케이스 하나를 실행 (별도 프로세스에서 호출됨)"""
+    y = make_signal(case["signal"], case["duration"], case["sample_rate"], case["channels"])
+    start_rss = _peak_rss_mb()
+    if case["trace_memory"]:
+        # 신호 생성 이후 전체 파이프라인(total)이 할당한 메모리(NumPy 배열 포함)만 측정
+        tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(prefix="recodicon_bench_") as work_dir:
+        if case["pipeline"] == "recording":
+            stages = bench_recording(y, case["sample_rate"], work_dir, case["repeat"])
+        else:
+            stages = bench_pitch(y, case["sample_rate"], work_dir, case["repeat"],
+                                 case["engine"], case["n_steps"], case["target_sr"])
+
+    peak_rss = _peak_rss_mb()
+    traced_peak = None
+    if case["trace_memory"]:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    result = {field: case[field] for field in _CASE_FIELDS}
+    result.update({
+        "stages": {name: round(seconds, 5) for name, seconds in stages.items()},
+        "realtime_factor": round(case["duration"] / stages["total"], 1),
+        "peak_rss_mb": None if peak_rss is None else round(peak_rss, 1),
+        "peak_rss_delta_mb": None if peak_rss is None else round(peak_rss - start_rss, 1),
+        "peak_traced_mb": None if traced_peak is None else round(traced_peak, 1),
+    })
+    return result
+
+def build_cases(args) -> List[Dict]:
+    """명령행 인자로부터 측정 케이스 목록 생성"""
+    cases = []
+    for pipeline, signal, duration, sr, channels in itertools.product(
+            args.pipelines, args.signals, args.durations, args.sample_rates, args.channels):
+        cases.append({
+            "pipeline": pipeline,
+            "signal": signal,
+            "duration": duration,
+            "sample_rate": sr,
+            "channels": channels,
+            "engine": args.engine if pipeline == "pitch" else None,
+            "n_steps": args.steps,
+            "target_sr": args.target_sr,
+            "repeat": args.repeat,
+            "trace_memory": args.trace_memory,
+        })
+    return cases
+
+def run_benchmark(cases: List[Dict]) -> List[Dict]:
+    """케이스마다 새 프로세스에서 실행하여 결과 수집"""
+    results = []
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(run_case, cases):
+            results.append(result)
+            print(f"{result['pipeline']:<10}{result['signal']:<8}{result['duration']:>6}s"
+                  f"{result['sample_rate']:>7}Hz{result['channels']:>3}ch  "
+                  + "  ".join(f"{name}={seconds:.3f}" for name, seconds in result["stages"].items())
+                  + f"  peak={result['peak_rss_mb']}MB"
+                  + (f"  traced={result['peak_traced_mb']}MB" if result["peak_traced_mb"] is not None else ""),
+                  flush=True)
+    return results
+
+def _case_key(result: Dict) -> tuple:
+    return tuple(result.get(field) for field in _CASE_FIELDS)
+
+def compare_results(baseline: List[Dict], current: List[Dict], threshold: float) -> List[Dict]:
+    """
+    두 실행 결과를 케이스/단계별로 비교
+
+    현재 시간이 기준 대비 threshold배를 넘으면 regression으로 표시합니다.
+    """
+    baseline_by_case = {_case_key(result): result for result in baseline}
+    rows = []
+    for result in current:
+        base = baseline_by_case.get(_case_key(result))
+        if base is None:
+            continue
+        for stage, seconds in result["stages"].items():
+            base_seconds = base["stages"].get(stage)
+            if not base_seconds:
+                continue
+            ratio = seconds / base_seconds
+            rows.append({
+                "case": _case_key(result),
+                "stage": stage,
+                "baseline": base_seconds,
+                "current": seconds,
+                "ratio": round(ratio, 2),
+                "regression": ratio > threshold,
+            })
+    return rows
+
+def print_comparison(rows: List[Dict]) -> int:
+    """비교 결과 출력 후 regression 개수 반환"""
+    print(f"{'case':<48}{'stage':<12}{'baseline':>10}{'current':>10}{'ratio':>8}")
+    for row in rows:
+        case = " ".join(str(value) for value in row["case"] if value is not None)
+        flag = "  << regression" if row["regression"] else ""
+        print(f"{case:<48}{row['stage']:<12}{row['baseline']:>10.4f}{row['current']:>10.4f}"
+              f"{row['ratio']:>8}{flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"\n비교 {len(rows)}건, regression {regressions}건")
+    return regressions
+
+def _load_results(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+def main():
+    parser = argparse.ArgumentParser(description="녹음/피치 조정 파이프라인 벤치마크")
+    parser.add_argument("--pipelines", nargs="+", choices=["recording", "pitch"],
+                        default=["recording", "pitch"], help="측정할 파이프라인")
+    parser.add_argument("--signals", nargs="+", choices=sorted(SIGNALS), default=sorted(SIGNALS),
+                        help="합성 신호 종류")
+    parser.add_argument("--durations", type=float, nargs="+", default=[5.0, 30.0], help="신호 길이 (초)")
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[44100, 48000], help="샘플레이트")
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 2], help="채널 수")
+    parser.add_argument("--engine", default="librosa", help="피치 조정 엔진")
+    parser.add_argument("--steps", type=float, default=2.0, help="피치 변경량 (반음)")
+    parser.add_argument("--target-sr", type=int, default=44100, help="처리 샘플레이트 (shift_pitch working_rate, 원본보다 높으면 원본 유지)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="tracemalloc으로 파이프라인의 최대 할당량 측정 (시간 측정에 약간의 오버헤드)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", help="이번 결과와 비교할 기준 JSON 파일")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="측정 없이 저장된 두 결과 파일만 비교")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="이 배율 이상 느려지면 regression으로 판단")
+    args = parser.parse_args()
+
+    if args.compare:
+        rows = compare_results(_load_results(args.compare[0]), _load_results(args.compare[1]), args.threshold)
+        sys.exit(1 if print_comparison(rows) else 0)
+
+    results = run_benchmark(build_cases(args))
+
+    if args.json:
+        import librosa
+        report = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "platform": platform.platform(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "librosa": librosa.__version__,
+                "cpu_count": os.cpu_count(),
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        rows = compare_results(_load_results(args.baseline), results, args.threshold)
+        sys.exit(1 if print_comparison(rows) else 0)
+
+if __name__ == "__main__":
+    main()
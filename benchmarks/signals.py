@@ -0,0 +1,79 @@
+"""
+벤치마크용 합성 신호 생성기
+
+외부 오디오 파일 없이 재현 가능한 테스트 신호(사인 스윕, 잡음, 음성 유사 버스트)를 만듭니다.
+모든 신호는 float32, 모노는 (n,) / 다채널은 (n, channels) 형태입니다.
+"""
+from typing import Callable, Dict
+
+import numpy as np
+
+def sine_sweep(duration: float, sr: int, seed: int = 0,
+               f_start: float = 50.0, f_end: float = 10000.0) -> np.ndarray:
+    """지수 사인 스윕 (f_start → f_end Hz)"""
+    t = np.arange(int(duration * sr)) / sr
+    f_end = min(f_end, sr * 0.45)
+    k = np.log(f_end / f_start) / max(duration, 1e-6)
+    phase = 2 * np.pi * f_start * (np.exp(k * t) - 1) / k
+    return (0.5 * np.sin(phase)).astype(np.float32)
+
+def pink_noise(duration: float, sr: int, seed: int = 0) -> np.ndarray:
+    """1/f 스펙트럼의 핑크 노이즈"""
+    rng = np.random.default_rng(seed)
+    n = int(duration * sr)
+    spectrum = rng.standard_normal(n // 2 + 1) + 1j * rng.standard_normal(n // 2 + 1)
+    spectrum /= np.sqrt(np.maximum(np.arange(n // 2 + 1), 1))
+    noise = np.fft.irfft(spectrum, n)
+    return (0.3 * noise / np.max(np.abs(noise))).astype(np.float32)
+
+def speech_bursts(duration: float, sr: int, seed: int = 0) -> np.ndarray:
+    """음성과 비슷한 신호: 포먼트가 있는 유성음 버스트 + 무음 구간"""
+    rng = np.random.default_rng(seed)
+    n = int(duration * sr)
+    t = np.arange(n) / sr
+
+    # 기본 주파수가 천천히 흔들리는 성대 펄스열 (고조파 합)
+    f0 = 120 + 20 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    voiced = np.zeros(n)
+    for harmonic in range(1, 30):
+        if harmonic * 140 > sr * 0.45:
+            break
+        # 700Hz / 1200Hz 부근 포먼트 강조
+        gain = np.exp(-((harmonic * 120 - 700) / 300) ** 2) + 0.6 * np.exp(-((harmonic * 120 - 1200) / 400) ** 2)
+        voiced += (0.05 + gain) * np.sin(harmonic * phase) / harmonic
+
+    # 음절 단위 엔벨로프 (0.1~0.4초 버스트, 사이사이 무음)
+    envelope = np.zeros(n)
+    position = 0
+    while position < n:
+        length = int(rng.uniform(0.1, 0.4) * sr)
+        gap = int(rng.uniform(0.05, 0.25) * sr)
+        segment = min(length, n - position)
+        envelope[position:position + segment] = np.hanning(length)[:segment]
+        position += length + gap
+
+    signal = voiced * envelope + 0.002 * rng.standard_normal(n)
+    return (0.5 * signal / np.max(np.abs(signal))).astype(np.float32)
+
+SIGNALS: Dict[str, Callable[..., np.ndarray]] = {
+    "sweep": sine_sweep,
+    "noise": pink_noise,
+    "speech": speech_bursts,
+}
+
+def make_signal(kind: str, duration: float, sr: int, channels: int = 1, seed: int = 0) -> np.ndarray:
+    """
+    지정한 종류의 합성 신호 생성
+
+    다채널 신호는 채널마다 시드를 달리하고 약간의 지연을 주어 완전히 같은 채널이 되지 않도록 합니다.
+    """
+    generator = SIGNALS[kind]
+    if channels == 1:
+        return generator(duration, sr, seed)
+
+    columns = []
+    for channel in range(channels):
+        column = generator(duration, sr, seed + channel)
+        columns.append(np.roll(column, channel * int(0.001 * sr)))
+    return np.stack(columns, axis=1)
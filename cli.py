@@ -0,0 +1,78 @@
+"""
+Recodicon 명령줄 일괄 피치 조정 (웹 UI 없이 실행)
+
+사용 예:
+    python -m cli songs/ -p 2 -r -o out/
+    python cli.py "vocals/**/*.wav" -p -3 --engine wsola --workers 4 --skip hash
+    python -m cli stems/ -p 1 --format flac -o out/
+
+결과 통계는 표준 출력에 JSON으로, 진행 상황은 표준 오류로 출력됩니다.
+종료 코드: 0 성공 / 1 일부 파일 실패 / 2 입력 파일 없음
+"""
+import argparse
+import json
+import os
+import sys
+
+from config.settings import BATCH_CONFIG, OUTPUT_CONFIG, PITCH_CONFIG
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="오디오 파일들의 피치를 일괄 조정하여 저장합니다. (기본 MP3)"
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="입력 파일, 폴더 또는 글롭 패턴 (예: 'music/**/*.mp3')")
+    parser.add_argument("-p", "--pitch", type=float, required=True,
+                        help=f"피치 변경량 (반음, {PITCH_CONFIG['min_pitch']} ~ {PITCH_CONFIG['max_pitch']})")
+    parser.add_argument("-o", "--output-dir",
+                        help="출력 폴더 (생략하면 각 입력 파일 옆에 저장, 폴더 입력은 하위 구조 유지)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="폴더/글롭(**)의 하위 폴더까지 검색")
+    parser.add_argument("-e", "--engine", default=PITCH_CONFIG["default_engine"],
+                        help="피치 조정 엔진 (librosa / wsola / ffmpeg)")
+    parser.add_argument("-f", "--format", choices=list(OUTPUT_CONFIG["formats"]),
+                        default=OUTPUT_CONFIG["default_format"],
+                        help="출력 형식 (wav는 인코딩 없이 바로 저장하므로 가장 빠름)")
+    parser.add_argument("-b", "--bitrate",
+                        help="출력 비트레이트 (예: 128k, mp3/opus만 해당, 생략하면 형식 기본값)")
+    parser.add_argument("--working-rate", type=int,
+                        help="처리 샘플레이트 (예: 음성은 22050, 원본보다 높으면 원본 유지)")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="병렬 처리 프로세스 수 (기본: BATCH_CONFIG 설정)")
+    parser.add_argument("--skip", choices=["mtime", "hash", "none"], default="mtime",
+                        help="최신 출력 건너뛰기 기준 (기본: mtime)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="진행 상황 출력 안 함")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not PITCH_CONFIG["min_pitch"] <= args.pitch <= PITCH_CONFIG["max_pitch"]:
+        print(f"피치 범위를 벗어났습니다: {args.pitch:+.1f}", file=sys.stderr)
+        return 2
+    if args.workers:
+        BATCH_CONFIG["max_workers"] = args.workers
+
+    # 오디오 처리 모듈은 인자 검사 후에 불러옴 (--help, 인자 오류는 바로 응답)
+    from modules.headless_batch import run_headless_batch
+    from modules.pitch_engines import PITCH_ENGINES
+
+    if args.engine not in PITCH_ENGINES:
+        print(f"알 수 없는 피치 엔진: {args.engine}", file=sys.stderr)
+        return 2
+
+    def progress(done: int, total: int, path: str, state: str) -> None:
+        if not args.quiet:
+            print(f"[{done}/{total}] {state:7s} {os.path.basename(path)}", file=sys.stderr, flush=True)
+
+    stats = run_headless_batch(args.inputs, args.pitch, args.output_dir, args.engine,
+                               args.recursive, args.skip, args.working_rate, progress,
+                               output_format=args.format, bitrate=args.bitrate)
+    print(json.dumps(stats, ensure_ascii=False))
+
+    if stats["files_total"] == 0:
+        return 2
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
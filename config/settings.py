@@ -20,7 +20,9 @@ RECORDING_CONFIG = {
         "44100 Hz (CD 품질)",
         "48000 Hz (DVD 품질)"
     ],
-    "default_sample_rate": "원본 유지"
+    "default_sample_rate": "원본 유지",
+    "live_chunk_seconds": 0.5,  # 실시간 녹음 모드에서 청크를 서버로 보내는 간격 (초)
+    "live_idle_timeout": 300  # 이 시간(초) 동안 청크가 없으면 실시간 녹음 세션을 정리
 }
 
 # 피치 조정 설정
@@ -29,7 +31,102 @@ PITCH_CONFIG = {
     "max_pitch": 12,
     "default_pitch": 2,
     "step": 0.5,
-    "supported_formats": [".mp3", ".wav", ".m4a"]
+    "supported_formats": [".mp3", ".wav", ".m4a"],
+    "default_engine": "librosa",  # librosa / wsola / ffmpeg
+    "working_sample_rate": None,  # 처리 샘플레이트 (None이면 원본 유지, 음성은 22050 권장 - 업샘플링은 하지 않음)
+    "max_working_sample_rate": 48000,  # 이보다 높은 입력은 이 레이트로 낮춰서 처리 (MP3 최대 48kHz)
+    "default_ladder": "-3~3",  # 피치 사다리 기본값 (쉼표 목록 또는 범위)
+    "keep_channels": True,  # 스테레오/다채널 입력의 채널을 유지 (False면 모노로 섞어서 처리, MP3 출력은 스테레오까지)
+    "in_memory_pipeline": True,  # False면 임시 WAV 파일을 거치는 기존 경로 사용
+    "streaming_min_duration": 600,  # 이 길이(초) 이상인 파일은 블록 단위 스트리밍 처리 (None이면 사용 안 함)
+    "stream_block_seconds": 10,  # 스트리밍 처리 블록 길이 (초)
+    "stream_overlap_seconds": 0.5,  # 블록 간 crossfade/여유 구간 길이 (초)
+    "stack_max_duration": 15,  # 배치에서 이 길이(초) 이하인 클립은 묶어서 한 번에 피치 조정 (None이면 사용 안 함)
+    "stack_max_clips": 16,  # 한 번에 묶는 최대 클립 수
+    "max_input_duration": 3 * 60 * 60  # 이보다 긴 입력(초)은 디코딩 전에 거부 (None이면 제한 없음)
+}
+
+# 미리 듣기 설정 (피치 슬라이더를 놓으면 짧은 구간만 빠르게 렌더링, 전체 파일은 확정할 때만 처리)
+PREVIEW_CONFIG = {
+    "enabled": True,
+    "seconds": 10,  # 미리 듣기 구간 길이 (초)
+    "engine": "ffmpeg",  # 미리 듣기 엔진 (None이면 선택한 엔진 사용, ffmpeg가 가장 빠름)
+    "sample_rate": 22050,  # 미리 듣기 처리 샘플레이트 (원본보다 높으면 원본 유지), 모노로 섞어서 처리
+    "context_seconds": 0.5,  # 구간 앞뒤로 함께 처리한 뒤 잘라내는 여유 (경계 잡음 방지)
+    "cache_max_seconds": 20 * 60,  # 이 길이(초) 이하인 파일은 처음 한 번 전체를 디코딩하여 메모리에 보관 (더 길면 구간만 디코딩)
+    "cache_max_mb": 256  # 디코딩 결과 보관 한도 (오래 사용하지 않은 파일부터 삭제)
+}
+
+# 출력 형식 설정 (녹음, 피치 조정 단일 파일/사다리/배치 공통, 요청마다 선택 가능)
+# 60초 음성 인코딩 시간 (benchmarks/bench_formats.py): WAV 0.005초 < FLAC 0.08초 < MP3 0.43초 < Opus 0.9초
+OUTPUT_CONFIG = {
+    "default_format": "mp3",
+    "formats": {
+        # bitrate: 요청에 비트레이트가 없을 때의 기본값 / compression_level: 인코더 속도-압축률 설정 (None이면 인코더 기본값)
+        "mp3": {"label": "MP3 (호환성 최고)", "bitrate": "192k", "compression_level": None},  # 7이면 인코딩 약 40% 빠름 (음질 약간 저하)
+        "wav": {"label": "WAV (인코딩 없음, 가장 빠름)"},  # 16-bit PCM을 인코더 프로세스 없이 바로 저장
+        "flac": {"label": "FLAC (무손실 압축)", "compression_level": 5},  # 0~8, 5 이상은 크기 차이가 거의 없고 느려짐
+        "opus": {"label": "Opus (가장 작은 파일, 인코딩 느림)", "bitrate": "128k", "compression_level": 5}  # 10이면 약 25% 느림
+    }
+}
+
+# 결과 캐시 설정 (입력 내용 해시 + 피치 + 엔진 + 비트레이트 기준)
+CACHE_CONFIG = {
+    "enabled": True,
+    "directory": None,  # None이면 시스템 임시 폴더의 recodicon_cache 사용
+    "max_size_mb": 2048  # 초과 시 가장 오래 사용되지 않은 항목부터 삭제
+}
+
+# 작업 공간 설정 (요청마다 만들어지는 임시 결과 파일 폴더)
+SCRATCH_CONFIG = {
+    "root": None,  # None이면 시스템 임시 폴더의 recodicon_scratch 사용
+    "use_tmpfs": False,  # True이고 root가 None이면 /dev/shm/recodicon_scratch 사용 (메모리 기반, 디스크 I/O 없음)
+    "max_size_mb": 4096,  # 전체 사용량 한도 (초과하면 새 작업은 공간이 날 때까지 대기)
+    "admission_timeout": 60,  # 공간을 기다리는 최대 시간 (초), 지나면 작업 거부
+    "output_ttl": 3600,  # 끝난 작업의 결과 파일 보관 시간 (초, 다운로드 대기용)
+    "evict_grace": 60,  # 한도 초과 시에는 끝난 지 이 시간(초)이 지난 작업부터 보관 시간 전이라도 삭제
+    "reap_interval": 300  # 오래된 작업 폴더를 정리하는 주기 (초)
+}
+
+# 배치 처리 설정
+BATCH_CONFIG = {
+    "max_workers": None,  # None이면 CPU 코어 수만큼 사용
+    "job_store_dir": None,  # ZIP 방식 배치의 중간 결과 보관 폴더 (None이면 작업 공간에 두고 보관 시간 후 정리, 지정하면 자동 정리 없음)
+}
+
+# 작업 대기열 설정 (레인별 동시 실행 수)
+QUEUE_CONFIG = {
+    "max_size": 64,  # 대기열에 들어갈 수 있는 최대 요청 수 (None이면 제한 없음)
+    "default_concurrency_limit": 1,
+    "lanes": {
+        "interactive": {"concurrency_limit": 4},  # 녹음, 단일 파일, 피치 사다리
+        "batch": {"concurrency_limit": 1},  # 일괄 처리 (파일 단위 병렬화는 BATCH_CONFIG 참고)
+        "live": {"concurrency_limit": 16},  # 실시간 녹음 청크 (청크 처리는 짧으므로 넉넉하게)
+        "preview": {"concurrency_limit": 4}  # 피치 미리 듣기 (짧은 구간, 전체 처리와 별도 레인)
+    }
+}
+
+# 인코더 풀 설정 (ffmpeg 인코딩 작업 동시 실행 수)
+ENCODER_CONFIG = {
+    "max_workers": 4,
+}
+
+# 단계별 처리 시간/메모리 추적 설정
+TRACE_CONFIG = {
+    "enabled": True,
+    "log_file": None,  # None이면 시스템 임시 폴더의 recodicon_trace.log 사용
+    "log_max_bytes": 5 * 1024 * 1024,  # 로그 파일 회전 크기
+    "log_backup_count": 3,
+    "show_in_status": False,  # True면 상태 메시지에 단계별 처리 시간 표시
+    "metrics_endpoint": False  # True면 /metrics 경로로 누적 통계 제공 (Prometheus 텍스트 형식)
+}
+
+# 시작 설정 (무거운 오디오 라이브러리는 처음 사용할 때 불러오고, 워밍업으로 미리 준비)
+STARTUP_CONFIG = {
+    "warmup": "background",  # background: 서버 시작과 동시에 / blocking: 워밍업 후 서버 시작 / off: 사용 안 함
+    "warmup_engines": ["librosa"],  # 워밍업할 피치 엔진 (librosa는 첫 호출 시 numba JIT 컴파일)
+    "numba_cache_dir": None,  # 지정하면 numba JIT 결과를 이 폴더에 저장하여 새 인스턴스에서 재사용
+    "report": True  # 시작 단계별 소요 시간 출력
 }
 
 # UI 텍스트
@@ -1,7 +1,45 @@
+import time
+_IMPORT_STARTED_AT = time.perf_counter()
+
 import gradio as gr
-from config.settings import SERVER_CONFIG, RECORDING_CONFIG, PITCH_CONFIG, UI_TEXT
-from modules.recorder import process_recording, clear_recording
-from modules.pitch_shifter import process_single_audio, process_batch_files
+from config.settings import (
+    SERVER_CONFIG, RECORDING_CONFIG, PITCH_CONFIG, PREVIEW_CONFIG, OUTPUT_CONFIG, TRACE_CONFIG, STARTUP_CONFIG,
+    UI_TEXT
+)
+from modules.recorder import (
+    process_recording, clear_recording, start_live_recording, stream_recording_chunk,
+    finish_live_recording, cancel_live_recording
+)
+from modules.pitch_shifter import (
+    process_single_audio, process_batch_files, render_pitch_ladder, preview_single_audio, prepare_preview
+)
+from modules.pitch_engines import get_engine_choices
+from modules.job_scheduler import get_queue_options, get_lane_options, get_session_id, cancel_batch_jobs
+from modules.warmup import configure_numba_cache, start_warmup, get_warmup_status, format_startup_report
+from utils.tracing import render_metrics, start_trace, trace_stage
+from utils.encoder_service import get_encoder_stats
+from utils.scratch_space import get_scratch_stats
+
+# 모듈 로딩 시간 (무거운 오디오 라이브러리는 처음 사용할 때 불러오므로 대부분 Gradio)
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED_AT
+
+def create_output_format_dropdown():
+    """출력 형식 선택 드롭다운 생성"""
+    return gr.Dropdown(
+        choices=[(spec["label"], name) for name, spec in OUTPUT_CONFIG["formats"].items()],
+        value=OUTPUT_CONFIG["default_format"],
+        label="출력 형식",
+        info="WAV: 인코딩 없음(가장 빠름) / FLAC: 무손실 / MP3: 호환성 / Opus: 가장 작음"
+    )
+
+def create_output_bitrate_dropdown():
+    """출력 비트레이트 선택 드롭다운 생성 (기본값이면 형식별 기본 비트레이트)"""
+    return gr.Dropdown(
+        choices=["기본값"] + RECORDING_CONFIG["bitrate_options"],
+        value="기본값",
+        label="출력 비트레이트 (kbps)",
+        info="MP3/Opus에만 적용 (기본값: MP3 192 / Opus 128)"
+    )
 
 def create_recorder_interface():
     """마이크 녹음 인터페이스 생성"""
@@ -9,7 +47,7 @@ def create_recorder_interface():
         gr.HTML("""
         <div style="text-align: center; padding: 20px;">
             <h2>🎙️ 마이크 녹음기</h2>
-            <p>녹음 버튼을 눌러 음성을 녹음하고 고품질 MP3 파일로 저장하세요!</p>
+            <p>녹음 버튼을 눌러 음성을 녹음하고 MP3 / WAV / FLAC / Opus 파일로 저장하세요!</p>
         </div>
         """)
         
@@ -26,16 +64,27 @@ def create_recorder_interface():
                 with gr.Row():
                     record_btn = gr.Button("🎙️ 녹음 처리", variant="primary", size="lg")
                     clear_btn = gr.Button("🗑️ 초기화", variant="secondary")
+                
+                # 긴 녹음: 녹음하는 동안 청크 단위로 바로 인코딩
+                with gr.Accordion("🔴 실시간 녹음 (긴 녹음용)", open=False):
+                    live_microphone = gr.Audio(
+                        sources=["microphone"],
+                        type="numpy",
+                        streaming=True,
+                        label="실시간 마이크 녹음 (정지하면 파일이 바로 완성됩니다)"
+                    )
             
             with gr.Column(scale=1):
                 # 품질 설정
                 gr.HTML("<h3>🔧 품질 설정</h3>")
                 
+                output_format = create_output_format_dropdown()
+                
                 bitrate = gr.Dropdown(
                     choices=RECORDING_CONFIG["bitrate_options"],
                     value=RECORDING_CONFIG["default_bitrate"],
                     label="비트레이트 (kbps)",
-                    info="높을수록 고품질 (파일 크기 증가)"
+                    info="높을수록 고품질 (파일 크기 증가, MP3/Opus에만 적용)"
                 )
                 
                 channels = gr.Radio(
@@ -73,7 +122,7 @@ def create_recorder_interface():
         with gr.Row():
             with gr.Column():
                 # 결과 표시
-                output_file = gr.File(label="📥 다운로드 MP3 파일", interactive=False)
+                output_file = gr.File(label="📥 다운로드 파일", interactive=False)
                 status_text = gr.Textbox(
                     label="📊 변환 상태", 
                     interactive=False,
@@ -84,14 +133,53 @@ def create_recorder_interface():
         # 이벤트 핸들러
         record_btn.click(
             fn=process_recording,
-            inputs=[microphone, bitrate, channels, sample_rate_option],
-            outputs=[output_file, status_text]
+            inputs=[microphone, bitrate, channels, sample_rate_option, output_format],
+            outputs=[output_file, status_text],
+            **get_lane_options("interactive")
         )
         
         clear_btn.click(
             fn=clear_recording,
             outputs=[microphone, status_text]
         )
+        clear_btn.click(fn=cancel_live_recording, queue=False)
+        
+        live_microphone.start_recording(
+            fn=start_live_recording,
+            inputs=[bitrate, channels, sample_rate_option, output_format],
+            outputs=[status_text],
+            queue=False
+        )
+        
+        live_microphone.stream(
+            fn=stream_recording_chunk,
+            inputs=[live_microphone],
+            outputs=[status_text],
+            stream_every=RECORDING_CONFIG["live_chunk_seconds"],
+            time_limit=None,
+            **get_lane_options("live")
+        )
+        
+        live_microphone.stop_recording(
+            fn=finish_live_recording,
+            outputs=[output_file, status_text],
+            **get_lane_options("live")
+        )
+
+def create_engine_dropdown():
+    """피치 조정 엔진 선택 드롭다운 생성"""
+    return gr.Dropdown(
+        choices=get_engine_choices(),
+        value=PITCH_CONFIG["default_engine"],
+        label="피치 조정 엔진",
+        info="librosa: 고품질 / WSOLA: 빠름 (음성에 적합) / ffmpeg: 가장 빠름"
+    )
+
+def cancel_batch(request: gr.Request) -> str:
+    """현재 세션의 일괄 처리 취소"""
+    if cancel_batch_jobs(get_session_id(request)):
+        return "일괄 처리를 취소하는 중입니다. 진행 중인 파일이 끝나면 중단됩니다."
+    return "실행 중인 일괄 처리가 없습니다. (대기열에 있던 요청은 취소되었습니다)"
 
 def create_pitch_shifter_interface():
     """피치 조정 인터페이스 생성"""
@@ -124,6 +212,22 @@ def create_pitch_shifter_interface():
                             info="양수: 높게, 음수: 낮게 (-12 ~ +12 반음)"
                         )
                         
+                        preview_offset = gr.Slider(
+                            minimum=0,
+                            maximum=1,
+                            value=0,
+                            step=1,
+                            label="미리 듣기 시작 위치 (초)",
+                            info=f"피치 슬라이더를 놓으면 이 위치부터 {PREVIEW_CONFIG['seconds']}초만 빠르게 들려줍니다",
+                            visible=PREVIEW_CONFIG["enabled"]
+                        )
+                        
+                        engine_single = create_engine_dropdown()
+                        
+                        with gr.Row():
+                            format_single = create_output_format_dropdown()
+                            bitrate_single = create_output_bitrate_dropdown()
+                        
                         output_dir_single = gr.Textbox(
                             label="출력 폴더 경로 (선택사항)",
                             placeholder="예: C:\\Users\\사용자\\Music\\출력폴더 (비워두면 다운로드로 제공)",
@@ -133,6 +237,14 @@ def create_pitch_shifter_interface():
                         process_btn_single = gr.Button("피치 조정하기", variant="primary")
                     
                     with gr.Column():
+                        # 미리 듣기 (짧은 구간, 빠른 엔진)
+                        preview_output = gr.Audio(
+                            label="미리 듣기",
+                            type="filepath",
+                            autoplay=True,
+                            visible=PREVIEW_CONFIG["enabled"]
+                        )
+                        
                         # 단일 파일 출력 컴포넌트
                         audio_output = gr.Audio(
                             label="조정된 오디오",
@@ -143,6 +255,27 @@ def create_pitch_shifter_interface():
                             label="처리 상태",
                             interactive=False
                         )
+                
+                # 피치 사다리 (한 파일을 여러 키로 한 번에 렌더링)
+                with gr.Accordion("🎚️ 피치 사다리 (여러 키 한 번에 렌더링)", open=False):
+                    with gr.Row():
+                        with gr.Column():
+                            ladder_offsets = gr.Textbox(
+                                label="렌더링할 피치 목록 (반음)",
+                                value=PITCH_CONFIG["default_ladder"],
+                                info="쉼표 목록(-2, 0, 2) 또는 범위(-3~3). 디코딩/분석은 한 번만 수행됩니다"
+                            )
+                            ladder_btn = gr.Button("피치 사다리 만들기", variant="secondary")
+                        
+                        with gr.Column():
+                            ladder_output = gr.File(
+                                label="피치별 파일 (ZIP)",
+                                type="filepath"
+                            )
+                            ladder_status = gr.Textbox(
+                                label="처리 상태",
+                                interactive=False
+                            )
             
             # 배치 처리 탭
             with gr.TabItem("배치 처리 (여러 파일)"):
@@ -164,13 +297,21 @@ def create_pitch_shifter_interface():
                             info="양수: 높게, 음수: 낮게 (-12 ~ +12 반음)"
                         )
                         
+                        engine_batch = create_engine_dropdown()
+                        
+                        with gr.Row():
+                            format_batch = create_output_format_dropdown()
+                            bitrate_batch = create_output_bitrate_dropdown()
+                        
                         output_dir_batch = gr.Textbox(
                             label="출력 폴더 경로 (선택사항)",
                             placeholder="예: C:\\Users\\사용자\\Music\\출력폴더 (비워두면 ZIP으로 다운로드)",
                             info="폴더 경로를 입력하면 해당 위치에 직접 저장됩니다"
                         )
                         
-                        process_btn_batch = gr.Button("일괄 처리하기", variant="primary")
+                        with gr.Row():
+                            process_btn_batch = gr.Button("일괄 처리하기", variant="primary")
+                            cancel_btn_batch = gr.Button("⏹️ 취소", variant="stop")
                     
                     with gr.Column():
                         # 배치 처리 출력 컴포넌트
@@ -187,14 +328,51 @@ def create_pitch_shifter_interface():
         # 이벤트 바인딩
         process_btn_single.click(
             fn=process_single_audio,
-            inputs=[audio_input, pitch_slider_single, output_dir_single],
-            outputs=[audio_output, status_text_single]
+            inputs=[audio_input, pitch_slider_single, output_dir_single, engine_single,
+                    format_single, bitrate_single],
+            outputs=[audio_output, status_text_single],
+            **get_lane_options("interactive")
         )
         
-        process_btn_batch.click(
+        # 미리 듣기: 업로드 직후 디코딩해 두고, 슬라이더를 놓을 때마다 짧은 구간만 렌더링
+        # (빠르게 여러 번 움직이면 마지막 값만 처리)
+        if PREVIEW_CONFIG["enabled"]:
+            audio_input.change(
+                fn=prepare_preview,
+                inputs=[audio_input],
+                outputs=[preview_offset],
+                **get_lane_options("preview")
+            )
+            for control in (pitch_slider_single, preview_offset):
+                control.release(
+                    fn=preview_single_audio,
+                    inputs=[audio_input, pitch_slider_single, preview_offset, engine_single],
+                    outputs=[preview_output, status_text_single],
+                    trigger_mode="always_last",
+                    **get_lane_options("preview")
+                )
+        
+        ladder_btn.click(
+            fn=render_pitch_ladder,
+            inputs=[audio_input, ladder_offsets, engine_single, format_single, bitrate_single],
+            outputs=[ladder_output, ladder_status],
+            **get_lane_options("interactive")
+        )
+        
+        batch_event = process_btn_batch.click(
             fn=process_batch_files,
-            inputs=[files_input, pitch_slider_batch, output_dir_batch],
-            outputs=[batch_output, status_text_batch]
+            inputs=[files_input, pitch_slider_batch, output_dir_batch, engine_batch,
+                    format_batch, bitrate_batch],
+            outputs=[batch_output, status_text_batch],
+            **get_lane_options("batch")
+        )
+        
+        # 대기 중인 작업은 대기열에서 빼고, 실행 중인 작업에는 취소 신호 전달
+        cancel_btn_batch.click(
+            fn=cancel_batch,
+            outputs=[status_text_batch],
+            cancels=[batch_event],
+            queue=False
         )
 
 def create_usage_guide():
@@ -206,15 +384,15 @@ def create_usage_guide():
         2. **품질 설정**: 원하는 비트레이트, 채널, 샘플링 레이트를 선택하세요
         3. **녹음 시작**: 마이크 영역의 녹음 버튼을 클릭하여 녹음을 시작합니다
         4. **녹음 중지**: 다시 버튼을 클릭하여 녹음을 중지합니다
-        5. **MP3 변환**: "녹음 처리" 버튼을 클릭하여 설정된 품질로 MP3 파일을 생성합니다
+        5. **파일 변환**: "녹음 처리" 버튼을 클릭하여 설정된 형식/품질로 파일을 생성합니다
         
         ## 🎵 피치 조정 사용법:
         
         **단일 파일 처리:**
         1. MP3 파일을 업로드하세요
-        2. 피치 조정값을 설정하세요
+        2. 피치 조정값을 설정하세요 (슬라이더를 놓으면 짧은 구간을 바로 미리 들을 수 있습니다)
         3. (선택사항) 출력 폴더 경로를 입력하세요
-        4. "피치 조정하기" 버튼을 클릭하세요
+        4. "피치 조정하기" 버튼을 클릭하세요 (전체 파일은 이때 선택한 엔진으로 처리)
         
         **배치 처리 (여러 파일):**
         1. 여러 MP3 파일을 한 번에 선택해서 업로드하세요
@@ -231,6 +409,8 @@ def create_usage_guide():
         - 1 반음 = 1 semitone (12반음 = 1옥타브)
         - 보컬 피치 올리기: +1 ~ +4 반음 추천
         - 지원 형식: MP3, WAV, M4A
+        - 엔진 선택: librosa(고품질) / WSOLA(빠름, 음성용) / ffmpeg(가장 빠름)
+        - 출력 형식: 다음 단계에서 편집할 파일이면 WAV/FLAC이 인코딩 시간 없이(또는 짧게) 저장됩니다
         
         ## ⚙️ 출력 위치 설정:
         - **출력 폴더 경로를 입력한 경우**: 해당 폴더에 직접 저장됩니다
@@ -242,26 +422,56 @@ def create_usage_guide():
         - 높은 비트레이트는 파일 크기가 커집니다
         - 스테레오는 모노보다 약 2배 용량을 차지합니다
         - 배치 처리 시 진행률이 표시됩니다
+        - 요청이 많으면 대기 순서가 표시되며, 일괄 처리는 ⏹️ 취소 버튼으로 중단할 수 있습니다
         """)
 
-def main():
-    """메인 애플리케이션"""
-    # 필요한 라이브러리 설치 안내
-    install_info = """
-이 프로그램을 실행하기 전에 다음 명령어로 라이브러리를 설치해주세요:
+def render_metrics_text() -> str:
+    """단계별 누적 통계 + 인코더 풀/작업 공간 상태 (Prometheus 텍스트 형식)"""
+    encoder = get_encoder_stats()
+    lines = [
+        "# HELP recodicon_encoder_jobs 인코더 풀 작업 수",
+        "# TYPE recodicon_encoder_jobs gauge",
+    ]
+    lines += [f'recodicon_encoder_jobs{{state="{state}"}} {encoder[state]}'
+              for state in ("active", "queued", "completed", "failed")]
+    scratch = get_scratch_stats()
+    lines += [
+        "# HELP recodicon_scratch_bytes 작업 공간 사용량과 한도",
+        "# TYPE recodicon_scratch_bytes gauge",
+        f'recodicon_scratch_bytes{{kind="used"}} {scratch["used_bytes"]}',
+    ]
+    if scratch["limit_bytes"]:
+        lines.append(f'recodicon_scratch_bytes{{kind="limit"}} {scratch["limit_bytes"]}')
+    lines += [
+        "# HELP recodicon_scratch_active_jobs 작업 폴더를 사용 중인 요청 수",
+        "# TYPE recodicon_scratch_active_jobs gauge",
+        f"recodicon_scratch_active_jobs {scratch['active_jobs']}",
+        "# HELP recodicon_scratch_jobs_total 작업 공간 입장 결과별 요청 수",
+        "# TYPE recodicon_scratch_jobs_total counter",
+    ]
+    lines += [f'recodicon_scratch_jobs_total{{result="{result}"}} {scratch[f"jobs_{result}"]}'
+              for result in ("started", "waited", "rejected")]
+    lines += [
+        "# HELP recodicon_scratch_reaped_bytes_total 정리된 작업 공간 파일 크기",
+        "# TYPE recodicon_scratch_reaped_bytes_total counter",
+        f"recodicon_scratch_reaped_bytes_total {scratch['reaped_bytes']}",
+        "# HELP recodicon_warmup_complete 워밍업 완료 여부",
+        "# TYPE recodicon_warmup_complete gauge",
+        f"recodicon_warmup_complete {int(get_warmup_status()['state'] == 'done')}",
+    ]
+    return render_metrics() + "\n".join(lines) + "\n"
 
-pip install -r requirements.txt
+def add_metrics_endpoint(app: gr.Blocks) -> None:
+    """실행 중인 Gradio 서버에 /metrics 경로 추가 (스크래핑용 텍스트)"""
+    from fastapi.responses import PlainTextResponse
+    app.app.add_api_route(
+        "/metrics",
+        lambda: PlainTextResponse(render_metrics_text()),
+        methods=["GET"]
+    )
 
-추가로 FFmpeg가 필요할 수 있습니다:
-- Windows: https://ffmpeg.org/download.html
-- macOS: brew install ffmpeg  
-- Linux: sudo apt install ffmpeg
-"""
-    
-    print(install_info)
-    print("\n🎵 통합 오디오 처리기를 시작합니다...")
-    
-    # Gradio 인터페이스 생성
+def create_app() -> gr.Blocks:
+    """전체 Gradio 인터페이스 구성"""
     with gr.Blocks(title=UI_TEXT["app_title"], theme=gr.themes.Soft()) as app:
         # 헤더
         gr.HTML(f"""
@@ -292,8 +502,47 @@ pip install -r requirements.txt
         </div>
         """)
     
-    # 앱 실행
-    app.launch(**SERVER_CONFIG)
+    # 작업 대기열 사용 (레인별 동시 실행 수 제한, 대기 순서 표시)
+    app.queue(**get_queue_options())
+    return app
+
+def main():
+    """메인 애플리케이션"""
+    # 필요한 라이브러리 설치 안내
+    install_info = """
+이 프로그램을 실행하기 전에 다음 명령어로 라이브러리를 설치해주세요:
+
+pip install -r requirements.txt
+
+추가로 FFmpeg가 필요할 수 있습니다:
+- Windows: https://ffmpeg.org/download.html
+- macOS: brew install ffmpeg  
+- Linux: sudo apt install ffmpeg
+"""
+    
+    print(install_info)
+    print("\n🎵 통합 오디오 처리기를 시작합니다...")
+    
+    configure_numba_cache()
+    
+    with start_trace("startup") as startup:
+        # Gradio 인터페이스 생성
+        with trace_stage("build_ui"):
+            app = create_app()
+        
+        # 첫 요청 전에 오디오 라이브러리 로딩 + 피치 엔진 JIT 컴파일
+        with trace_stage("warmup"):
+            start_warmup()
+        
+        # 앱 실행
+        with trace_stage("launch"):
+            app.launch(**SERVER_CONFIG, prevent_thread_lock=True)
+        if TRACE_CONFIG.get("metrics_endpoint"):
+            add_metrics_endpoint(app)
+    
+    if STARTUP_CONFIG.get("report", True):
+        print(format_startup_report(_IMPORT_SECONDS, startup))
+    app.block_thread()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,317 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import BATCH_CONFIG, PITCH_CONFIG
+from utils.file_utils import safe_delete_file
+from utils.result_cache import add_cache_stats, get_cache_stats
+from utils.scratch_space import get_current_scratch_dir
+
+# 취소 신호 확인 간격 (초)
+_CANCEL_POLL_SECONDS = 0.25
+
+# 배치 작업 단위: (입력 파일 경로들, 파일별 (probe_audio 결과, 내용 해시), 묶음 처리 정보 또는 None)
+# 계획 단계에서 조회한 정보와 해시를 워커에 넘겨 워커가 파일을 다시 읽어 해시하거나 색인을 조회하지 않도록 함
+# 묶음 처리 정보는 (클립별 원본 샘플레이트, 처리 샘플레이트, 처리 채널 수)이며 None이면 파일 하나를 따로 처리
+BatchTask = Tuple[List[str], List[Tuple[Dict[str, Any], str]], Optional[Tuple[List[int], int, int]]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_worker_count() -> int:
+    """설정된 워커 수 반환 (None이면 CPU 코어 수)"""
+    workers = BATCH_CONFIG.get("max_workers")
+    if not workers:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    요청 간에 재사용되는 프로세스 풀 반환
+
+    워커는 spawn으로 시작합니다. 서버는 이미 여러 스레드(인코더 풀, 워밍업, 작업 공간 정리,
+    요청 처리)를 실행 중이므로 fork하면 다른 스레드가 잡고 있던 모듈 잠금을 물려받아
+    워커가 멈출 수 있습니다. (워커의 라이브러리 로딩은 풀이 처음 작업을 받을 때 한 번만)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=get_worker_count(),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def shutdown_process_pool() -> None:
+    """프로세스 풀 종료 (다음 요청 시 다시 생성됨)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _cache_stats_since(before: Dict[str, int]) -> Dict[str, int]:
+    """워커에서 작업 하나 동안 늘어난 결과 캐시 적중/미스 횟수 (부모 프로세스 통계에 더하기 위해 결과와 함께 반환)"""
+    after = get_cache_stats()
+    return {name: after[name] - before.get(name, 0) for name in ("hits", "misses")}
+
+def _shift_pitch_worker(file_path: str, pitch_shift: float, engine: str,
+                        working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                        bitrate: Optional[str] = None, scratch_dir: Optional[str] = None,
+                        info: Optional[Dict[str, Any]] = None,
+                        file_hash: Optional[str] = None) -> Tuple[str, Dict[str, int]]:
+    """워커 프로세스에서 실행되는 피치 조정 작업 (결과 파일은 요청한 작업의 폴더에 생성)"""
+    from modules.pitch_core import shift_pitch
+    from utils.tracing import start_trace
+    from utils.scratch_space import attach_scratch_dir
+    before = get_cache_stats()
+    # 워커의 단계별 측정은 회전 로그에 파일 단위로 기록됨
+    with attach_scratch_dir(scratch_dir), start_trace("pitch_batch_item"):
+        result = shift_pitch(file_path, pitch_shift, engine, working_rate=working_rate,
+                             output_format=output_format, bitrate=bitrate, info=info, file_hash=file_hash)
+    return result, _cache_stats_since(before)
+
+def _shift_stack_worker(file_paths: List[str], source_rates: List[int], sr: int,
+                        pitch_shift: float, engine: str, working_rate: Optional[int] = None,
+                        output_format: Optional[str] = None, bitrate: Optional[str] = None,
+                        channels: int = 1, scratch_dir: Optional[str] = None,
+                        file_hashes: Optional[List[str]] = None) -> Tuple[List[str], Dict[str, int]]:
+    """워커 프로세스에서 실행되는 짧은 클립 묶음 피치 조정 작업"""
+    from modules.pitch_core import shift_pitch_stack
+    from utils.tracing import start_trace
+    from utils.scratch_space import attach_scratch_dir
+    before = get_cache_stats()
+    with attach_scratch_dir(scratch_dir), start_trace("pitch_batch_stack"):
+        results = shift_pitch_stack(list(zip(file_paths, source_rates)), sr, pitch_shift, engine,
+                                    working_rate, output_format, bitrate, channels, file_hashes)
+    return results, _cache_stats_since(before)
+
+def get_input_durations(file_paths: List[str]) -> Dict[str, float]:
+    """
+    배치 입력별 오디오 길이 (초) - 진행률/남은 시간 계산용
+
+    헤더만 조회(색인에 캐시)하며, 처리할 수 없는 파일은 0, 길이를 알 수 없는 파일은
+    길이를 아는 파일의 평균으로 계산합니다.
+    """
+    from modules.pitch_core import check_pitch_input
+    from utils.probe_index import probe_files
+    
+    durations: Dict[str, Optional[float]] = {}
+    for path, info in probe_files(file_paths).items():
+        if isinstance(info, OSError) or check_pitch_input(info):
+            durations[path] = 0.0
+        else:
+            durations[path] = info["duration"]
+    known = [duration for duration in durations.values() if duration]
+    average = sum(known) / len(known) if known else 0.0
+    return {path: average if duration is None else duration for path, duration in durations.items()}
+
+def estimate_remaining_seconds(started_at: float, done_duration: float,
+                               remaining_duration: float) -> Optional[float]:
+    """
+    지금까지의 처리 속도(오디오 초/경과 초)로 남은 시간 추정
+
+    Args:
+        started_at: 처리 시작 시각 (time.perf_counter())
+        done_duration: 완료된 입력의 오디오 길이 합 (초)
+        remaining_duration: 남은 입력의 오디오 길이 합 (초)
+
+    Returns:
+        남은 시간 (초, 아직 완료된 입력이 없으면 None)
+    """
+    elapsed = time.perf_counter() - started_at
+    if done_duration <= 0 or elapsed <= 0:
+        return None
+    return max(0.0, remaining_duration) * elapsed / done_duration
+
+def format_eta(seconds: Optional[float]) -> str:
+    """진행 메시지에 붙일 남은 시간 문자열 (추정할 수 없으면 빈 문자열)"""
+    if seconds is None:
+        return ""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    if minutes:
+        return f" · 남은 시간 약 {minutes}분 {seconds}초"
+    return f" · 남은 시간 약 {seconds}초"
+
+def _task_duration(task: BatchTask, durations: Dict[str, Optional[float]]) -> float:
+    """작업 단위의 오디오 길이 합 (길이를 모르는 파일이 있으면 가장 먼저 시작하도록 무한대)"""
+    total = 0.0
+    for path in task[0]:
+        duration = durations.get(path)
+        if duration is None:
+            return math.inf
+        total += duration
+    return total
+
+def plan_batch_tasks(file_paths: List[str], engine: str, working_rate: Optional[int] = None,
+                     output_format: Optional[str] = None) -> Tuple[List[BatchTask], List[Tuple[str, str]]]:
+    """
+    배치 입력을 프로세스 풀 작업 단위로 나눔
+    
+    먼저 모든 입력의 헤더만 동시에 조회(utils.probe_index, 내용 해시별 캐시)하여
+    손상되었거나 너무 긴 파일은 디코딩 전에 거부합니다.
+    
+    엔진이 묶음 처리("shift_stack")를 지원하면 PITCH_CONFIG["stack_max_duration"]보다 짧은
+    클립을 처리 샘플레이트/채널 수별로 모아 길이순으로 정렬한 뒤 묶습니다. (길이가 비슷한 클립끼리
+    묶여 0으로 채우는 구간이 적음) 묶음 크기는 워커가 놀지 않도록 워커 수에 맞춰 줄어듭니다.
+    나머지 파일은 파일 하나가 작업 하나입니다.
+    
+    작업은 긴 것부터 제출되므로 마지막에 긴 파일 하나만 남아 다른 워커가 노는 일이 줄어듭니다.
+    
+    Returns:
+        (작업 단위 목록, [(거부된 입력 파일 경로, 이유), ...])
+    """
+    from modules.pitch_core import check_pitch_input, plan_pitch_job, plan_pitch_channels
+    from modules.pitch_engines import supports_pitch_stack
+    from utils.probe_index import probe_files
+    from utils.result_cache import compute_file_hash
+    
+    # 헤더 조회는 ffmpeg 프로세스 대기가 대부분이므로 스레드로 동시에 실행 (이후 조회는 색인에서 바로 반환)
+    probed = probe_files(file_paths)
+    
+    plans: Dict[str, Tuple[dict, int]] = {}
+    hashes: Dict[str, str] = {}
+    rejected: List[Tuple[str, str]] = []
+    for path in file_paths:
+        if isinstance(probed[path], OSError):
+            rejected.append((path, f"파일 읽기 실패: {str(probed[path])}"))
+            continue
+        if probed[path] is None:
+            # 조회 실패 (plan_pitch_job에 None을 넘기면 다시 조회하므로 여기서 거부)
+            rejected.append((path, check_pitch_input(None)))
+            continue
+        try:
+            plans[path] = plan_pitch_job(path, working_rate, probed[path])
+            hashes[path] = compute_file_hash(path)  # 조회할 때 계산한 값 (프로세스 내 메모에서 반환)
+        except (OSError, ValueError) as e:
+            plans.pop(path, None)
+            rejected.append((path, str(e)))
+    durations = {path: info["duration"] for path, (info, _) in plans.items()}
+    
+    max_duration = PITCH_CONFIG.get("stack_max_duration")
+    max_clips = PITCH_CONFIG.get("stack_max_clips") or 1
+    use_stack = bool(max_duration) and max_clips >= 2 and len(plans) >= 2 and supports_pitch_stack(engine)
+    
+    tasks: List[BatchTask] = []
+    short_clips: Dict[Tuple[int, int], List[Tuple[float, str, int]]] = {}
+    for path, (info, sr) in plans.items():
+        if not use_stack or info["duration"] is None or info["duration"] > max_duration:
+            tasks.append(([path], [(info, hashes[path])], None))
+            continue
+        group_key = (sr, plan_pitch_channels(info, output_format))
+        short_clips.setdefault(group_key, []).append((info["duration"], path, info["sample_rate"]))
+    
+    for (sr, channels), clips in short_clips.items():
+        clips.sort()
+        group_size = max(1, min(max_clips, math.ceil(len(clips) / get_worker_count())))
+        for start in range(0, len(clips), group_size):
+            group = clips[start:start + group_size]
+            paths = [path for _, path, _ in group]
+            inputs = [(plans[path][0], hashes[path]) for path in paths]
+            if len(group) == 1:
+                tasks.append((paths, inputs, None))
+            else:
+                tasks.append((paths, inputs, ([rate for _, _, rate in group], sr, channels)))
+    
+    tasks.sort(key=lambda task: _task_duration(task, durations), reverse=True)
+    return tasks, rejected
+
+def _submit_task(pool: ProcessPoolExecutor, task: BatchTask, pitch_shift: float, engine: str,
+                 working_rate: Optional[int], output_format: Optional[str], bitrate: Optional[str],
+                 scratch_dir: Optional[str]):
+    """작업 단위를 프로세스 풀에 제출"""
+    paths, inputs, stack = task
+    if stack is None:
+        info, file_hash = inputs[0]
+        return pool.submit(_shift_pitch_worker, paths[0], pitch_shift, engine, working_rate,
+                           output_format, bitrate, scratch_dir, info, file_hash)
+    source_rates, sr, channels = stack
+    return pool.submit(_shift_stack_worker, paths, source_rates, sr, pitch_shift, engine, working_rate,
+                       output_format, bitrate, channels, scratch_dir, [file_hash for _, file_hash in inputs])
+
+def run_pitch_batch(file_paths: List[str], pitch_shift: float, engine: str,
+                    cancel_event: Optional[threading.Event] = None,
+                    working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                    bitrate: Optional[str] = None
+                    ) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    여러 파일의 피치를 병렬로 조정하고 완료되는 순서대로 결과 반환
+    
+    cancel_event가 설정되면 남은 작업을 취소하고 반복을 끝냅니다.
+    working_rate, output_format, bitrate는 shift_pitch의 같은 이름 인자로 전달됩니다.
+    짧은 클립은 plan_batch_tasks()에 따라 묶음으로 처리되며, 묶음의 결과는 함께 반환됩니다.
+    처리할 수 없는 입력(손상, 너무 긺)은 디코딩 없이 가장 먼저 오류로 반환됩니다.
+
+    Yields:
+        (입력 파일 경로, 결과 파일 경로 또는 None, 오류 메시지 또는 None)
+    """
+    tasks, rejected = plan_batch_tasks(file_paths, engine, working_rate, output_format)
+    # 워커의 결과 파일도 호출한 요청의 작업 폴더에 생성 (작업 밖이면 작업 공간의 공용 폴더)
+    scratch_dir = get_current_scratch_dir()
+    pool = get_process_pool()
+    try:
+        futures = {
+            _submit_task(pool, task, pitch_shift, engine, working_rate, output_format, bitrate,
+                         scratch_dir): task[0]
+            for task in tasks
+        }
+    except BrokenProcessPool:
+        # 워커가 비정상 종료된 경우 풀을 새로 만들어 재시도
+        shutdown_process_pool()
+        pool = get_process_pool()
+        futures = {
+            _submit_task(pool, task, pitch_shift, engine, working_rate, output_format, bitrate,
+                         scratch_dir): task[0]
+            for task in tasks
+        }
+
+    pending = set(futures)
+    try:
+        for path, error in rejected:
+            yield path, None, error
+        while pending:
+            done, _ = wait(pending, timeout=_CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            for future in done:
+                pending.discard(future)
+                yield from _collect_results(future, futures[future])
+    finally:
+        # 취소되었거나 소비자가 중간에 멈춘 경우: 대기 중인 작업은 취소하고
+        # 이미 실행 중인 작업의 결과 파일은 완료되는 대로 삭제
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(_discard_result)
+
+def _collect_results(future, paths: List[str]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """완료된 작업에서 파일별 (입력 파일 경로, 결과 파일 경로, 오류 메시지) 추출"""
+    try:
+        result, cache_stats = future.result()
+    except BrokenProcessPool as e:
+        shutdown_process_pool()
+        return [(path, None, f"워커 프로세스 오류: {str(e)}") for path in paths]
+    except Exception as e:
+        return [(path, None, str(e)) for path in paths]
+
+    add_cache_stats(cache_stats)
+    results = result if isinstance(result, list) else [result]
+    collected = []
+    for path, item in zip(paths, results):
+        if isinstance(item, str) and os.path.isfile(item):
+            collected.append((path, item, None))
+        else:
+            collected.append((path, None, str(item)))
+    return collected
+
+def _discard_result(future) -> None:
+    """취소된 배치에서 뒤늦게 완료된 작업의 결과 파일 삭제"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    result, cache_stats = future.result()
+    add_cache_stats(cache_stats)
+    for item in (result if isinstance(result, list) else [result]):
+        if isinstance(item, str) and os.path.isfile(item):
+            safe_delete_file(item)
@@ -0,0 +1,180 @@
+import glob
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import PITCH_CONFIG
+from modules.batch_processor import get_worker_count, run_pitch_batch
+from modules.pitch_core import get_output_key, get_output_filename
+from utils.encoder_service import get_output_format, get_output_bitrate
+from utils.file_utils import move_file_to_directory, safe_delete_file
+from utils.scratch_space import scratch_job
+from utils.output_manifest import load_manifest, is_output_current, record_output
+
+# 웹 UI 없이 실행하는 일괄 피치 조정 (CLI, cron, 파이프라인용 Python API)
+
+# 진행 콜백 시그니처: (완료 수, 전체 수, 입력 파일 경로, 상태) - 상태는 done / skipped / failed
+ProgressCallback = Callable[[int, int, str, str], None]
+
+def _is_supported(path: str) -> bool:
+    """피치 조정을 지원하는 입력 형식인지 확인"""
+    return os.path.splitext(path)[1].lower() in PITCH_CONFIG["supported_formats"]
+
+def collect_input_files(patterns: List[str], recursive: bool = False) -> List[Tuple[str, str]]:
+    """
+    입력 경로/글롭 패턴에서 처리할 오디오 파일 목록 수집
+
+    폴더가 주어지면 그 안의 지원 형식 파일을 모으고 (recursive=True면 하위 폴더 포함),
+    출력 폴더에서 같은 하위 폴더 구조를 유지할 수 있도록 상대 폴더를 함께 반환합니다.
+
+    Returns:
+        [(입력 파일 절대 경로, 출력 폴더 기준 상대 폴더), ...] (중복 제거, 입력 순서 유지)
+    """
+    found: Dict[str, str] = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            root = os.path.abspath(pattern)
+            for dir_path, dir_names, file_names in os.walk(root):
+                if not recursive:
+                    dir_names.clear()
+                dir_names.sort()
+                relative_dir = os.path.relpath(dir_path, root)
+                for file_name in sorted(file_names):
+                    path = os.path.join(dir_path, file_name)
+                    if _is_supported(path):
+                        found.setdefault(path, "" if relative_dir == "." else relative_dir)
+        else:
+            for path in sorted(glob.glob(pattern, recursive=recursive)):
+                if os.path.isfile(path) and _is_supported(path):
+                    found.setdefault(os.path.abspath(path), "")
+    return list(found.items())
+
+def _is_up_to_date(input_path: str, output_path: str, skip_mode: str,
+                   manifest: Dict[str, dict], output_key: Optional[str]) -> bool:
+    """
+    출력 파일이 최신인지 확인
+
+    mtime: 출력 파일이 입력 파일보다 나중에 만들어졌으면 최신
+    hash: 처리 기록의 키(입력 내용 + 피치 + 엔진 + 출력 설정)가 같으면 최신
+    """
+    if skip_mode == "none" or not os.path.isfile(output_path):
+        return False
+    if skip_mode == "mtime":
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    return is_output_current(os.path.dirname(output_path), manifest, os.path.basename(output_path), output_key)
+
+def run_headless_batch(patterns: List[str], pitch_shift: float, output_dir: Optional[str] = None,
+                       engine: str = PITCH_CONFIG["default_engine"], recursive: bool = False,
+                       skip_mode: str = "mtime", working_rate: Optional[int] = None,
+                       progress: Optional[ProgressCallback] = None, output_format: Optional[str] = None,
+                       bitrate: Optional[str] = None) -> dict:
+    """
+    입력 파일들의 피치를 병렬로 조정하여 출력 폴더에 저장
+
+    웹 UI의 일괄 처리와 같은 프로세스 풀/shift_pitch 경로를 사용합니다.
+    output_dir이 없으면 각 입력 파일 옆에 저장합니다.
+
+    Args:
+        patterns: 입력 파일, 폴더 또는 글롭 패턴 목록
+        skip_mode: 최신 출력 건너뛰기 기준 (mtime / hash / none)
+        working_rate: 처리 샘플레이트 (None이면 설정값, 원본보다 높으면 원본 유지)
+        progress: 파일 하나가 끝날 때마다 호출되는 콜백
+        output_format: 출력 형식 (mp3 / wav / flac / opus, None이면 기본 형식)
+        bitrate: 출력 비트레이트 (예: "128k", None이면 형식 기본값)
+
+    Returns:
+        처리량 통계 (JSON으로 출력 가능한 dict)
+    """
+    started_at = time.perf_counter()
+    output_format = get_output_format(output_format)
+    inputs = collect_input_files(patterns, recursive)
+    stats = {
+        "files_total": len(inputs),
+        "processed": 0,
+        "skipped": 0,
+        "failed": 0,
+        "input_bytes": 0,
+        "output_bytes": 0,
+        "pitch_shift": pitch_shift,
+        "engine": engine,
+        "working_rate": working_rate,
+        "output_format": output_format,
+        "bitrate": get_output_bitrate(output_format, bitrate),
+        "workers": get_worker_count(),
+        "failures": [],
+    }
+    done = 0
+
+    def report(path: str, state: str) -> None:
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, len(inputs), path, state)
+
+    def fail(path: str, error: str) -> None:
+        stats["failed"] += 1
+        stats["failures"].append({"path": path, "error": error})
+        report(path, "failed")
+
+    # 출력 위치 결정 + 최신 출력 건너뛰기
+    manifests: Dict[str, Dict[str, dict]] = {}
+    targets: Dict[str, Tuple[str, str, Optional[str]]] = {}
+    claimed = set()
+    for input_path, relative_dir in inputs:
+        target_dir = os.path.join(output_dir, relative_dir) if output_dir else os.path.dirname(input_path)
+        output_filename = get_output_filename(input_path, pitch_shift, output_format)
+        output_path = os.path.join(target_dir, output_filename)
+        if output_path in claimed:
+            fail(input_path, f"출력 파일명 중복: {output_path}")
+            continue
+        claimed.add(output_path)
+
+        try:
+            manifest = manifests.setdefault(target_dir, load_manifest(target_dir))
+            output_key = (get_output_key(input_path, pitch_shift, engine, working_rate, output_format, bitrate)
+                          if skip_mode == "hash" else None)
+            if _is_up_to_date(input_path, output_path, skip_mode, manifest, output_key):
+                stats["skipped"] += 1
+                report(input_path, "skipped")
+                continue
+        except OSError as e:
+            fail(input_path, str(e))
+            continue
+        targets[input_path] = (target_dir, output_filename, output_key)
+
+    # 남은 파일만 프로세스 풀에서 처리 (완료되는 순서대로 저장, 중간 결과는 이 실행의 작업 폴더에 생성)
+    with scratch_job("headless_batch"):
+        results = run_pitch_batch(list(targets), pitch_shift, engine, working_rate=working_rate,
+                                  output_format=output_format, bitrate=bitrate)
+        for input_path, result, error in results:
+            if error:
+                fail(input_path, error)
+                continue
+
+            target_dir, output_filename, output_key = targets[input_path]
+            try:
+                output_bytes = os.path.getsize(result)
+                os.makedirs(target_dir, exist_ok=True)
+                final_path = move_file_to_directory(result, target_dir, output_filename)
+            except OSError:
+                final_path = None
+            safe_delete_file(result)
+            if not final_path:
+                fail(input_path, "파일 저장 실패")
+                continue
+
+            manifest = manifests.setdefault(target_dir, load_manifest(target_dir))
+            record_output(target_dir, manifest, output_filename, input_path,
+                          output_key or get_output_key(input_path, pitch_shift, engine, working_rate,
+                                                       output_format, bitrate))
+
+            stats["processed"] += 1
+            stats["input_bytes"] += os.path.getsize(input_path)
+            stats["output_bytes"] += output_bytes
+            report(input_path, "done")
+
+    wall = time.perf_counter() - started_at
+    stats["wall_seconds"] = round(wall, 3)
+    stats["files_per_second"] = round(stats["processed"] / wall, 3) if wall > 0 else None
+    stats["input_mb_per_second"] = round(stats["input_bytes"] / (1024 * 1024) / wall, 3) if wall > 0 else None
+    return stats
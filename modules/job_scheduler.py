@@ -0,0 +1,91 @@
+import hashlib
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from config.settings import QUEUE_CONFIG, BATCH_CONFIG
+from utils.scratch_space import start_scratch_job, finish_scratch_job
+
+# 세션별로 실행 중인 배치 작업의 취소 신호
+_cancel_events: Dict[str, Set[threading.Event]] = {}
+_cancel_lock = threading.Lock()
+
+def get_queue_options() -> Dict[str, Any]:
+    """app.queue()에 전달할 전체 대기열 설정"""
+    return {
+        "max_size": QUEUE_CONFIG["max_size"],
+        "default_concurrency_limit": QUEUE_CONFIG["default_concurrency_limit"],
+    }
+
+def get_lane_options(lane: str) -> Dict[str, Any]:
+    """
+    이벤트 핸들러에 전달할 처리 레인 설정
+
+    같은 레인의 이벤트는 하나의 동시 실행 한도를 공유합니다.
+    (예: 단일 파일/녹음은 interactive, 일괄 처리는 batch)
+    """
+    return {
+        "concurrency_id": lane,
+        "concurrency_limit": QUEUE_CONFIG["lanes"][lane]["concurrency_limit"],
+    }
+
+def get_session_id(request: Optional[Any]) -> str:
+    """Gradio 요청에서 세션 식별자 추출 (요청 정보가 없으면 공용 세션)"""
+    return getattr(request, "session_hash", None) or "default"
+
+@contextmanager
+def batch_job(session_id: str) -> Iterator[threading.Event]:
+    """
+    배치 작업 실행 구간 등록
+
+    반환된 Event가 설정되면 작업은 다음 결과를 받는 시점에 중단해야 합니다.
+    """
+    cancel_event = threading.Event()
+    with _cancel_lock:
+        _cancel_events.setdefault(session_id, set()).add(cancel_event)
+    try:
+        yield cancel_event
+    finally:
+        with _cancel_lock:
+            events = _cancel_events.get(session_id)
+            if events is not None:
+                events.discard(cancel_event)
+                if not events:
+                    del _cancel_events[session_id]
+
+def cancel_batch_jobs(session_id: str) -> int:
+    """세션에서 실행 중인 배치 작업에 취소 신호를 보내고 작업 수 반환"""
+    with _cancel_lock:
+        events = list(_cancel_events.get(session_id, ()))
+    for event in events:
+        event.set()
+    return len(events)
+
+def get_job_store_dir(item_keys: List[str]) -> str:
+    """
+    배치 작업의 중간 결과 보관 폴더 (없으면 생성)
+
+    폴더 이름은 항목 키(입력 내용 + 처리 설정) 목록으로 정해지므로
+    서버가 재시작된 뒤 같은 파일들을 다시 제출하면 같은 폴더에서 이어서 처리합니다.
+    BATCH_CONFIG["job_store_dir"]가 없으면 작업 공간에 만들어 실행 중으로 등록하므로,
+    취소/실패로 남은 폴더도 작업 공간의 보관 시간이 지나면 정리됩니다.
+    (작업이 끝나면 release_job_store_dir 또는 remove_job_store_dir를 호출해야 함)
+    """
+    job_id = hashlib.sha256("|".join(sorted(item_keys)).encode('utf-8')).hexdigest()[:32]
+    root = BATCH_CONFIG.get("job_store_dir")
+    if not root:
+        return start_scratch_job("batch_store", job_id)
+    job_dir = os.path.join(root, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    return job_dir
+
+def release_job_store_dir(job_dir: str) -> None:
+    """배치 작업이 끝난 보관 폴더를 남겨 둠 (작업 공간에 있으면 보관 시간 후 정리 대상)"""
+    finish_scratch_job(job_dir)
+
+def remove_job_store_dir(job_dir: str) -> None:
+    """완료된 배치 작업의 보관 폴더 삭제"""
+    shutil.rmtree(job_dir, ignore_errors=True)
+    finish_scratch_job(job_dir)
@@ -0,0 +1,393 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Union, Optional, Tuple
+
+from utils.file_utils import create_temp_file, safe_delete_file
+from utils.audio_utils import (
+    convert_mp3_to_wav, decode_audio_to_array, encode_audio_array,
+    iter_decoded_blocks, open_output_stream_encoder,
+    plan_working_rate, plan_output_channels, resample_audio
+)
+from modules.pitch_engines import apply_pitch_engine, apply_pitch_engine_stack, stream_pitch_engine
+from utils.encoder_service import (
+    encode_file, finish_stream_encoder, output_codec_args, get_output_format, get_output_extension, get_output_muxer,
+    describe_output_settings
+)
+from utils.tracing import trace_stage, bind_trace
+from utils.scratch_space import bind_scratch_dir
+from utils.result_cache import compute_file_hash, make_cache_key, get_cached_result, store_result
+from utils.probe_index import probe_audio_cached
+from config.settings import PITCH_CONFIG, CACHE_CONFIG, ENCODER_CONFIG
+
+# Gradio에 의존하지 않는 피치 조정 핵심 경로 (웹 UI, 배치 워커, CLI에서 공통 사용)
+
+def _get_file_path(audio_file: Union[str, object]) -> str:
+    """문자열 또는 파일 객체에서 파일 경로 추출"""
+    if isinstance(audio_file, str):
+        return audio_file
+    return audio_file.name
+
+def get_output_filename(input_path: str, pitch_shift_semitones: float,
+                        output_format: Optional[str] = None) -> str:
+    """출력 파일명 (원본 이름_pitch_+2.0.mp3, 확장자는 출력 형식에 따름)"""
+    original_name = os.path.splitext(os.path.basename(input_path))[0]
+    return f"{original_name}_pitch_{pitch_shift_semitones:+.1f}{get_output_extension(output_format)}"
+
+def _get_requested_rate(working_rate: Optional[int]) -> Optional[int]:
+    """작업별 요청 샘플레이트 (없으면 설정값, 설정도 None이면 원본 유지)"""
+    return working_rate or PITCH_CONFIG.get("working_sample_rate")
+
+def check_pitch_input(info: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    스트림 정보(probe_audio 결과)로 디코딩 전에 처리할 수 없는 입력을 걸러냄
+
+    Returns:
+        처리할 수 없으면 그 이유 (처리 가능하면 None)
+    """
+    if info is None:
+        return "오디오 스트림을 찾을 수 없습니다 (손상되었거나 지원하지 않는 파일)"
+    duration = info["duration"]
+    if duration is not None and duration <= 0:
+        return "오디오 길이가 0초입니다"
+    max_duration = PITCH_CONFIG.get("max_input_duration")
+    if max_duration and duration is not None and duration > max_duration:
+        return f"파일이 너무 깁니다 ({duration / 60:.1f}분, 최대 {max_duration / 60:g}분)"
+    return None
+
+def plan_pitch_job(file_path: str, working_rate: Optional[int] = None,
+                   info: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    입력 파일 정보 조회 + 이 작업의 처리 샘플레이트 결정
+
+    스트림 정보는 입력 내용 해시별 색인(utils.probe_index)을 거쳐 조회합니다.
+    info(이미 조회한 probe_audio 결과)를 주면 조회하지 않고 그 값을 사용합니다.
+
+    Returns:
+        (probe_audio 결과, 처리 샘플레이트)
+
+    Raises:
+        ValueError: 처리할 수 없는 입력 (check_pitch_input 참고)
+    """
+    if info is None:
+        info = probe_audio_cached(file_path)
+    error = check_pitch_input(info)
+    if error:
+        raise ValueError(error)
+    sr = plan_working_rate(info["sample_rate"], _get_requested_rate(working_rate),
+                           PITCH_CONFIG.get("max_working_sample_rate"))
+    return info, sr
+
+def plan_pitch_channels(info: Dict[str, Any], output_format: Optional[str] = None) -> int:
+    """
+    처리/출력 채널 수 결정 (probe_audio 결과 기준)
+
+    PITCH_CONFIG["keep_channels"]가 켜져 있으면 원본 채널 수를 유지하되 출력 형식의 최대 채널 수로
+    제한하고 (MP3는 스테레오), 꺼져 있으면 모노로 섞어서 처리합니다.
+    """
+    if not PITCH_CONFIG.get("keep_channels", True):
+        return 1
+    return plan_output_channels(info["channels"], output_format)
+
+def make_output_key(file_hash: str, pitch_shift_semitones: float, engine: str,
+                    working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                    bitrate: Optional[str] = None) -> str:
+    """입력 해시 + 처리 설정(피치, 엔진, 출력 형식/인코더 설정, 채널 처리, 처리 샘플레이트) 기준 결과 키"""
+    settings = describe_output_settings(output_format, bitrate)
+    if PITCH_CONFIG.get("keep_channels", True):
+        settings += "|keep_channels"  # 모노로 섞어서 만든 결과와 구분
+    return make_cache_key(file_hash, pitch_shift_semitones, engine, settings, _get_requested_rate(working_rate))
+
+def get_output_key(file_path: str, pitch_shift_semitones: float, engine: str,
+                   working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                   bitrate: Optional[str] = None) -> str:
+    """입력 파일 내용 + 처리 설정 기준 결과 키 (결과 캐시, 배치 처리 기록에 공통 사용)"""
+    return make_output_key(compute_file_hash(file_path), pitch_shift_semitones, engine,
+                           working_rate, output_format, bitrate)
+
+def _get_cache_key(file_path: str, pitch_shift_semitones: float, engine: str,
+                   working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                   bitrate: Optional[str] = None, file_hash: Optional[str] = None) -> Optional[str]:
+    """입력 파일 내용과 처리 설정으로 결과 캐시 키 생성 (캐시 비활성화 시 None, file_hash가 있으면 파일을 읽지 않음)"""
+    if not CACHE_CONFIG.get("enabled", True):
+        return None
+    if file_hash:
+        return make_output_key(file_hash, pitch_shift_semitones, engine, working_rate, output_format, bitrate)
+    try:
+        return get_output_key(file_path, pitch_shift_semitones, engine, working_rate, output_format, bitrate)
+    except OSError:
+        return None
+
+def lookup_cached_pitch_result(file_path: str, pitch_shift_semitones: float,
+                               engine: str, working_rate: Optional[int] = None,
+                               output_format: Optional[str] = None,
+                               bitrate: Optional[str] = None) -> Optional[str]:
+    """캐시에 같은 입력/설정의 결과가 있으면 그 복사본 경로 반환"""
+    cache_key = _get_cache_key(file_path, pitch_shift_semitones, engine, working_rate, output_format, bitrate)
+    return get_cached_result(cache_key, get_output_extension(output_format)) if cache_key else None
+
+def shift_pitch(audio_file: Union[str, object], pitch_shift_semitones: float,
+                engine: str = PITCH_CONFIG["default_engine"], use_cache: bool = True,
+                working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                bitrate: Optional[str] = None, info: Optional[Dict[str, Any]] = None,
+                file_hash: Optional[str] = None) -> str:
+    """
+    오디오 파일의 피치를 조정하는 함수
+    
+    같은 내용의 파일을 같은 설정으로 처리한 결과가 캐시에 있으면 바로 반환합니다.
+    처리할 수 없는 입력(check_pitch_input)은 디코딩하지 않고 오류 메시지를 반환합니다.
+    기본적으로 메모리 내 파이프라인(디코딩 → 피치 조정 → 인코딩)을 사용하며,
+    실패하면 임시 파일 기반 경로로 다시 시도합니다.
+    
+    Args:
+        audio_file: 입력 오디오 파일 경로 (문자열 또는 파일 객체)
+        pitch_shift_semitones: 피치 변경량 (반음 단위)
+        engine: 피치 조정 엔진 이름 (modules.pitch_engines.PITCH_ENGINES 참고)
+        use_cache: 결과 캐시 사용 여부
+        working_rate: 처리 샘플레이트 (None이면 PITCH_CONFIG["working_sample_rate"], 업샘플링은 하지 않음)
+        output_format: 출력 형식 (mp3 / wav / flac / opus, None이면 OUTPUT_CONFIG 기본값)
+        bitrate: 출력 비트레이트 (예: "192k", None이면 형식 기본값, WAV/FLAC은 무시)
+        info: 이미 조회한 probe_audio 결과 (배치 계획 단계에서 전달, None이면 색인에서 조회)
+        file_hash: 이미 계산한 입력 내용 해시 (None이면 캐시 키를 만들 때 계산)
+    
+    Returns:
+        처리된 오디오 파일 경로 또는 오류 메시지
+    """
+    file_path = _get_file_path(audio_file)
+    output_format = get_output_format(output_format)
+    extension = get_output_extension(output_format)
+    
+    cache_key = None
+    if use_cache:
+        with trace_stage("cache_lookup"):
+            cache_key = _get_cache_key(file_path, pitch_shift_semitones, engine, working_rate,
+                                       output_format, bitrate, file_hash)
+            cached = get_cached_result(cache_key, extension) if cache_key else None
+        if cached:
+            return cached
+    
+    # 손상된 파일, 너무 긴 파일 등은 디코딩 전에 헤더 정보만으로 거부
+    try:
+        rejection = check_pitch_input(info if info is not None else probe_audio_cached(file_path))
+    except OSError as e:
+        rejection = f"파일 읽기 실패: {str(e)}"
+    if rejection:
+        return f"오류 발생: {rejection}"
+    
+    result = None
+    if PITCH_CONFIG.get("in_memory_pipeline", True):
+        try:
+            result = _shift_pitch_in_memory(file_path, pitch_shift_semitones, engine, working_rate,
+                                            output_format, bitrate, info)
+        except Exception:
+            pass  # 임시 파일 경로로 대체
+    
+    if result is None:
+        result = _shift_pitch_with_temp_files(file_path, pitch_shift_semitones, engine, working_rate,
+                                              output_format, bitrate)
+    
+    if cache_key and os.path.isfile(result):
+        store_result(cache_key, result, extension)
+    
+    return result
+
+def _shift_pitch_in_memory(file_path: str, pitch_shift_semitones: float, engine: str,
+                           working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                           bitrate: Optional[str] = None, info: Optional[Dict[str, Any]] = None) -> str:
+    """
+    ffmpeg 파이프로 디코딩/인코딩하여 중간 임시 파일 없이 피치 조정
+    
+    디코딩 → 피치 조정 → 인코딩을 하나의 처리 샘플레이트로 수행하므로
+    샘플레이트 변환은 디코딩 직후 최대 한 번(soxr HQ)만 일어납니다.
+    다채널은 (채널, 샘플) 배열 하나로 디코딩하여 엔진이 모든 채널을 함께 처리합니다.
+    """
+    info, sr = plan_pitch_job(file_path, working_rate, info)
+    channels = plan_pitch_channels(info, output_format)
+    
+    # 긴 파일은 블록 단위 스트리밍으로 처리하여 메모리 사용량을 일정하게 유지
+    streaming_min = PITCH_CONFIG.get("streaming_min_duration")
+    if streaming_min is not None and (info["duration"] is None or info["duration"] >= streaming_min):
+        return _shift_pitch_streaming(file_path, info["sample_rate"], sr, pitch_shift_semitones, engine,
+                                      output_format, bitrate, channels)
+    
+    # 오디오를 float 배열로 바로 디코딩 (필요하면 처리 샘플레이트로 변환)
+    y, sr = decode_audio_to_array(file_path, sr, info["sample_rate"], channels)
+    
+    # 피치 시프트 적용
+    with trace_stage("pitch_shift", y.nbytes):
+        y_shifted = apply_pitch_engine(engine, y, sr, pitch_shift_semitones)
+    
+    # PCM 데이터를 인코더로 바로 전달 (WAV는 인코더 없이 바로 기록)
+    final_output_path = create_temp_file(get_output_extension(output_format))
+    try:
+        encode_audio_array(y_shifted, sr, final_output_path, output_format, bitrate)
+    except Exception:
+        safe_delete_file(final_output_path)
+        raise
+    
+    return final_output_path
+
+def shift_pitch_stack(jobs: List[Tuple[str, int]], sr: int, pitch_shift_semitones: float,
+                      engine: str = PITCH_CONFIG["default_engine"],
+                      working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                      bitrate: Optional[str] = None, channels: int = 1,
+                      file_hashes: Optional[List[Optional[str]]] = None) -> List[str]:
+    """
+    같은 처리 샘플레이트/채널 수의 짧은 클립 여러 개를 한 번에 피치 조정 (배치 처리용)
+    
+    클립별로 디코딩한 뒤 하나의 2차원 배열로 묶어 엔진을 한 번만 호출하고,
+    결과를 클립별 원래 길이로 나누어 각각 출력 형식으로 인코딩합니다.
+    디코딩에 실패한 클립은 shift_pitch()로 따로 처리합니다.
+    
+    Args:
+        jobs: [(입력 파일 경로, 원본 샘플레이트), ...]
+        sr: 처리 샘플레이트 (plan_pitch_job()으로 결정한 값)
+        working_rate: 결과 캐시 키에 쓰이는 요청 샘플레이트
+        output_format, bitrate: 출력 형식과 비트레이트 (shift_pitch 참고)
+        channels: 처리 채널 수 (plan_pitch_channels()로 결정한 값, 모든 클립에 공통)
+        file_hashes: 클립별로 이미 계산한 입력 내용 해시 (jobs와 같은 순서, None이면 캐시 키를 만들 때 계산)
+    
+    Returns:
+        입력 순서대로 처리된 오디오 파일 경로 또는 오류 메시지
+    """
+    output_format = get_output_format(output_format)
+    extension = get_output_extension(output_format)
+    results: List[Optional[str]] = [None] * len(jobs)
+    cache_keys: Dict[int, str] = {}
+    clips = {}
+    
+    for index, (file_path, source_rate) in enumerate(jobs):
+        file_hash = file_hashes[index] if file_hashes else None
+        with trace_stage("cache_lookup"):
+            cache_key = _get_cache_key(file_path, pitch_shift_semitones, engine, working_rate,
+                                       output_format, bitrate, file_hash)
+            cached = get_cached_result(cache_key, extension) if cache_key else None
+        if cached:
+            results[index] = cached
+            continue
+        if cache_key:
+            cache_keys[index] = cache_key
+        try:
+            clips[index], _ = decode_audio_to_array(file_path, sr, source_rate, channels)
+        except Exception:
+            results[index] = shift_pitch(file_path, pitch_shift_semitones, engine, use_cache=False,
+                                         working_rate=working_rate, output_format=output_format,
+                                         bitrate=bitrate, file_hash=file_hash)
+    
+    if clips:
+        indices = list(clips)
+        with trace_stage("pitch_shift", sum(y.nbytes for y in clips.values())):
+            shifted = apply_pitch_engine_stack(engine, [clips[index] for index in indices], sr,
+                                               pitch_shift_semitones)
+        clips.clear()
+        
+        def encode(item: Tuple[int, np.ndarray]) -> Tuple[int, str]:
+            index, y_shifted = item
+            output_path = create_temp_file(extension)
+            try:
+                encode_audio_array(y_shifted, sr, output_path, output_format, bitrate)
+            except Exception as e:
+                safe_delete_file(output_path)
+                return index, f"오류 발생: {str(e)}"
+            return index, output_path
+        
+        # 실제 인코딩 동시 실행 수는 인코더 풀 크기로 제한되므로 스레드도 그만큼만 사용
+        with ThreadPoolExecutor(max_workers=max(1, min(len(indices), ENCODER_CONFIG["max_workers"]))) as pool:
+            for index, result in pool.map(bind_scratch_dir(bind_trace(encode)), zip(indices, shifted)):
+                results[index] = result
+    
+    for index, cache_key in cache_keys.items():
+        if os.path.isfile(results[index]):
+            store_result(cache_key, results[index], extension)
+    
+    return results
+
+def _shift_pitch_streaming(file_path: str, source_rate: int, sr: int,
+                           pitch_shift_semitones: float, engine: str,
+                           output_format: Optional[str] = None, bitrate: Optional[str] = None,
+                           channels: int = 1) -> str:
+    """긴 파일을 블록 단위로 디코딩 → 피치 조정 → 인코딩하는 스트리밍 경로"""
+    block_frames = int(PITCH_CONFIG["stream_block_seconds"] * sr)
+    overlap_frames = int(PITCH_CONFIG["stream_overlap_seconds"] * sr)
+    
+    final_output_path = create_temp_file(get_output_extension(output_format))
+    encoder = open_output_stream_encoder(final_output_path, sr, channels, output_format, bitrate)
+    try:
+        # 디코딩/피치 조정/인코딩이 블록 단위로 겹쳐 실행되므로 하나의 단계로 측정
+        with trace_stage("stream_shift_encode") as record:
+            blocks = iter_decoded_blocks(file_path, sr, block_frames, source_rate, channels)
+            for out in stream_pitch_engine(engine, blocks, sr, pitch_shift_semitones,
+                                           block_frames, overlap_frames):
+                # 다채널 블록 (채널, 샘플)은 인터리브하여 인코더로 전달
+                encoder.stdin.write(memoryview(np.ascontiguousarray(out.T)).cast('B'))
+                record["bytes"] += out.nbytes
+            finish_stream_encoder(encoder)
+    except Exception:
+        finish_stream_encoder(encoder, abort=True)
+        safe_delete_file(final_output_path)
+        raise
+    
+    return final_output_path
+
+def _shift_pitch_with_temp_files(file_path: str, pitch_shift_semitones: float, engine: str,
+                                 working_rate: Optional[int] = None, output_format: Optional[str] = None,
+                                 bitrate: Optional[str] = None) -> str:
+    """임시 WAV 파일을 거치는 기존 피치 조정 경로 (대체용)"""
+    temp_wav_path = None
+    temp_output_path = None
+    
+    try:
+        # MP3 파일을 WAV로 변환 (librosa 호환성을 위해)
+        if file_path.lower().endswith('.mp3'):
+            temp_wav_path = create_temp_file('.wav')
+            if not convert_mp3_to_wav(file_path, temp_wav_path):
+                return "MP3 to WAV 변환 실패"
+            audio_path = temp_wav_path
+        else:
+            audio_path = file_path
+        
+        import librosa
+        import soundfile as sf
+        
+        # 오디오 로드 (채널 유지 시 (채널, 샘플) 배열)
+        with trace_stage("load", os.path.getsize(audio_path)):
+            y, source_rate = librosa.load(audio_path, sr=None, mono=not PITCH_CONFIG.get("keep_channels", True))
+        
+        # 처리 샘플레이트로 한 번만 변환
+        sr = plan_working_rate(source_rate, _get_requested_rate(working_rate),
+                               PITCH_CONFIG.get("max_working_sample_rate"))
+        y = resample_audio(y, source_rate, sr)
+        
+        # 피치 시프트 적용
+        with trace_stage("pitch_shift", y.nbytes):
+            y_shifted = apply_pitch_engine(engine, y, sr, pitch_shift_semitones)
+        
+        # 임시 파일로 저장 (soundfile은 (프레임, 채널) 배열을 받음)
+        temp_output_path = create_temp_file('.wav')
+        with trace_stage("wav_write", y_shifted.nbytes):
+            sf.write(temp_output_path, y_shifted.T, sr)
+        
+        # WAV 출력이면 그대로 사용
+        output_format = get_output_format(output_format)
+        if output_format == "wav":
+            final_output_path, temp_output_path = temp_output_path, None
+            return final_output_path
+        
+        # WAV를 출력 형식으로 변환 (인코더 풀 사용)
+        # (출력 형식의 최대 채널 수를 넘으면 인코더가 다운믹스, 예: 5.1 → MP3 스테레오)
+        channels = 1 if y_shifted.ndim == 1 else plan_output_channels(y_shifted.shape[0], output_format)
+        final_output_path = create_temp_file(get_output_extension(output_format))
+        with trace_stage(f"{output_format}_encode", os.path.getsize(temp_output_path)):
+            encode_file(temp_output_path, final_output_path,
+                        output_codec_args(output_format, bitrate) + ['-ac', str(channels)],
+                        get_output_muxer(output_format))
+        
+        return final_output_path
+        
+    except Exception as e:
+        return f"오류 발생: {str(e)}"
+    
+    finally:
+        # 임시 파일 정리
+        safe_delete_file(temp_wav_path)
+        safe_delete_file(temp_output_path)
\ No newline at end of file
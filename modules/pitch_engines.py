@@ -0,0 +1,628 @@
+import itertools
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import soxr
+
+from utils.encoder_service import get_ffmpeg_path
+
+# librosa는 import만으로 numba/scipy를 불러오는 버전이 있어 각 함수에서 처음 사용할 때 불러옵니다
+
+# 오디오 배열은 모노 (샘플,) 또는 다채널 (채널, 샘플)이며 모든 엔진이 두 형태를 모두 받습니다.
+# 다채널은 채널별 Python 반복 없이 한 번의 벡터화 호출로 처리하고, 출력은 입력과 같은 모양입니다.
+
+# 피치 조정 엔진 함수 시그니처: (audio_array, sample_rate, n_steps) -> shifted_array
+PitchEngineFunc = Callable[[np.ndarray, int, float], np.ndarray]
+
+# 렌더링 결과 처리 함수 시그니처: (n_steps, shifted_array) -> 결과 (인코딩 등, 배열은 이 함수가 끝나면 해제됨)
+PitchConsumeFunc = Callable[[float, np.ndarray], Any]
+
+# 다중 피치 엔진 함수 시그니처: (audio_array, sample_rate, [n_steps, ...], consume) -> [consume 결과, ...]
+PitchManyFunc = Callable[[np.ndarray, int, Sequence[float], PitchConsumeFunc], List[Any]]
+
+# 묶음 엔진 함수 시그니처: (같은 길이로 맞춘 배열 (클립, [채널,] 샘플), sample_rate, n_steps) -> 같은 모양의 배열
+PitchStackFunc = Callable[[np.ndarray, int, float], np.ndarray]
+
+# 스트리밍 엔진 함수 시그니처: (입력 블록들, sample_rate, n_steps) -> 출력 블록들
+PitchStreamFunc = Callable[[Iterable[np.ndarray], int, float], Iterator[np.ndarray]]
+
+# librosa.effects.pitch_shift 기본 STFT 설정
+_N_FFT = 2048
+_HOP_LENGTH = _N_FFT // 4
+
+def _pitch_ratio(n_steps: float) -> float:
+    """반음 단위 변경량을 주파수 비율로 변환"""
+    return 2.0 ** (n_steps / 12.0)
+
+def _fit_length(y: np.ndarray, length: int) -> np.ndarray:
+    """배열 길이(마지막 축)를 원본 길이에 맞춤 (자르거나 0으로 채움)"""
+    import librosa
+    return librosa.util.fix_length(y, size=length)
+
+def shift_with_librosa(y: np.ndarray, sr: int, n_steps: float) -> np.ndarray:
+    """librosa 위상 보코더(STFT) + 리샘플링 기반 피치 조정 (다채널은 채널 전체를 하나의 STFT 배치로 처리)"""
+    import librosa
+    return librosa.effects.pitch_shift(y, sr=sr, n_steps=n_steps)
+
+def shift_stack_with_librosa(stack: np.ndarray, sr: int, n_steps: float) -> np.ndarray:
+    """여러 클립 (클립, [채널,] 샘플)을 한 번의 STFT/위상 보코더/리샘플링 호출로 피치 조정"""
+    # librosa는 마지막 축 앞의 차원을 채널처럼 처리하므로 프레임 단위 반복이 클립 수와 무관하게 한 번만 실행됨
+    import librosa
+    return librosa.effects.pitch_shift(stack, sr=sr, n_steps=n_steps)
+
+# 위상 보코더의 프레임당 기대 위상 증가량 (librosa.phase_vocoder와 동일)
+_PHI_ADVANCE = _HOP_LENGTH * np.linspace(0, np.pi, 1 + _N_FFT // 2)
+_PHI_ADVANCE_WRAPPED = np.mod(_PHI_ADVANCE, 2.0 * np.pi).astype(np.float32)
+
+def _analyze_frames(spectra: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """STFT 프레임을 크기(float32)와 위상(float32)으로 분리"""
+    return np.abs(spectra).astype(np.float32), np.angle(spectra).astype(np.float32)
+
+def _phase_deltas(phases: np.ndarray) -> np.ndarray:
+    """인접 분석 프레임 간 위상 편차 (기대 증가량을 뺀 뒤 [-π, π]로 정규화)"""
+    dphase = np.diff(phases, axis=-1) - _PHI_ADVANCE[:, None].astype(np.float32)
+    return dphase - (2.0 * np.pi * np.round(dphase / (2.0 * np.pi))).astype(np.float32)
+
+def _vocode_steps(mags: np.ndarray, deltas: np.ndarray, steps: np.ndarray,
+                  phase_acc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    위상 보코더 출력 프레임을 한 번에 계산 (librosa.phase_vocoder의 벡터화 버전)
+    
+    Args:
+        mags: 분석 프레임 크기 ([채널,] 주파수, 프레임)
+        deltas: _phase_deltas()로 구한 인접 프레임 간 위상 편차 ([채널,] 주파수, 프레임 - 1)
+        steps: mags 기준 (소수) 프레임 위치 배열. 각 위치 s는 프레임 int(s), int(s)+1을 사용
+        phase_acc: 첫 출력 프레임의 위상 ([채널,] 주파수, float64, 2π 범위)
+    
+    Returns:
+        (시간 늘이기 STFT 프레임, 다음 프레임의 위상)
+    """
+    index = steps.astype(np.int64)
+    alpha = (steps % 1.0).astype(np.float32)
+    mag = (1.0 - alpha) * mags[..., index] + alpha * mags[..., index + 1]
+    
+    # 각 출력 프레임의 위상 증가량은 이전 출력과 무관하므로 누적합으로 계산 (다채널은 앞쪽 채널 축째로)
+    # 증가량을 2π 주기로 줄여 float32로 계산하고, 누적합만 float64로 계산
+    increments = _PHI_ADVANCE_WRAPPED[:, None] + deltas[..., index]
+    advance = np.cumsum(increments, axis=-1, dtype=np.float64)
+    phases = (phase_acc[..., None] + (advance - increments)).astype(np.float32)
+    
+    stretched = np.empty(mag.shape, dtype=np.complex64)
+    stretched.real = mag * np.cos(phases)
+    stretched.imag = mag * np.sin(phases)
+    return stretched, np.mod(phase_acc + advance[..., -1], 2.0 * np.pi)
+
+def _render_from_analysis(mags: np.ndarray, deltas: np.ndarray, first_phase: np.ndarray,
+                          length: int, sr: int, n_steps: float,
+                          chunk_frames: int = 2048) -> np.ndarray:
+    """미리 분석한 STFT로 한 가지 피치 변경량을 렌더링 (time_stretch + resample)"""
+    import librosa
+    rate = 2.0 ** (-n_steps / 12.0)
+    # phase_vocoder와 같이 끝에 빈 프레임 2개가 붙어 있다고 가정
+    all_steps = np.arange(0, mags.shape[-1] - 2, rate, dtype=np.float64)
+    
+    # 메모리 사용량을 제한하기 위해 출력 프레임을 나누어 계산 (위상은 이어서 누적)
+    phase_acc = np.mod(first_phase.astype(np.float64), 2.0 * np.pi)
+    stretched = np.empty(mags.shape[:-1] + (len(all_steps),), dtype=np.complex64)
+    for start in range(0, len(all_steps), chunk_frames):
+        steps = all_steps[start:start + chunk_frames]
+        stretched[..., start:start + len(steps)], phase_acc = _vocode_steps(mags, deltas, steps, phase_acc)
+    
+    y_stretch = librosa.istft(stretched, hop_length=_HOP_LENGTH, n_fft=_N_FFT,
+                              dtype=np.float32, length=int(round(length / rate)))
+    y_shift = librosa.resample(y_stretch, orig_sr=float(sr) / rate, target_sr=sr, res_type="soxr_hq")
+    return _fit_length(y_shift, length)
+
+def shift_many_with_librosa(y: np.ndarray, sr: int, steps_list: Sequence[float],
+                            consume: PitchConsumeFunc) -> List[Any]:
+    """STFT 분석(크기, 위상 편차)을 한 번만 수행하고 여러 피치 변경량을 병렬로 렌더링"""
+    import librosa
+    stft = librosa.stft(y, n_fft=_N_FFT, hop_length=_HOP_LENGTH)
+    stft = np.concatenate([stft, np.zeros(stft.shape[:-1] + (2,), dtype=stft.dtype)], axis=-1)
+    mags, phases = _analyze_frames(stft)
+    deltas = _phase_deltas(phases)
+    first_phase = phases[..., 0].copy()
+    del stft, phases
+    # 렌더링 결과는 바로 consume에 넘기므로 동시에 메모리에 있는 결과는 작업 스레드 수만큼
+    return _map_parallel(
+        lambda n_steps: consume(n_steps, _render_from_analysis(mags, deltas, first_phase, y.shape[-1],
+                                                               sr, n_steps)),
+        steps_list
+    )
+
+def _map_parallel(func: Callable, items: Sequence) -> List:
+    """스레드 풀에서 func를 병렬 실행 (NumPy/FFT/ffmpeg 처리는 GIL을 해제함)"""
+    from modules.batch_processor import get_worker_count
+    workers = max(1, min(len(items), get_worker_count()))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+def stream_with_librosa(blocks: Iterable[np.ndarray], sr: int, n_steps: float) -> Iterator[np.ndarray]:
+    """librosa.effects.pitch_shift와 같은 알고리즘을 블록 단위로 수행하는 스트리밍 버전"""
+    # STFT/위상 누적/overlap-add/리샘플러 상태를 블록 사이에 이어서 사용하므로 블록 경계에 이음새가 없음
+    import librosa
+    source = iter(blocks)
+    first = next(source, None)
+    if first is None:
+        return
+    mono = np.ndim(first) == 1
+    channels = 1 if mono else first.shape[0]
+    
+    rate = 2.0 ** (-n_steps / 12.0)
+    window = librosa.filters.get_window("hann", _N_FFT, fftbins=True).astype(np.float32)
+    window_sq = window ** 2
+    resampler = soxr.ResampleStream(sr / rate, sr, channels, dtype="float32", quality="HQ")
+    
+    # 내부 상태는 모노도 (채널, ...) 모양으로 유지 (다채널은 채널 전체를 함께 처리)
+    # STFT 입력 버퍼 (center=True와 같이 앞쪽을 n_fft//2 만큼 0으로 채움)
+    samples = np.zeros((channels, _N_FFT // 2), dtype=np.float32)
+    samples_start = 0  # samples[:, 0]의 (패딩 포함) 절대 위치
+    n_input = 0
+    next_frame = 0
+    
+    # 위상 보코더 상태 (분석 프레임의 크기/위상)
+    mags = np.zeros((channels, 1 + _N_FFT // 2, 0), dtype=np.float32)
+    phases = np.zeros((channels, 1 + _N_FFT // 2, 0), dtype=np.float32)
+    spectra_start = 0  # mags[..., 0]의 프레임 번호
+    phase_acc = None
+    next_step = 0  # 다음 출력 프레임 번호
+    
+    # ISTFT overlap-add 상태 (절대 위치는 패딩 포함 좌표, 창 함수 정규화는 채널 공통)
+    ola = np.zeros((channels, 0), dtype=np.float32)
+    ola_norm = np.zeros(0, dtype=np.float32)
+    ola_start = 0
+    trimmed = 0  # 앞쪽 패딩(n_fft//2) 중 이미 버린 샘플 수
+    n_output = 0
+    
+    def analyze(final: bool):
+        """입력 버퍼에서 만들 수 있는 STFT 프레임 계산"""
+        nonlocal samples, samples_start, next_frame, mags, phases
+        available = samples_start + samples.shape[1]
+        count = max(0, (available - _N_FFT) // _HOP_LENGTH + 1 - next_frame)
+        if count:
+            starts = (next_frame + np.arange(count)) * _HOP_LENGTH - samples_start
+            frames = samples[:, starts[:, None] + np.arange(_N_FFT)[None, :]] * window
+            new_mags, new_phases = _analyze_frames(np.fft.rfft(frames, axis=-1).swapaxes(1, 2))
+            mags = np.concatenate([mags, new_mags], axis=-1)
+            phases = np.concatenate([phases, new_phases], axis=-1)
+            next_frame += count
+        keep_from = next_frame * _HOP_LENGTH
+        if keep_from > samples_start:
+            samples = samples[:, keep_from - samples_start:]
+            samples_start = keep_from
+        if final:
+            # phase_vocoder와 같이 끝에 빈 프레임 2개 추가
+            padding = np.zeros(mags.shape[:-1] + (2,), dtype=np.float32)
+            mags = np.concatenate([mags, padding], axis=-1)
+            phases = np.concatenate([phases, padding], axis=-1)
+    
+    def vocode(final: bool) -> np.ndarray:
+        """사용 가능한 STFT 프레임으로 시간 늘이기 프레임 생성 (벡터화된 위상 누적)"""
+        nonlocal mags, phases, spectra_start, phase_acc, next_step
+        total_frames = spectra_start + mags.shape[-1]
+        # 출력 프레임 t는 입력 프레임 int(t*rate), int(t*rate)+1을 사용
+        limit = total_frames - 2 if final else total_frames - 1
+        count = max(0, int(np.ceil(limit / rate)) - next_step)
+        steps = (next_step + np.arange(count)) * rate
+        steps = steps[steps < limit]
+        if len(steps) == 0:
+            return np.zeros(mags.shape[:-1] + (0,), dtype=np.complex64)
+        
+        if phase_acc is None:
+            phase_acc = np.mod(phases[..., 0].astype(np.float64), 2.0 * np.pi)
+        stretched, phase_acc = _vocode_steps(mags, _phase_deltas(phases), steps - spectra_start, phase_acc)
+        
+        next_step += len(steps)
+        drop = int(next_step * rate) - spectra_start
+        if drop > 0:
+            mags, phases = mags[..., drop:], phases[..., drop:]
+            spectra_start += drop
+        return stretched
+    
+    def synthesize(stretched: np.ndarray, final: bool) -> np.ndarray:
+        """ISTFT overlap-add 후 더 이상 바뀌지 않는 구간만 정규화하여 반환"""
+        nonlocal ola, ola_norm, ola_start, trimmed
+        first = next_step - stretched.shape[-1]
+        if stretched.shape[-1]:
+            frames = np.fft.irfft(stretched, n=_N_FFT, axis=1).swapaxes(1, 2).astype(np.float32) * window
+            end = (next_step - 1) * _HOP_LENGTH + _N_FFT
+            if end - ola_start > ola.shape[1]:
+                grow = end - ola_start - ola.shape[1]
+                ola = np.concatenate([ola, np.zeros((channels, grow), dtype=np.float32)], axis=1)
+                ola_norm = np.concatenate([ola_norm, np.zeros(grow, dtype=np.float32)])
+            # hop = n_fft / 4 이므로 프레임을 4등분하여 한 번에 더함
+            count = frames.shape[1]
+            base = first * _HOP_LENGTH - ola_start
+            for j in range(_N_FFT // _HOP_LENGTH):
+                start = base + j * _HOP_LENGTH
+                section = slice(j * _HOP_LENGTH, (j + 1) * _HOP_LENGTH)
+                ola[:, start:start + count * _HOP_LENGTH] += frames[:, :, section].reshape(channels, -1)
+                ola_norm[start:start + count * _HOP_LENGTH].reshape(count, _HOP_LENGTH)[:] += window_sq[section]
+        
+        ready = ola.shape[1] if final else max(0, next_step * _HOP_LENGTH - ola_start)
+        out = ola[:, :ready]
+        norm = ola_norm[:ready]
+        out = np.where(norm > np.finfo(np.float32).tiny, out / np.maximum(norm, np.finfo(np.float32).tiny), out)
+        ola, ola_norm = ola[:, ready:], ola_norm[ready:]
+        ola_start += ready
+        
+        # center=True 패딩에 해당하는 앞쪽 n_fft//2 샘플 제거
+        skip = min(_N_FFT // 2 - trimmed, out.shape[1])
+        trimmed += skip
+        return out[:, skip:]
+    
+    def resample(stretched: np.ndarray, last: bool = False) -> np.ndarray:
+        """soxr 스트림 리샘플러로 변환 ((프레임, 채널) 배열을 주고받음)"""
+        return resampler.resample_chunk(np.ascontiguousarray(stretched.T), last=last).T
+    
+    for block in itertools.chain([first], source):
+        block = np.asarray(block, dtype=np.float32).reshape(channels, -1)
+        n_input += block.shape[1]
+        if n_steps == 0:
+            out = block
+        else:
+            samples = np.concatenate([samples, block], axis=1)
+            analyze(final=False)
+            out = resample(synthesize(vocode(final=False), final=False))
+        out = out[:, :max(0, n_input - n_output)]
+        n_output += out.shape[1]
+        if out.shape[1]:
+            yield out[0] if mono else out
+    
+    if n_steps == 0:
+        return
+    
+    # 남은 입력 처리 (뒤쪽 center 패딩 포함)
+    samples = np.concatenate([samples, np.zeros((channels, _N_FFT // 2), dtype=np.float32)], axis=1)
+    analyze(final=True)
+    stretched = synthesize(vocode(final=True), final=True)
+    stretch_len = int(round(n_input / rate))
+    produced = ola_start - _N_FFT // 2  # 지금까지 만든 시간 늘이기 신호 길이
+    stretched = stretched[:, :max(0, stretched.shape[1] - max(0, produced - stretch_len))]
+    if produced < stretch_len:
+        stretched = np.concatenate([stretched, np.zeros((channels, stretch_len - produced), dtype=np.float32)],
+                                   axis=1)
+    
+    out = resample(stretched, last=True)
+    out = out[:, :max(0, n_input - n_output)]
+    n_output += out.shape[1]
+    if n_output < n_input:
+        out = np.concatenate([out, np.zeros((channels, n_input - n_output), dtype=np.float32)], axis=1)
+    if out.shape[1]:
+        yield out[0] if mono else out
+
+def _wsola_stretch(y: np.ndarray, sr: int, stretch: float) -> np.ndarray:
+    """WSOLA 방식 시간 늘이기 (출력 길이 ≈ 입력 길이 × stretch)"""
+    # 프레임 위치 탐색만 순차적으로 수행하고 프레임 추출/overlap-add는 배열 연산으로 한 번에 처리
+    # 다채널은 채널 평균으로 찾은 위치를 모든 채널에 적용 (채널 간 위상 관계 유지)
+    frame_length = max(256, int(sr * 0.04)) // 2 * 2
+    hop = frame_length // 2
+    tolerance = max(16, int(sr * 0.01))
+    # 상관도는 약 11kHz로 간축한 신호에서 계산한 뒤 원래 해상도에서 미세 조정
+    step = max(1, sr // 11025)
+
+    n = y.shape[-1]
+    out_len = int(round(n * stretch))
+    n_frames = max(1, int(np.ceil(max(out_len - frame_length, 0) / hop)) + 1)
+    nominal = np.round(np.arange(n_frames) * hop / stretch).astype(np.int64)
+
+    pad = tolerance + frame_length + hop
+    padded = np.pad(y if y.ndim == 1 else y.mean(axis=0), (pad, pad + frame_length))
+    coarse = padded[::step]
+
+    window = np.hanning(frame_length).astype(np.float32)
+    positions = np.empty(n_frames, dtype=np.int64)
+    positions[0] = nominal[0] + pad
+
+    c_len = frame_length // step
+    c_tol = tolerance // step
+    for k in range(1, n_frames):
+        # 이전 프레임의 자연스러운 연속 구간을 기준으로 가장 유사한 위치 탐색
+        ref_start = positions[k - 1] + hop
+        center = nominal[k] + pad
+        ref = coarse[ref_start // step: ref_start // step + c_len]
+        base = center // step - c_tol
+        scores = np.correlate(coarse[base: base + 2 * c_tol + c_len], ref, 'valid')
+        best = (base + int(np.argmax(scores))) * step
+
+        if step > 1:
+            ref_fine = padded[ref_start: ref_start + frame_length]
+            scores = np.correlate(padded[best - step: best + step + frame_length], ref_fine, 'valid')
+            best += int(np.argmax(scores)) - step
+        positions[k] = best
+
+    # 선택된 프레임을 한 번에 잘라내어 창 함수 적용 후 overlap-add (다채널은 모든 채널을 함께)
+    if y.ndim > 1:
+        padded = np.pad(y, [(0, 0)] * (y.ndim - 1) + [(pad, pad + frame_length)])
+    lead = padded.shape[:-1]
+    index = positions[:, None] + np.arange(frame_length)[None, :]
+    frames = padded[..., index] * window
+    output = np.zeros(lead + ((n_frames + 1) * hop,), dtype=np.float32)
+    norm = np.zeros((n_frames + 1) * hop, dtype=np.float32)
+    halves = frames.reshape(lead + (n_frames, 2, hop))
+    output[..., :n_frames * hop] += halves[..., 0, :].reshape(lead + (-1,))
+    output[..., hop:(n_frames + 1) * hop] += halves[..., 1, :].reshape(lead + (-1,))
+    win_halves = window.reshape(2, hop)
+    norm[:n_frames * hop].reshape(n_frames, hop)[:] += win_halves[0]
+    norm[hop:(n_frames + 1) * hop].reshape(n_frames, hop)[:] += win_halves[1]
+    output /= np.maximum(norm, 1e-3)
+
+    return _fit_length(output, out_len)
+
+def shift_with_wsola(y: np.ndarray, sr: int, n_steps: float) -> np.ndarray:
+    """WSOLA 시간 늘이기 + 리샘플링 기반 피치 조정"""
+    import librosa
+    if n_steps == 0:
+        return y.copy()
+    ratio = _pitch_ratio(n_steps)
+    stretched = _wsola_stretch(y.astype(np.float32, copy=False), sr, ratio)
+    shifted = librosa.resample(stretched, orig_sr=sr * ratio, target_sr=sr, res_type="soxr_mq")
+    return _fit_length(shifted, y.shape[-1])
+
+def _ffmpeg_shift_command(sr: int, n_steps: float, channels: int) -> List[str]:
+    """ffmpeg 필터 체인(asetrate → aresample → atempo) 명령 (표준 입출력은 인터리브 f32le PCM)"""
+    ratio = _pitch_ratio(n_steps)
+    audio_filter = f"asetrate={int(round(sr * ratio))},aresample={sr},atempo={1.0 / ratio:.8f}"
+    return [
+        get_ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+        '-f', 'f32le', '-ar', str(sr), '-ac', str(channels), '-i', 'pipe:0',
+        '-af', audio_filter,
+        '-f', 'f32le', '-ar', str(sr), '-ac', str(channels), 'pipe:1'
+    ]
+
+def _interleave(y: np.ndarray) -> np.ndarray:
+    """(채널, 샘플) 배열을 ffmpeg 입력용 인터리브 PCM으로 변환 (모노는 그대로)"""
+    return np.ascontiguousarray(y.T if y.ndim == 2 else y, dtype=np.float32)
+
+def _deinterleave(pcm: np.ndarray, channels: int) -> np.ndarray:
+    """ffmpeg 출력 인터리브 PCM을 (채널, 샘플) 배열로 변환 (모노는 그대로)"""
+    if channels == 1:
+        return pcm
+    return pcm[:len(pcm) // channels * channels].reshape(-1, channels).T
+
+def shift_with_ffmpeg(y: np.ndarray, sr: int, n_steps: float) -> np.ndarray:
+    """ffmpeg 필터 체인(asetrate → aresample → atempo) 기반 피치 조정 (다채널은 한 프로세스에서 함께)"""
+    channels = 1 if y.ndim == 1 else y.shape[0]
+    pcm = _interleave(y)
+    result = subprocess.run(_ffmpeg_shift_command(sr, n_steps, channels), input=memoryview(pcm).cast('B'),
+                            capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 피치 조정 실패: {result.stderr.decode(errors='replace')}")
+
+    shifted = _deinterleave(np.frombuffer(result.stdout, dtype=np.float32), channels)
+    return _fit_length(np.ascontiguousarray(shifted), y.shape[-1])
+
+# 스트리밍 ffmpeg 공급 스레드 종료를 기다리는 최대 시간 (초)
+_FEEDER_JOIN_TIMEOUT = 5
+
+def stream_with_ffmpeg(blocks: Iterable[np.ndarray], sr: int, n_steps: float) -> Iterator[np.ndarray]:
+    """하나의 ffmpeg 필터 프로세스에 블록을 계속 공급하면서 출력을 읽어 오는 스트리밍 버전"""
+    # 첫 블록으로 채널 수를 확인한 뒤 프로세스 시작
+    blocks = iter(blocks)
+    first = next(blocks, None)
+    if first is None:
+        return
+    blocks = itertools.chain([first], blocks)
+    channels = 1 if np.ndim(first) == 1 else first.shape[0]
+    frame_bytes = 4 * channels
+    
+    process = subprocess.Popen(_ffmpeg_shift_command(sr, n_steps, channels), stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    n_input = 0
+    feed_errors = []
+    
+    def feed():
+        """입력 블록을 별도 스레드에서 ffmpeg 표준 입력으로 전달"""
+        nonlocal n_input
+        try:
+            for block in blocks:
+                pcm = _interleave(np.asarray(block))
+                process.stdin.write(memoryview(pcm).cast('B'))
+                n_input += pcm.size // channels
+        except Exception as e:
+            feed_errors.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except Exception:
+                pass
+    
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    n_output = 0
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(65536 * frame_bytes)
+            if not data:
+                finished = True
+                break
+            out = _deinterleave(np.frombuffer(data[:len(data) // frame_bytes * frame_bytes], dtype=np.float32),
+                                channels)
+            # 입력 길이를 넘는 출력은 버림 (원본 길이 유지)
+            out = out[..., :max(0, n_input - n_output)] if not feeder.is_alive() else out
+            n_output += out.shape[-1]
+            if out.shape[-1]:
+                yield out
+    finally:
+        if not finished:
+            # 소비자가 중간에 닫았거나 오류가 난 경우: ffmpeg를 먼저 종료해야 표준 입력 쓰기에서
+            # 막힌 공급 스레드가 깨어남 (그대로 join하면 출력이 가득 찬 파이프 때문에 교착)
+            process.kill()
+        process.stdout.close()
+        # 공급 스레드가 입력 블록 생성 중이면 끝나지 않을 수 있으므로 제한 시간만 기다림 (데몬 스레드)
+        feeder.join(timeout=_FEEDER_JOIN_TIMEOUT)
+        process.wait()
+    
+    if feed_errors:
+        raise feed_errors[0]
+    if process.returncode != 0:
+        raise RuntimeError("ffmpeg 피치 조정 실패")
+    if n_output < n_input:
+        yield np.zeros((channels, n_input - n_output) if channels > 1 else n_input - n_output, dtype=np.float32)
+
+def _buffered(buffer) -> int:
+    """스트리밍 입력 버퍼의 샘플 수 (아직 블록이 없으면 0)"""
+    return 0 if buffer is None else buffer.shape[-1]
+
+def _downmix(y: np.ndarray) -> np.ndarray:
+    """정렬 위치 탐색용 모노 신호 (다채널은 채널 평균)"""
+    return y if y.ndim == 1 else y.mean(axis=0)
+
+def _stream_with_crossfade(engine: str, blocks: Iterable[np.ndarray], sr: int, n_steps: float,
+                           block_frames: int, overlap_frames: int) -> Iterator[np.ndarray]:
+    """상태를 이어갈 수 없는 엔진용 스트리밍: 구간별로 따로 피치 조정한 뒤 crossfade로 연결"""
+    # 각 구간은 앞뒤 여유 구간을 함께 처리한 뒤 잘라냄 (엔진의 시작/끝 잡음 제외)
+    overlap_frames = max(1, overlap_frames)
+    margin = overlap_frames
+    tolerance = min(int(sr * 0.02), margin)
+    fade_in = (0.5 - 0.5 * np.cos(np.linspace(0, np.pi, overlap_frames))).astype(np.float32)
+    fade_out = 1.0 - fade_in
+    
+    source = iter(blocks)
+    exhausted = False
+    buffer = None  # 첫 블록의 모양(모노 또는 (채널, 샘플))을 따름
+    buffer_start = 0  # buffer[..., 0]의 절대 샘플 위치
+    segment_start = 0
+    tail = None
+    
+    while True:
+        # 현재 구간 + 뒤쪽 여유 구간이 채워질 때까지 입력 읽기
+        needed_end = segment_start + block_frames + margin
+        while not exhausted and buffer_start + _buffered(buffer) < needed_end:
+            block = next(source, None)
+            if block is None:
+                exhausted = True
+            else:
+                block = np.asarray(block, dtype=np.float32)
+                buffer = block if buffer is None else np.concatenate([buffer, block], axis=-1)
+        
+        available_end = buffer_start + _buffered(buffer)
+        if segment_start >= available_end:
+            break
+        
+        # 여유 구간을 포함한 창을 피치 조정
+        window_start = max(buffer_start, segment_start - overlap_frames - margin)
+        window_end = min(available_end, needed_end)
+        shifted = apply_pitch_engine(
+            engine, buffer[..., window_start - buffer_start:window_end - buffer_start], sr, n_steps
+        )
+        
+        # 겹침 구간부터 현재 구간 끝까지만 사용 (이전 구간과 상관도가 가장 높은 위치로 정렬하여 위상 상쇄 방지,
+        # 다채널은 채널 평균으로 찾은 위치를 모든 채널에 적용)
+        out_start = max(0, segment_start - overlap_frames) - window_start
+        out_end = min(available_end, segment_start + block_frames) - window_start
+        lag = 0
+        if tail is not None:
+            low = max(-tolerance, -out_start)
+            high = min(tolerance, shifted.shape[-1] - out_end)
+            if high > low:
+                search = _downmix(shifted[..., out_start + low:out_start + high + tail.shape[-1]])
+                lag = low + int(np.argmax(np.correlate(search, _downmix(tail), 'valid')))
+        out = np.array(shifted[..., out_start + lag:out_end + lag], dtype=np.float32)
+        
+        if tail is not None:
+            n = min(tail.shape[-1], out.shape[-1])
+            out[..., :n] = tail[..., :n] * fade_out[:n] + out[..., :n] * fade_in[:n]
+            tail = None
+        
+        if exhausted and out_end + window_start >= available_end:
+            yield out
+            break
+        
+        yield out[..., :-overlap_frames]
+        tail = out[..., -overlap_frames:]
+        segment_start += block_frames
+        
+        # 다음 창에 필요 없는 입력 버리기
+        keep_from = segment_start - overlap_frames - margin
+        if keep_from > buffer_start:
+            buffer = buffer[..., keep_from - buffer_start:]
+            buffer_start = keep_from
+    
+    if tail is not None:
+        yield tail
+
+# 사용 가능한 피치 조정 엔진 (속도/품질 특성 포함)
+PITCH_ENGINES: Dict[str, Dict] = {
+    "librosa": {
+        "label": "librosa (고품질, 느림)",
+        "description": "위상 보코더 STFT + 고품질 리샘플링. 음악에 가장 자연스럽지만 가장 느립니다.",
+        "shift": shift_with_librosa,
+        "shift_many": shift_many_with_librosa,
+        "shift_stack": shift_stack_with_librosa,
+        "stream": stream_with_librosa
+    },
+    "wsola": {
+        "label": "WSOLA (빠름, 음성에 적합)",
+        "description": "파형 유사도 기반 overlap-add. librosa보다 수 배 빠르며 음성/단선율에 적합하지만 "
+                       "화음이 많은 음악에서는 약간의 떨림이 생길 수 있습니다.",
+        "shift": shift_with_wsola
+    },
+    "ffmpeg": {
+        "label": "ffmpeg (가장 빠름)",
+        "description": "ffmpeg asetrate+atempo 필터 체인. 별도 프로세스에서 처리되어 가장 빠르지만 "
+                       "atempo의 단순 overlap-add 때문에 큰 변경량에서는 잔향/떨림이 생길 수 있습니다.",
+        "shift": shift_with_ffmpeg,
+        "stream": stream_with_ffmpeg
+    }
+}
+
+def get_engine_choices() -> List[Tuple[str, str]]:
+    """UI 드롭다운용 (라벨, 엔진 이름) 목록 반환"""
+    return [(spec["label"], name) for name, spec in PITCH_ENGINES.items()]
+
+def apply_pitch_engine(engine: str, y: np.ndarray, sr: int, n_steps: float) -> np.ndarray:
+    """선택한 엔진으로 피치 조정"""
+    if engine not in PITCH_ENGINES:
+        raise ValueError(f"알 수 없는 피치 엔진: {engine}")
+    return PITCH_ENGINES[engine]["shift"](y, sr, n_steps)
+
+def apply_pitch_engine_many(engine: str, y: np.ndarray, sr: int, steps_list: Sequence[float],
+                            consume: Optional[PitchConsumeFunc] = None) -> List[Any]:
+    """한 번 디코딩한 오디오를 여러 피치 변경량으로 렌더링 (consume을 주면 결과마다 consume(n_steps, 배열)의 반환값)"""
+    if engine not in PITCH_ENGINES:
+        raise ValueError(f"알 수 없는 피치 엔진: {engine}")
+    # 분석 결과를 공유하는 구현("shift_many")이 없으면 변경량별로 병렬 처리
+    # 결과는 렌더링 직후 consume에 넘기므로 모든 결과 배열을 한꺼번에 보관하지 않음
+    shift_many = PITCH_ENGINES[engine].get("shift_many")
+    if consume is None:
+        consume = lambda n_steps, y_shifted: y_shifted
+    if shift_many is not None:
+        return shift_many(y, sr, steps_list, consume)
+    shift = PITCH_ENGINES[engine]["shift"]
+    return _map_parallel(lambda n_steps: consume(n_steps, shift(y, sr, n_steps)), steps_list)
+
+def supports_pitch_stack(engine: str) -> bool:
+    """엔진이 여러 클립을 한 번에 처리하는 구현("shift_stack")을 제공하는지 확인"""
+    return "shift_stack" in PITCH_ENGINES.get(engine, {})
+
+def apply_pitch_engine_stack(engine: str, clips: Sequence[np.ndarray], sr: int,
+                             n_steps: float) -> List[np.ndarray]:
+    """같은 샘플레이트/채널 수의 여러 클립을 한 번에 피치 조정 (클립별 원래 길이로 반환)"""
+    if engine not in PITCH_ENGINES:
+        raise ValueError(f"알 수 없는 피치 엔진: {engine}")
+    shift_stack = PITCH_ENGINES[engine].get("shift_stack")
+    if shift_stack is None or len(clips) < 2:
+        return [apply_pitch_engine(engine, y, sr, n_steps) for y in clips]
+    
+    # 가장 긴 클립 길이로 0을 채워 묶음 (길이가 비슷한 클립끼리 묶어야 낭비가 적음)
+    stack = np.zeros((len(clips),) + clips[0].shape[:-1] + (max(y.shape[-1] for y in clips),), dtype=np.float32)
+    for row, y in zip(stack, clips):
+        row[..., :y.shape[-1]] = y
+    shifted = shift_stack(stack, sr, n_steps)
+    return [shifted[index, ..., :y.shape[-1]] for index, y in enumerate(clips)]
+
+def stream_pitch_engine(engine: str, blocks: Iterable[np.ndarray], sr: int, n_steps: float,
+                        block_frames: int, overlap_frames: int) -> Iterator[np.ndarray]:
+    """선택한 엔진으로 블록 단위 스트리밍 피치 조정 (출력 길이는 입력과 같고 메모리 사용량은 파일 길이와 무관)"""
+    if engine not in PITCH_ENGINES:
+        raise ValueError(f"알 수 없는 피치 엔진: {engine}")
+    # 상태를 이어가는 스트리밍 구현("stream")이 없는 엔진은 구간별 처리 + crossfade
+    stream = PITCH_ENGINES[engine].get("stream")
+    if stream is not None:
+        return stream(blocks, sr, n_steps)
+    return _stream_with_crossfade(engine, blocks, sr, n_steps, block_frames, overlap_frames)
@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config.settings import PITCH_CONFIG, PREVIEW_CONFIG
+from modules.pitch_core import check_pitch_input
+from modules.pitch_engines import apply_pitch_engine
+from utils.audio_utils import decode_audio_to_array, decode_audio_window, plan_working_rate
+from utils.probe_index import probe_audio_cached
+from utils.tracing import trace_stage
+
+# 피치 미리 듣기: 짧은 구간만 빠른 엔진으로 렌더링 (Gradio에 의존하지 않음)
+# 전체 파일 디코딩 결과는 메모리에 보관하므로 슬라이더를 움직일 때마다 구간을 잘라 피치 조정만 수행
+
+# 구간 양 끝의 짧은 페이드 길이 (초, 잘라낸 경계의 클릭 잡음 방지)
+_EDGE_FADE_SECONDS = 0.01
+
+# 디코딩 결과 ((경로, 크기, 수정 시각, 샘플레이트) → 모노 배열), 오래 사용하지 않은 항목부터 삭제
+_decoded: "OrderedDict[Tuple[str, int, int, int], np.ndarray]" = OrderedDict()
+_decoded_bytes = 0
+_decoded_lock = threading.Lock()
+
+def _plan_preview(file_path: str) -> Tuple[Dict[str, Any], int, Tuple[str, int, int, int]]:
+    """
+    입력 확인 + 미리 듣기 샘플레이트와 디코딩 결과 키 결정
+
+    Raises:
+        ValueError: 처리할 수 없는 입력 (check_pitch_input 참고)
+    """
+    info = probe_audio_cached(file_path)
+    error = check_pitch_input(info)
+    if error:
+        raise ValueError(error)
+    sr = plan_working_rate(info["sample_rate"], PREVIEW_CONFIG.get("sample_rate"),
+                           PITCH_CONFIG.get("max_working_sample_rate"))
+    stat = os.stat(file_path)
+    return info, sr, (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, sr)
+
+def _store_decoded(key: Tuple[str, int, int, int], y: np.ndarray) -> None:
+    global _decoded_bytes
+    limit = int(PREVIEW_CONFIG.get("cache_max_mb", 256) * 1024 * 1024)
+    if y.nbytes > limit:
+        return
+    with _decoded_lock:
+        if key in _decoded:
+            return
+        _decoded[key] = y
+        _decoded_bytes += y.nbytes
+        while _decoded_bytes > limit:
+            _, evicted = _decoded.popitem(last=False)
+            _decoded_bytes -= evicted.nbytes
+
+def load_preview_audio(file_path: str) -> Tuple[Optional[np.ndarray], Dict[str, Any], int]:
+    """
+    미리 듣기용 전체 디코딩 결과 (모노, 미리 듣기 샘플레이트)를 보관분에서 가져오거나 새로 디코딩
+
+    cache_max_seconds보다 길거나 길이를 알 수 없는 파일은 전체를 디코딩하지 않고 None을 반환합니다.
+    (이 경우 render_pitch_preview가 필요한 구간만 디코딩)
+
+    Returns:
+        (디코딩 결과 또는 None, probe_audio 결과, 샘플레이트)
+    """
+    info, sr, key = _plan_preview(file_path)
+    with _decoded_lock:
+        y = _decoded.get(key)
+        if y is not None:
+            _decoded.move_to_end(key)
+            return y, info, sr
+
+    duration = info["duration"]
+    if duration is None or duration > PREVIEW_CONFIG.get("cache_max_seconds", 0):
+        return None, info, sr
+    y, sr = decode_audio_to_array(file_path, sr, info["sample_rate"])
+    _store_decoded(key, y)
+    return y, info, sr
+
+def _fade_edges(y: np.ndarray, sr: int) -> np.ndarray:
+    """구간 양 끝에 짧은 페이드 적용 (복사본 반환)"""
+    y = np.array(y, dtype=np.float32)
+    fade = min(int(sr * _EDGE_FADE_SECONDS), len(y) // 2)
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+        y[:fade] *= ramp
+        y[-fade:] *= ramp[::-1]
+    return y
+
+def render_pitch_preview(file_path: str, pitch_shift_semitones: float, offset_seconds: float = 0.0,
+                         engine: Optional[str] = None) -> Tuple[np.ndarray, int, float]:
+    """
+    offset_seconds부터 PREVIEW_CONFIG["seconds"] 길이만 피치 조정 (미리 듣기)
+
+    PREVIEW_CONFIG["engine"]이 지정되어 있으면 그 엔진(기본 ffmpeg, 가장 빠름)을, 없으면 engine을 사용합니다.
+    구간 앞뒤 context_seconds를 함께 처리한 뒤 잘라내므로 경계에서 엔진의 시작/끝 잡음이 들리지 않습니다.
+    시작 위치는 구간이 파일 끝을 넘지 않도록 앞당겨집니다.
+
+    Returns:
+        (조정된 모노 배열, 샘플레이트, 실제 시작 위치(초))
+    """
+    seconds = PREVIEW_CONFIG.get("seconds", 10)
+    context = PREVIEW_CONFIG.get("context_seconds", 0.5)
+    engine = PREVIEW_CONFIG.get("engine") or engine or PITCH_CONFIG["default_engine"]
+
+    y, info, sr = load_preview_audio(file_path)
+    duration = y.shape[-1] / sr if y is not None else info["duration"]
+    start = max(offset_seconds or 0.0, 0.0)
+    if duration is not None:
+        start = min(start, max(duration - seconds, 0.0))
+    lead = min(context, start)
+
+    if y is not None:
+        window = y[int((start - lead) * sr):int((start + seconds + context) * sr)]
+    else:
+        window, sr = decode_audio_window(file_path, start - lead, seconds + lead + context, sr, info["sample_rate"])
+
+    with trace_stage("pitch_shift", window.nbytes):
+        shifted = apply_pitch_engine(engine, window, sr, pitch_shift_semitones)
+    head = int(round(lead * sr))
+    return _fade_edges(shifted[head:head + int(seconds * sr)], sr), sr, start
@@ -1,194 +1,427 @@
-import librosa
-import soundfile as sf
 import os
-import tempfile
-from pydub import AudioSegment
-from typing import Union, List, Tuple, Optional
+import itertools
+import threading
+import time
+import numpy as np
+from typing import List, Tuple, Optional
 import gradio as gr
 
 from utils.file_utils import (
-    create_temp_file, safe_delete_file, create_zip_file, 
-    copy_file_to_directory, validate_directory
+    create_temp_file, safe_delete_file, create_zip_file, open_zip_writer, add_file_to_zip,
+    move_file_to_directory, validate_directory
 )
-from utils.audio_utils import convert_mp3_to_wav
+from utils.audio_utils import decode_audio_to_array, encode_audio_array, parse_bitrate_option
+from modules.pitch_engines import apply_pitch_engine_many, _map_parallel
+from modules.pitch_preview import render_pitch_preview, load_preview_audio
+from modules.pitch_core import (
+    shift_pitch, get_output_key, make_output_key, get_output_filename, plan_pitch_job, plan_pitch_channels,
+    _get_file_path
+)
+from utils.encoder_service import format_encoder_stats, get_output_format, get_output_extension
+from utils.tracing import trace_stage, traced, bind_trace
+from utils.scratch_space import scratch_scoped, bind_scratch_dir, format_scratch_stats
+from utils.result_cache import compute_file_hash, get_cached_result, store_result, format_cache_stats
+from config.settings import PITCH_CONFIG, CACHE_CONFIG, PREVIEW_CONFIG
+from modules.batch_processor import run_pitch_batch, get_input_durations, estimate_remaining_seconds, format_eta
+from modules.job_scheduler import (
+    batch_job, get_session_id, get_job_store_dir, release_job_store_dir, remove_job_store_dir
+)
+from utils.output_manifest import load_manifest, is_output_current, record_output
 
-def shift_pitch(audio_file: Union[str, object], pitch_shift_semitones: float) -> str:
+@traced("pitch_single")
+@scratch_scoped("pitch_single")
+def process_single_audio(audio_file: object, pitch_shift: float, 
+                        output_dir: str = None,
+                        engine: str = PITCH_CONFIG["default_engine"],
+                        output_format: Optional[str] = None,
+                        bitrate: Optional[str] = None) -> Tuple[Optional[str], str]:
     """
-    오디오 파일의 피치를 조정하는 함수
-    
-    Args:
-        audio_file: 입력 오디오 파일 경로 (문자열 또는 파일 객체)
-        pitch_shift_semitones: 피치 변경량 (반음 단위)
+    단일 오디오 파일 처리
     
-    Returns:
-        처리된 오디오 파일 경로 또는 오류 메시지
+    output_format은 출력 형식(mp3/wav/flac/opus), bitrate는 UI 비트레이트 옵션("192", "기본값")입니다.
     """
-    temp_wav_path = None
-    temp_output_path = None
+    if audio_file is None:
+        return None, "오디오 파일을 업로드해주세요."
     
     try:
-        # 파일 경로 확인
-        if isinstance(audio_file, str):
-            file_path = audio_file
-        else:
-            file_path = audio_file.name
-        
-        # MP3 파일을 WAV로 변환 (librosa 호환성을 위해)
-        if file_path.lower().endswith('.mp3'):
-            temp_wav_path = create_temp_file('.wav')
-            if not convert_mp3_to_wav(file_path, temp_wav_path):
-                return "MP3 to WAV 변환 실패"
-            audio_path = temp_wav_path
-        else:
-            audio_path = file_path
-        
-        # 오디오 로드
-        y, sr = librosa.load(audio_path, sr=None)
+        output_format = get_output_format(output_format)
+        output_file = shift_pitch(audio_file, pitch_shift, engine, output_format=output_format,
+                                  bitrate=parse_bitrate_option(bitrate))
         
-        # 피치 시프트 적용
-        y_shifted = librosa.effects.pitch_shift(y, sr=sr, n_steps=pitch_shift_semitones)
-        
-        # 임시 파일로 저장
-        temp_output_path = create_temp_file('.wav')
-        sf.write(temp_output_path, y_shifted, sr)
+        if not os.path.isfile(output_file):
+            return None, output_file
         
-        # WAV를 MP3로 변환
-        audio_output = AudioSegment.from_wav(temp_output_path)
-        final_output_path = create_temp_file('.mp3')
-        audio_output.export(final_output_path, format='mp3', bitrate='192k')
+        # 출력 디렉토리가 지정된 경우
+        if output_dir and validate_directory(output_dir):
+            final_filename = get_output_filename(_get_file_path(audio_file), pitch_shift, output_format)
+            final_path = move_file_to_directory(output_file, output_dir, final_filename)
+            
+            # 이동하지 못한 임시 파일 삭제
+            safe_delete_file(output_file)
+            
+            if final_path:
+                return final_path, (f"피치가 {pitch_shift:+.1f} 반음만큼 조정되었습니다.\n저장 위치: {final_path}"
+                                    f"\n{format_cache_stats()}\n{format_encoder_stats()}")
+            else:
+                return None, "파일 저장 중 오류가 발생했습니다."
         
-        return final_output_path
+        return output_file, f"피치가 {pitch_shift:+.1f} 반음만큼 조정되었습니다.\n{format_cache_stats()}\n{format_encoder_stats()}"
         
     except Exception as e:
-        return f"오류 발생: {str(e)}"
+        return None, f"처리 중 오류가 발생했습니다: {str(e)}"
+
+def prepare_preview(audio_file: object) -> dict:
+    """
+    업로드한 파일을 미리 듣기용으로 미리 디코딩하고 시작 위치 슬라이더 범위를 파일 길이에 맞춤
+
+    처음 슬라이더를 움직일 때 전체 디코딩을 기다리지 않도록 업로드 직후 실행됩니다.
+    """
+    if audio_file is None:
+        return gr.update(value=0, maximum=1)
+    try:
+        _, info, _ = load_preview_audio(_get_file_path(audio_file))
+    except Exception:
+        return gr.update()  # 미리 듣기 실패는 전체 처리에서 오류로 안내
+    duration = info["duration"] or 0.0
+    return gr.update(value=0, maximum=max(duration - PREVIEW_CONFIG["seconds"], 1.0))
+
+@traced("pitch_preview")
+@scratch_scoped("pitch_preview")
+def preview_single_audio(audio_file: object, pitch_shift: float, offset_seconds: float = 0.0,
+                         engine: str = PITCH_CONFIG["default_engine"]) -> Tuple[Optional[str], str]:
+    """
+    선택한 피치로 짧은 구간만 빠르게 렌더링하여 WAV로 반환 (미리 듣기)
     
-    finally:
-        # 임시 파일 정리
-        safe_delete_file(temp_wav_path)
-        safe_delete_file(temp_output_path)
+    미리 듣기는 결과 캐시에 저장하지 않으며, 전체 파일은 process_single_audio로 확정할 때만 처리합니다.
+    """
+    if audio_file is None:
+        return None, "오디오 파일을 업로드해주세요."
+    
+    try:
+        started_at = time.perf_counter()
+        y, sr, start = render_pitch_preview(_get_file_path(audio_file), pitch_shift, offset_seconds, engine)
+        output_path = create_temp_file('.wav')
+        encode_audio_array(y, sr, output_path, "wav")
+        elapsed = time.perf_counter() - started_at
+        return output_path, (f"미리 듣기: {pitch_shift:+.1f} 반음 · {start:.1f}초부터 {len(y) / sr:.1f}초 "
+                             f"({elapsed:.2f}초 소요)\n"
+                             f"마음에 들면 '피치 조정하기'를 눌러 전체 파일을 처리하세요.")
+    
+    except Exception as e:
+        return None, f"미리 듣기 중 오류가 발생했습니다: {str(e)}"
 
-def process_single_audio(audio_file: object, pitch_shift: float, 
-                        output_dir: str = None) -> Tuple[Optional[str], str]:
+def parse_pitch_offsets(text: str) -> List[float]:
     """
-    단일 오디오 파일 처리
+    피치 목록 문자열 파싱
+    
+    쉼표로 구분한 값("-3, -1, 0, 2")과 1반음 간격 범위("-3~3")를 함께 사용할 수 있습니다.
+    """
+    offsets = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "~" in part:
+            start, end = (float(value) for value in part.split("~", 1))
+            if start > end:
+                start, end = end, start
+            offsets.update(float(value) for value in np.arange(start, end + 1e-9, 1.0))
+        else:
+            offsets.add(float(part))
+    
+    for offset in offsets:
+        if not PITCH_CONFIG["min_pitch"] <= offset <= PITCH_CONFIG["max_pitch"]:
+            raise ValueError(f"피치 범위를 벗어났습니다: {offset:+.1f} "
+                             f"({PITCH_CONFIG['min_pitch']} ~ {PITCH_CONFIG['max_pitch']})")
+    return sorted(offsets)
+
+@traced("pitch_ladder")
+@scratch_scoped("pitch_ladder")
+def render_pitch_ladder(audio_file: object, offsets_text: str,
+                        engine: str = PITCH_CONFIG["default_engine"],
+                        output_format: Optional[str] = None,
+                        bitrate: Optional[str] = None) -> Tuple[Optional[str], str]:
+    """
+    한 파일을 여러 피치로 렌더링하여 ZIP으로 반환 (피치 사다리)
+    
+    디코딩과 STFT 분석은 한 번만 수행하고, 각 피치 변경량은 병렬로 렌더링하여 바로 인코딩합니다.
+    긴 파일(streaming_min_duration 이상)은 피치마다 블록 단위 스트리밍으로 처리합니다.
+    이미 캐시에 있는 피치는 다시 계산하지 않습니다.
     """
     if audio_file is None:
         return None, "오디오 파일을 업로드해주세요."
     
     try:
-        output_file = shift_pitch(audio_file, pitch_shift)
+        offsets = parse_pitch_offsets(offsets_text or "")
+    except ValueError as e:
+        return None, f"피치 목록 형식 오류: {str(e)}"
+    if not offsets:
+        return None, "렌더링할 피치를 입력해주세요. (예: -3~3 또는 -2, 0, 2)"
+    
+    file_path = _get_file_path(audio_file)
+    outputs = {}
+    
+    try:
+        output_format = get_output_format(output_format)
+        bitrate = parse_bitrate_option(bitrate)
+        extension = get_output_extension(output_format)
         
-        if isinstance(output_file, str) and output_file.startswith("오류"):
-            return None, output_file
+        # 캐시에 있는 피치는 그대로 사용
+        cache_keys = {}
+        file_hash = compute_file_hash(file_path) if CACHE_CONFIG.get("enabled", True) else None
+        for offset in offsets:
+            if file_hash:
+                cache_keys[offset] = make_output_key(file_hash, offset, engine, None, output_format, bitrate)
+                cached = get_cached_result(cache_keys[offset], extension)
+                if cached:
+                    outputs[offset] = cached
         
-        # 출력 디렉토리가 지정된 경우
-        if output_dir and validate_directory(output_dir):
-            original_name = os.path.splitext(os.path.basename(audio_file.name))[0]
-            final_filename = f"{original_name}_pitch_{pitch_shift:+.1f}.mp3"
-            final_path = copy_file_to_directory(output_file, output_dir, final_filename)
+        missing = [offset for offset in offsets if offset not in outputs]
+        if missing:
+            info, sr = plan_pitch_job(file_path)
             
-            # 임시 파일 삭제
-            safe_delete_file(output_file)
+            def finish(offset: float, output_path: str) -> None:
+                # 완료된 피치는 바로 기록하여 다른 피치가 실패해도 임시 파일이 정리되도록 함
+                if offset in cache_keys:
+                    store_result(cache_keys[offset], output_path, extension)
+                outputs[offset] = output_path
             
-            if final_path:
-                return final_path, f"피치가 {pitch_shift:+.1f} 반음만큼 조정되었습니다.\n저장 위치: {final_path}"
+            streaming_min = PITCH_CONFIG.get("streaming_min_duration")
+            if streaming_min is not None and (info["duration"] is None or info["duration"] >= streaming_min):
+                # 긴 파일은 전체 디코딩 결과와 피치별 결과를 메모리에 두지 않고 피치마다 스트리밍 처리
+                def render(offset: float) -> None:
+                    output_path = shift_pitch(file_path, offset, engine, use_cache=False,
+                                              output_format=output_format, bitrate=bitrate, info=info)
+                    if not os.path.isfile(output_path):
+                        raise RuntimeError(output_path)
+                    finish(offset, output_path)
+                
+                _map_parallel(bind_scratch_dir(bind_trace(render)), missing)
             else:
-                return None, "파일 저장 중 오류가 발생했습니다."
+                # 한 번만 디코딩(처리 샘플레이트로 변환)하고 피치별 결과는 렌더링 직후 인코딩하여 해제
+                y, sr = decode_audio_to_array(file_path, sr, info["sample_rate"],
+                                              plan_pitch_channels(info, output_format))
+                
+                def encode(offset: float, y_shifted: np.ndarray) -> None:
+                    output_path = create_temp_file(extension)
+                    try:
+                        encode_audio_array(y_shifted, sr, output_path, output_format, bitrate)
+                    except Exception:
+                        safe_delete_file(output_path)
+                        raise
+                    finish(offset, output_path)
+                
+                with trace_stage("pitch_shift_encode", y.nbytes * len(missing)):
+                    apply_pitch_engine_many(engine, y, sr, missing, bind_scratch_dir(bind_trace(encode)))
+                del y
         
-        return output_file, f"피치가 {pitch_shift:+.1f} 반음만큼 조정되었습니다."
+        temp_files = [
+            (outputs[offset], get_output_filename(file_path, offset, output_format)) for offset in offsets
+        ]
+        zip_path = create_temp_file('.zip')
+        with trace_stage("zip"):
+            zipped = create_zip_file(temp_files, zip_path)
+        if not zipped:
+            return None, "ZIP 파일 생성 중 오류가 발생했습니다."
         
+        return zip_path, (f"{len(offsets)}개 피치로 렌더링되었습니다: "
+                          + ", ".join(f"{offset:+.1f}" for offset in offsets)
+                          + f"\n새로 계산: {len(missing)}개 / {format_cache_stats()}\n{format_encoder_stats()}")
+    
     except Exception as e:
-        return None, f"처리 중 오류가 발생했습니다: {str(e)}"
+        return None, f"피치 사다리 처리 중 오류가 발생했습니다: {str(e)}"
+    
+    finally:
+        for output_path in outputs.values():
+            safe_delete_file(output_path)
+
+def _format_failures(failures: List[Tuple[str, str]]) -> str:
+    """실패한 파일 목록을 상태 메시지 형식으로 변환"""
+    if not failures:
+        return ""
+    return f"\n\n실패한 파일 ({len(failures)}개):\n" + "\n".join(
+        f"• {os.path.basename(path)}: {error}" for path, error in failures
+    )
 
+@traced("pitch_batch")
+@scratch_scoped("pitch_batch")
 def process_batch_files(files: List[object], pitch_shift: float, 
-                       output_dir: str = None, 
-                       progress: gr.Progress = gr.Progress()) -> Tuple[Optional[str], str]:
+                       output_dir: str = None,
+                       engine: str = PITCH_CONFIG["default_engine"],
+                       output_format: Optional[str] = None,
+                       bitrate: Optional[str] = None,
+                       progress: gr.Progress = gr.Progress(),
+                       request: gr.Request = None) -> Tuple[Optional[str], str]:
     """
-    여러 파일을 일괄 처리하는 함수
+    여러 파일을 일괄 처리하는 함수 (프로세스 풀에서 병렬 실행)
+    
+    같은 세션에서 cancel_batch_jobs()가 호출되면 대기 중인 파일은 처리하지 않고 중단합니다.
     """
     if not files:
         return None, "파일을 업로드해주세요."
     
+    try:
+        output_format = get_output_format(output_format)
+    except ValueError as e:
+        return None, str(e)
+    
+    with batch_job(get_session_id(request)) as cancel_event:
+        return _run_batch_files(files, pitch_shift, output_dir, engine, progress, cancel_event,
+                                output_format, parse_bitrate_option(bitrate))
+
+def _run_batch_files(files: List[object], pitch_shift: float, output_dir: Optional[str], engine: str,
+                     progress: gr.Progress, cancel_event: threading.Event,
+                     output_format: str, bitrate: Optional[str]) -> Tuple[Optional[str], str]:
+    """
+    process_batch_files의 실제 처리 (취소 신호를 결과마다 확인)
+    
+    완료된 항목은 출력 폴더(ZIP 방식이면 작업 보관 폴더)의 처리 기록에 바로 저장되므로,
+    중단되거나 서버가 재시작된 뒤 같은 작업을 다시 제출하면 남은 항목만 처리합니다.
+    """
+    zip_writer = None
+    zip_path = None
+    job_dir = None
     try:
         processed_files = []
-        total_files = len(files)
+        failures = []
+        counts = {"resumed": 0, "cached": 0, "new": 0}
+        file_paths = [file.name for file in files]
+        total_files = len(file_paths)
+        use_output_dir = output_dir and validate_directory(output_dir)
         
-        # 출력 디렉토리가 지정된 경우
-        if output_dir and validate_directory(output_dir):
-            for i, file in enumerate(files):
-                progress((i + 1) / total_files, 
-                        f"처리 중: {os.path.basename(file.name)} ({i+1}/{total_files})")
-                
-                # 개별 파일 처리
-                result = shift_pitch(file.name, pitch_shift)
-                
-                if isinstance(result, str) and result.startswith("오류"):
-                    continue  # 오류 발생한 파일은 건너뛰기
-                
-                # 지정된 디렉토리에 파일 저장
-                original_name = os.path.splitext(os.path.basename(file.name))[0]
-                new_filename = f"{original_name}_pitch_{pitch_shift:+.1f}.mp3"
-                final_path = copy_file_to_directory(result, output_dir, new_filename)
-                
-                if final_path:
-                    processed_files.append(new_filename)
-                
-                # 임시 결과 파일 삭제
+        progress(0, f"이전 진행 상황 확인 중... (0/{total_files})")
+        
+        # 항목별 결과 키 (입력 내용 + 처리 설정): 처리 기록과 결과 캐시에 공통 사용
+        item_keys = {}
+        for file_path in file_paths:
+            try:
+                item_keys[file_path] = get_output_key(file_path, pitch_shift, engine, None, output_format, bitrate)
+            except OSError as e:
+                failures.append((file_path, f"파일 읽기 실패: {str(e)}"))
+        
+        # 완료 항목 보관 위치: 출력 폴더 또는 작업 보관 폴더 (ZIP 방식)
+        if use_output_dir:
+            target_dir = output_dir
+        else:
+            target_dir = job_dir = get_job_store_dir(list(item_keys.values()))
+            # ZIP 방식: 결과가 나오는 대로 바로 압축 파일에 추가
+            zip_path = create_temp_file('.zip')
+            zip_writer = open_zip_writer(zip_path)
+        manifest = load_manifest(target_dir)
+        
+        def deliver(file_path: str, output_filename: str, source: str) -> None:
+            """보관 위치에 있는 결과를 결과 목록(ZIP 방식이면 압축 파일)에 추가"""
+            stored_path = os.path.join(target_dir, output_filename)
+            if use_output_dir:
+                processed_files.append((stored_path, output_filename))
+            else:
+                try:
+                    with trace_stage("zip", os.path.getsize(stored_path)):
+                        add_file_to_zip(zip_writer, stored_path, output_filename)
+                except Exception as e:
+                    failures.append((file_path, f"ZIP 추가 실패: {str(e)}"))
+                    return
+                processed_files.append((zip_path, output_filename))
+            counts[source] += 1
+        
+        # 이전 실행에서 완료된 항목은 그대로 사용하고, 캐시에 있는 결과는 바로 사용하고,
+        # 나머지만 프로세스 풀로 전달
+        cached_results = []
+        pending_paths = []
+        for file_path, key in item_keys.items():
+            output_filename = get_output_filename(file_path, pitch_shift, output_format)
+            if is_output_current(target_dir, manifest, output_filename, key):
+                deliver(file_path, output_filename, "resumed")
+                continue
+            cached = get_cached_result(key, get_output_extension(output_format))
+            if cached:
+                cached_results.append((file_path, cached, None))
+            else:
+                pending_paths.append(file_path)
+        
+        done = counts["resumed"] + len(failures)
+        if counts["resumed"]:
+            progress(done / total_files,
+                    f"이전 실행에서 완료된 {counts['resumed']}개를 건너뛰고 이어서 처리합니다 ({done}/{total_files})")
+        
+        # 남은 시간 추정용 입력 길이 (헤더만 조회, 결과는 색인에 남아 배치 계획에서 다시 조회하지 않음)
+        durations = get_input_durations(pending_paths)
+        remaining_duration = sum(durations.values())
+        done_duration = 0.0
+        started_at = time.perf_counter()
+        
+        # 완료되는 순서대로 결과 수집 (취소되면 남은 작업은 처리하지 않음)
+        results = itertools.chain(cached_results,
+                                  run_pitch_batch(pending_paths, pitch_shift, engine, cancel_event,
+                                                  output_format=output_format, bitrate=bitrate))
+        cached_paths = {file_path for file_path, _, _ in cached_results}
+        for file_path, result, error in results:
+            if cancel_event.is_set():
                 safe_delete_file(result)
+                continue
             
-            if not processed_files:
-                return None, "처리할 수 있는 파일이 없습니다."
+            done += 1
+            done_duration += durations.get(file_path, 0.0)
+            remaining_duration -= durations.get(file_path, 0.0)
+            eta = format_eta(estimate_remaining_seconds(started_at, done_duration, remaining_duration)
+                             if done < total_files else None)
+            progress(done / total_files,
+                    f"처리 완료: {os.path.basename(file_path)} ({done}/{total_files}){eta}")
             
+            if error:
+                failures.append((file_path, error))
+                continue
+            
+            # 보관 위치에 저장하고 처리 기록에 추가 (이후 중단되어도 이 항목은 다시 처리하지 않음)
+            output_filename = get_output_filename(file_path, pitch_shift, output_format)
+            final_path = move_file_to_directory(result, target_dir, output_filename)
+            safe_delete_file(result)
+            if not final_path:
+                failures.append((file_path, "파일 저장 실패"))
+                continue
+            record_output(target_dir, manifest, output_filename, file_path, item_keys[file_path])
+            deliver(file_path, output_filename, "cached" if file_path in cached_paths else "new")
+        
+        if cancel_event.is_set():
+            return None, (f"일괄 처리가 취소되었습니다. "
+                          f"({len(processed_files) + len(failures)}/{total_files} 완료 후 중단, "
+                          f"같은 파일을 다시 제출하면 이어서 처리합니다)")
+        
+        if not processed_files:
+            return None, "처리할 수 있는 파일이 없습니다." + _format_failures(failures)
+        
+        summary = (f"이전 실행에서 완료: {counts['resumed']}개 / 새로 처리: {counts['new']}개 / "
+                   f"캐시 재사용: {counts['cached']}개\n{format_cache_stats()}\n{format_scratch_stats()}")
+        
+        # 출력 디렉토리가 지정된 경우
+        if use_output_dir:
             return None, f"""총 {len(processed_files)}개 파일이 처리되어 {output_dir}에 저장되었습니다.
+{summary}
 
 저장된 파일들:
-""" + "\n".join(f"• {filename}" for filename in processed_files)
+""" + "\n".join(f"• {filename}" for _, filename in processed_files) + _format_failures(failures)
         
-        # 출력 디렉토리가 지정되지 않은 경우 (ZIP 방식)
-        else:
-            temp_dir = tempfile.mkdtemp()
-            temp_files = []
-            
-            for i, file in enumerate(files):
-                progress((i + 1) / total_files, 
-                        f"처리 중: {os.path.basename(file.name)} ({i+1}/{total_files})")
-                
-                # 개별 파일 처리
-                result = shift_pitch(file.name, pitch_shift)
-                
-                if isinstance(result, str) and result.startswith("오류"):
-                    continue
-                
-                # 처리된 파일을 임시 디렉토리에 복사
-                original_name = os.path.splitext(os.path.basename(file.name))[0]
-                new_filename = f"{original_name}_pitch_{pitch_shift:+.1f}.mp3"
-                new_filepath = os.path.join(temp_dir, new_filename)
-                
-                # 파일 복사
-                try:
-                    with open(result, 'rb') as src, open(new_filepath, 'wb') as dst:
-                        dst.write(src.read())
-                    temp_files.append((new_filepath, new_filename))
-                except Exception:
-                    pass
-                
-                # 임시 결과 파일 삭제
-                safe_delete_file(result)
-            
-            if not temp_files:
-                return None, "처리할 수 있는 파일이 없습니다."
-            
-            # ZIP 파일 생성
-            zip_path = create_temp_file('.zip')
-            if create_zip_file(temp_files, zip_path):
-                # 임시 디렉토리 정리
-                for filepath, _ in temp_files:
-                    safe_delete_file(filepath)
-                os.rmdir(temp_dir)
-                
-                return zip_path, f"총 {len(temp_files)}개 파일이 처리되었습니다. ZIP 파일을 다운로드하세요."
-            else:
-                return None, "ZIP 파일 생성 중 오류가 발생했습니다."
+        # 출력 디렉토리가 지정되지 않은 경우 (ZIP 방식): 목차만 기록하고 완료
+        with trace_stage("zip"):
+            zip_writer.close()
+        zip_writer = None
+        result_zip, zip_path = zip_path, None
+        
+        # ZIP이 완성되었으므로 작업 보관 폴더는 더 이상 필요 없음
+        # (실패 항목만 다시 제출해도 완료된 결과는 결과 캐시에서 바로 가져옴)
+        remove_job_store_dir(job_dir)
+        job_dir = None
+        
+        return result_zip, (f"총 {len(processed_files)}개 파일이 처리되었습니다. ZIP 파일을 다운로드하세요.\n"
+                            + summary + _format_failures(failures))
         
     except Exception as e:
-        return None, f"배치 처리 중 오류가 발생했습니다: {str(e)}"
\ No newline at end of file
+        return None, f"배치 처리 중 오류가 발생했습니다: {str(e)}"
+    
+    finally:
+        # 취소/실패로 완성되지 않은 ZIP 정리 (작업 보관 폴더는 이어서 처리하기 위해 남기고,
+        # 작업 공간에 있으면 보관 시간이 지난 뒤 정리됨)
+        if zip_writer is not None:
+            zip_writer.close()
+        safe_delete_file(zip_path)
+        if job_dir is not None:
+            release_job_store_dir(job_dir)
\ No newline at end of file
@@ -1,92 +1,271 @@
+import os
 import numpy as np
-import tempfile
-from typing import Tuple, Optional, Any
+import threading
+import time
+import gradio as gr
+from typing import Dict, Tuple, Optional, Any
 from utils.audio_utils import (
-    convert_audio_to_16bit, create_stereo_from_mono, save_wav_file,
-    convert_wav_to_mp3, get_audio_duration, parse_sample_rate_option,
-    parse_channel_option
+    prepare_pcm, convert_pcm_to_audio, get_audio_duration, parse_sample_rate_option,
+    parse_channel_option, open_recording_stream_encoder, open_recording_resampler, snap_to_output_rate
 )
 from utils.file_utils import generate_filename, get_file_size_mb, safe_delete_file
+from utils.encoder_service import format_encoder_stats, finish_stream_encoder, get_output_format, get_output_bitrate
+from utils.tracing import trace_stage, traced
+from utils.scratch_space import (
+    attach_scratch_dir, scratch_path, scratch_scoped, start_scratch_job, finish_scratch_job
+)
+from modules.job_scheduler import get_session_id
+from config.settings import RECORDING_CONFIG, OUTPUT_CONFIG
+
+# 실시간 녹음 세션 (세션 ID → 설정, 인코더, 누적 프레임 수)
+_live_sessions: Dict[str, dict] = {}
+_live_lock = threading.Lock()
+_live_reaper: Optional[threading.Thread] = None
+
+def _format_recording_status(filename: str, bitrate: str, channels: str,
+                             sample_rate: int, duration: float, output_format: str = "mp3") -> str:
+    """녹음 완료 상태 메시지"""
+    file_size = get_file_size_mb(filename)
+    bitrate_line = f"🎵 비트레이트: {bitrate}kbps\n" if get_output_bitrate(output_format) else ""
+    return f"""✅ 녹음 완료!
+📁 파일명: {os.path.basename(filename)}
+{bitrate_line}📊 채널: {channels}
+🔊 샘플레이트: {sample_rate} Hz
+⏱️ 길이: {duration:.1f}초
+💾 파일크기: {file_size:.2f}MB
+🎼 형식: {OUTPUT_CONFIG["formats"][output_format]["label"]}
+⚙️ {format_encoder_stats()}"""
+
+def _recording_path(bitrate: str, channels: str, sample_rate: int, output_format: str) -> str:
+    """현재 작업 폴더 안의 녹음 파일 경로 (비트레이트가 없는 형식은 파일명에서 생략)"""
+    quality = f"{bitrate}kbps_" if get_output_bitrate(output_format) else ""
+    return scratch_path(
+        generate_filename("recording", f"{quality}{channels.split()[0]}_{sample_rate}Hz", output_format)
+    )
 
+@traced("recording")
+@scratch_scoped("recording")
 def process_recording(audio_data: Any, bitrate: str, channels: str, 
-                     sample_rate_option: str) -> Tuple[Optional[str], str]:
+                     sample_rate_option: str, output_format: str = "mp3") -> Tuple[Optional[str], str]:
     """
-    오디오 데이터를 받아서 MP3로 변환하는 함수
+    오디오 데이터를 받아서 출력 형식(기본 MP3)으로 변환하는 함수
     
     Args:
         audio_data: Gradio에서 받은 오디오 데이터 (sample_rate, audio_array)
-        bitrate: 출력 비트레이트
+        bitrate: 출력 비트레이트 (MP3/Opus만 해당)
         channels: 채널 설정 ("모노 (Mono)" 또는 "스테레오 (Stereo)")
         sample_rate_option: 샘플레이트 설정
+        output_format: 출력 형식 (mp3 / wav / flac / opus, WAV는 인코딩 없이 바로 저장)
     
     Returns:
-        (mp3_file_path, status_message)
+        (output_file_path, status_message)
     """
     if audio_data is None:
         return None, "녹음된 오디오가 없습니다."
     
-    temp_wav_path = None
-    
     try:
+        output_format = get_output_format(output_format)
+        
         # Gradio에서 받은 오디오 데이터 처리
         original_sample_rate, audio_array = audio_data
         
         # 샘플레이트 설정
-        target_sample_rate = parse_sample_rate_option(sample_rate_option, original_sample_rate)
+        # (출력 형식이 지원하지 않는 레이트는 인코더가 다시 변환하지 않도록 미리 맞춤)
+        target_sample_rate = snap_to_output_rate(
+            parse_sample_rate_option(sample_rate_option, original_sample_rate), output_format
+        )
         
         # 채널 설정
         channels_num = parse_channel_option(channels)
         
-        # 16-bit PCM으로 변환
-        audio_array = convert_audio_to_16bit(audio_array)
+        # 16-bit PCM 변환 + 채널 변환 + 리샘플을 한 번에 처리 (임시 WAV 파일 없음)
+        with trace_stage("prepare", audio_array.nbytes):
+            pcm = prepare_pcm(audio_array, original_sample_rate, target_sample_rate, channels_num)
         
-        # 임시 WAV 파일 생성
-        temp_wav_path = tempfile.mktemp(suffix=".wav")
+        # 출력 파일 경로 생성 (요청별 작업 폴더)
+        output_filename = _recording_path(bitrate, channels, target_sample_rate, output_format)
         
-        # 스테레오 변환 (필요한 경우)
-        if channels == "스테레오 (Stereo)" and len(audio_array.shape) == 1:
-            audio_array = create_stereo_from_mono(audio_array)
-        
-        # WAV 파일로 저장
-        if not save_wav_file(temp_wav_path, audio_array, target_sample_rate, channels_num):
-            return None, "WAV 파일 저장 실패"
-        
-        # MP3 파일명 생성
-        mp3_filename = generate_filename(
-            "recording",
-            f"{bitrate}kbps_{channels.split()[0]}_{target_sample_rate}Hz"
-        )
-        
-        # MP3로 변환
-        success, message = convert_wav_to_mp3(
-            temp_wav_path, mp3_filename, bitrate, target_sample_rate, channels_num
-        )
+        # PCM을 인코더로 바로 전달하여 변환 (WAV는 그대로 저장)
+        success, message = convert_pcm_to_audio(pcm, output_filename, bitrate, target_sample_rate, output_format)
         
         if not success:
             return None, message
         
         # 파일 정보 계산
-        file_size = get_file_size_mb(mp3_filename)
-        duration = get_audio_duration(audio_array, target_sample_rate)
-        
-        status_msg = f"""✅ 녹음 완료!
-📁 파일명: {mp3_filename}
-🎵 비트레이트: {bitrate}kbps
-📊 채널: {channels}
-🔊 샘플레이트: {target_sample_rate} Hz
-⏱️ 길이: {duration:.1f}초
-💾 파일크기: {file_size:.2f}MB
-🎼 형식: MP3 (고품질 압축)"""
+        duration = get_audio_duration(pcm, target_sample_rate)
+        status_msg = _format_recording_status(output_filename, bitrate, channels, target_sample_rate,
+                                              duration, output_format)
         
-        return mp3_filename, status_msg
+        return output_filename, status_msg
     
     except Exception as e:
         return None, f"오류가 발생했습니다: {str(e)}"
-    
-    finally:
-        # 임시 파일 정리
-        safe_delete_file(temp_wav_path)
 
 def clear_recording() -> Tuple[None, str]:
     """녹음 초기화"""
-    return None, "새로운 녹음을 시작할 수 있습니다."
\ No newline at end of file
+    return None, "새로운 녹음을 시작할 수 있습니다."
+
+def _close_live_session(session: dict, abort: bool = False) -> None:
+    """실시간 녹음 세션의 인코더와 작업 폴더 종료 (abort=True면 결과 파일도 삭제)"""
+    encoder = session.get("encoder")
+    session["encoder"] = None
+    try:
+        if encoder is not None:
+            # 리샘플러에 남아 있는 마지막 샘플까지 인코더에 전달
+            if not abort and session["resampler"] is not None:
+                tail = session["resampler"].resample_chunk(
+                    np.empty((0, session["channels_num"]), dtype=np.int16), last=True
+                )
+                encoder.stdin.write(memoryview(np.ascontiguousarray(tail)).cast('B'))
+            finish_stream_encoder(encoder, abort=abort)
+    finally:
+        if abort:
+            safe_delete_file(session["path"])
+        job_dir, session["job_dir"] = session["job_dir"], None
+        if job_dir is not None:
+            finish_scratch_job(job_dir)
+
+def _reap_idle_live_sessions() -> None:
+    """오랫동안 청크가 오지 않은 세션 정리 (브라우저를 닫는 등 정지 이벤트가 오지 않은 경우)"""
+    deadline = time.monotonic() - RECORDING_CONFIG["live_idle_timeout"]
+    with _live_lock:
+        idle = [sid for sid, session in _live_sessions.items() if session["last_chunk"] < deadline]
+        sessions = [_live_sessions.pop(sid) for sid in idle]
+    for session in sessions:
+        with session["lock"]:
+            _close_live_session(session, abort=True)
+
+def _live_reap_loop() -> None:
+    while True:
+        # 제한 시간보다 자주 확인하여 세션이 제한 시간을 크게 넘겨 남아 있지 않도록 함
+        time.sleep(min(RECORDING_CONFIG["live_idle_timeout"], 60))
+        try:
+            _reap_idle_live_sessions()
+        except (OSError, RuntimeError):
+            pass  # 인코더 종료 실패는 무시 (세션은 이미 목록에서 제거됨)
+
+def _ensure_live_reaper() -> None:
+    """유휴 세션 정리 스레드 시작 (처음 실시간 녹음을 시작할 때 한 번, 새 녹음이 없어도 세션이 정리되도록)"""
+    global _live_reaper
+    with _live_lock:
+        if _live_reaper is None:
+            _live_reaper = threading.Thread(target=_live_reap_loop, name="recodicon-live-reaper", daemon=True)
+            _live_reaper.start()
+
+def start_live_recording(bitrate: str, channels: str, sample_rate_option: str,
+                         output_format: str = "mp3", request: gr.Request = None) -> str:
+    """
+    실시간 녹음 세션 시작
+    
+    인코더는 첫 청크가 도착하여 입력 샘플레이트를 알게 되면 시작됩니다.
+    """
+    _reap_idle_live_sessions()
+    _ensure_live_reaper()
+    session_id = get_session_id(request)
+    try:
+        job_dir = start_scratch_job("recording_live")
+    except (RuntimeError, OSError) as e:
+        return str(e)
+    session = {
+        "bitrate": bitrate,
+        "output_format": get_output_format(output_format),
+        "channels": channels,
+        "channels_num": parse_channel_option(channels),
+        "sample_rate_option": sample_rate_option,
+        "encoder": None,
+        "path": None,
+        "job_dir": job_dir,
+        "input_rate": None,
+        "output_rate": None,
+        "resampler": None,
+        "frames": 0,
+        "last_chunk": time.monotonic(),
+        "lock": threading.Lock(),
+    }
+    with _live_lock:
+        previous = _live_sessions.pop(session_id, None)
+        _live_sessions[session_id] = session
+    if previous is not None:
+        with previous["lock"]:
+            _close_live_session(previous, abort=True)
+    return "🔴 녹음 중... (실시간 인코딩)"
+
+def stream_recording_chunk(chunk: Any, request: gr.Request = None) -> str:
+    """
+    녹음 청크를 실행 중인 인코더에 바로 전달
+    
+    청크는 16-bit PCM으로만 변환되어 인코더 입력 파이프로 넘어가므로
+    녹음 길이와 무관하게 서버 메모리 사용량이 일정합니다.
+    """
+    if chunk is None:
+        return "🔴 녹음 중... (실시간 인코딩)"
+    
+    with _live_lock:
+        session = _live_sessions.get(get_session_id(request))
+    if session is None:
+        return "녹음 세션이 없습니다. 녹음을 다시 시작해주세요."
+    
+    sample_rate, audio_array = chunk
+    with session["lock"]:
+        if session["encoder"] is None:
+            if session["frames"]:
+                return "녹음 세션이 종료되었습니다."
+            session["input_rate"] = sample_rate
+            session["output_rate"] = snap_to_output_rate(
+                parse_sample_rate_option(session["sample_rate_option"], sample_rate), session["output_format"]
+            )
+            with attach_scratch_dir(session["job_dir"]):
+                session["path"] = _recording_path(
+                    session["bitrate"], session["channels"], session["output_rate"], session["output_format"]
+                )
+            session["resampler"] = open_recording_resampler(
+                sample_rate, session["output_rate"], session["channels_num"]
+            )
+            session["encoder"] = open_recording_stream_encoder(
+                session["path"], session["output_rate"], session["channels_num"], session["bitrate"],
+                session["output_format"]
+            )
+        
+        with trace_stage("live_chunk", audio_array.nbytes):
+            pcm = prepare_pcm(audio_array, sample_rate, sample_rate, session["channels_num"])
+            frames = len(pcm)
+            if session["resampler"] is not None:
+                pcm = np.ascontiguousarray(session["resampler"].resample_chunk(pcm))
+            session["encoder"].stdin.write(memoryview(pcm).cast('B'))
+        session["frames"] += frames
+        session["last_chunk"] = time.monotonic()
+        elapsed = session["frames"] / session["input_rate"]
+    
+    return f"🔴 녹음 중... {elapsed:.1f}초 (실시간 인코딩)"
+
+@traced("recording_live")
+def finish_live_recording(request: gr.Request = None) -> Tuple[Optional[str], str]:
+    """실시간 녹음 종료: 인코더 입력을 닫고 완성된 파일 반환"""
+    with _live_lock:
+        session = _live_sessions.pop(get_session_id(request), None)
+    if session is None or session["encoder"] is None:
+        if session is not None:
+            with session["lock"]:
+                _close_live_session(session)
+        return None, "녹음된 오디오가 없습니다."
+    
+    try:
+        with session["lock"], trace_stage(f"{session['output_format']}_finalize"):
+            _close_live_session(session)
+    except Exception as e:
+        safe_delete_file(session["path"])
+        return None, f"오류가 발생했습니다: {str(e)}"
+    
+    duration = session["frames"] / session["input_rate"]
+    return session["path"], _format_recording_status(
+        session["path"], session["bitrate"], session["channels"], session["output_rate"], duration,
+        session["output_format"]
+    )
+
+def cancel_live_recording(request: gr.Request = None) -> None:
+    """진행 중인 실시간 녹음 취소 (결과 파일 삭제)"""
+    with _live_lock:
+        session = _live_sessions.pop(get_session_id(request), None)
+    if session is not None:
+        with session["lock"]:
+            _close_live_session(session, abort=True)
\ No newline at end of file
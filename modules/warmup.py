@@ -0,0 +1,118 @@
+import importlib
+import os
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from config.settings import STARTUP_CONFIG
+from utils.encoder_service import get_ffmpeg_path
+from utils.tracing import Trace, start_trace, trace_stage
+
+# 워밍업 진행 상태 (idle → running → done / failed)
+_state: Dict[str, Any] = {"state": "idle", "seconds": None, "error": None}
+_state_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+def configure_numba_cache() -> None:
+    """
+    numba JIT 캐시 폴더 지정 (numba를 처음 불러오기 전에 호출해야 적용됨)
+
+    이미지에 캐시를 미리 만들어 두면 새 인스턴스는 JIT 컴파일 없이 시작합니다.
+    """
+    cache_dir = STARTUP_CONFIG.get("numba_cache_dir")
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        os.environ.setdefault("NUMBA_CACHE_DIR", cache_dir)
+
+def _warm_ffmpeg() -> None:
+    """ffmpeg 경로 조회 + 실행 파일을 한 번 실행하여 디스크 캐시에 올림"""
+    subprocess.run([get_ffmpeg_path(), '-hide_banner', '-version'],
+                   stdin=subprocess.DEVNULL, capture_output=True)
+
+def _warm_libraries() -> None:
+    """처음 사용할 때 불러오는 디코딩/분석 라이브러리 로딩"""
+    # librosa.effects: 지연 로딩되는 하위 모듈까지 불러옴
+    for module_name in ("librosa", "librosa.effects", "soundfile", "pydub"):
+        importlib.import_module(module_name)
+
+def _warm_engine(engine: str) -> None:
+    """짧은 신호로 피치 엔진을 한 번 실행 (numba JIT 컴파일, FFT 계획 생성)"""
+    from modules.pitch_engines import apply_pitch_engine
+    sr = 22050
+    t = np.arange(sr // 2, dtype=np.float32) / sr
+    apply_pitch_engine(engine, 0.1 * np.sin(2 * np.pi * 440 * t), sr, 1.0)
+
+def run_warmup() -> Trace:
+    """워밍업 단계를 순서대로 실행하고 단계별 측정 기록 반환"""
+    with _state_lock:
+        _state.update(state="running", seconds=None, error=None)
+    started_at = time.perf_counter()
+    try:
+        with start_trace("warmup") as trace:
+            with trace_stage("ffmpeg"):
+                _warm_ffmpeg()
+            with trace_stage("libraries"):
+                _warm_libraries()
+            for engine in STARTUP_CONFIG["warmup_engines"]:
+                with trace_stage(f"engine:{engine}"):
+                    _warm_engine(engine)
+    except Exception as e:
+        with _state_lock:
+            _state.update(state="failed", seconds=time.perf_counter() - started_at, error=str(e))
+        raise
+    with _state_lock:
+        _state.update(state="done", seconds=time.perf_counter() - started_at)
+    return trace
+
+def _run_in_background() -> None:
+    try:
+        trace = run_warmup()
+    except Exception as e:
+        print(f"⚠️ 워밍업 실패 (첫 요청에서 다시 로딩됩니다): {e}")
+        return
+    if STARTUP_CONFIG.get("report", True):
+        print(format_warmup_report(trace))
+
+def start_warmup() -> None:
+    """
+    설정에 따라 워밍업 실행
+
+    background면 데몬 스레드에서 실행하고 바로 반환하며,
+    blocking이면 완료될 때까지 기다립니다. (실패해도 시작은 계속됨)
+    """
+    global _thread
+    mode = STARTUP_CONFIG.get("warmup", "background")
+    if mode == "off":
+        return
+    if mode == "blocking":
+        _run_in_background()
+        return
+    if _thread is None:
+        _thread = threading.Thread(target=_run_in_background, name="warmup", daemon=True)
+        _thread.start()
+
+def get_warmup_status() -> Dict[str, Any]:
+    """워밍업 진행 상태 (state, seconds, error)"""
+    with _state_lock:
+        return dict(_state)
+
+def format_warmup_report(trace: Trace) -> str:
+    """워밍업 단계별 소요 시간 요약"""
+    stages = " · ".join(f"{record['stage']} {record.get('wall', 0.0):.2f}초" for record in trace.stages)
+    total = sum(record.get("wall", 0.0) for record in trace.stages)
+    return f"🔥 워밍업 완료 ({total:.2f}초): {stages}"
+
+def format_startup_report(import_seconds: float, trace: Trace) -> str:
+    """시작 단계별 소요 시간 요약 (모듈 로딩 + UI 구성 + 서버 시작)"""
+    total = import_seconds + sum(record.get("wall", 0.0) for record in trace.stages)
+    lines = [f"🚀 요청 처리 준비 완료: {total:.2f}초", f"  - import: {import_seconds:.2f}초"]
+    lines += [f"  - {record['stage']}: {record.get('wall', 0.0):.2f}초" for record in trace.stages]
+    status = get_warmup_status()
+    if status["state"] == "running":
+        lines.append("  - 워밍업: 백그라운드에서 진행 중")
+    elif status["state"] == "failed":
+        lines.append(f"  - 워밍업: 실패 ({status['error']})")
+    return "\n".join(lines)
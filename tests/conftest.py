@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 루트에서 config/modules/utils를 불러올 수 있도록 경로 추가 (benchmarks와 같은 방식)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+# 계획 단계는 pitch_core/pitch_engines를 불러오므로 오디오 라이브러리가 필요
+pytest.importorskip("soxr")
+
+import utils.probe_index
+from config.settings import BATCH_CONFIG, PITCH_CONFIG
+from modules.batch_processor import plan_batch_tasks
+from utils.result_cache import compute_file_hash
+
+def _info(duration, sample_rate=44100, channels=1):
+    return {"codec": "pcm_s16le", "sample_rate": sample_rate, "channels": channels, "duration": duration}
+
+@pytest.fixture
+def inputs(tmp_path, monkeypatch):
+    """이름 → probe_audio 결과로 입력 파일을 만들고 헤더 조회를 그 결과로 대체"""
+    monkeypatch.setitem(BATCH_CONFIG, "max_workers", 2)
+    monkeypatch.setitem(PITCH_CONFIG, "stack_max_duration", 15)
+    monkeypatch.setitem(PITCH_CONFIG, "stack_max_clips", 16)
+    monkeypatch.setitem(PITCH_CONFIG, "keep_channels", True)
+    monkeypatch.setitem(PITCH_CONFIG, "working_sample_rate", None)
+    probed = {}
+
+    def make(**infos):
+        paths = []
+        for name, info in infos.items():
+            path = tmp_path / f"{name}.wav"
+            path.write_bytes(name.encode())  # 파일마다 다른 내용 (다른 해시)
+            probed[str(path)] = info
+            paths.append(str(path))
+        return paths
+
+    monkeypatch.setattr(utils.probe_index, "probe_files", lambda paths: {path: probed[path] for path in paths})
+    return make
+
+def _names(paths):
+    return [os.path.splitext(os.path.basename(path))[0] for path in paths]
+
+def test_short_clips_are_stacked_by_rate_and_channels_longest_task_first(inputs):
+    paths = inputs(c3=_info(3), long=_info(100), c1=_info(1), c5=_info(5), c2=_info(2), c4=_info(4),
+                   stereo=_info(7, channels=2))
+    tasks, rejected = plan_batch_tasks(paths, "librosa", output_format="mp3")
+
+    assert rejected == []
+    # 모노 클립 5개는 길이순으로 정렬한 뒤 워커 2개에 맞춰 3개/2개로 묶이고, 작업은 긴 것부터
+    assert [_names(task_paths) for task_paths, _, _ in tasks] == [
+        ["long"], ["c4", "c5"], ["stereo"], ["c1", "c2", "c3"]
+    ]
+    assert tasks[0][2] is None and tasks[2][2] is None
+    assert tasks[1][2] == ([44100, 44100], 44100, 1)
+    assert tasks[3][2] == ([44100, 44100, 44100], 44100, 1)
+
+def test_tasks_carry_probe_results_and_hashes(inputs, monkeypatch):
+    monkeypatch.setitem(BATCH_CONFIG, "max_workers", 1)
+    paths = inputs(a=_info(2), b=_info(3), c=_info(60))
+    tasks, _ = plan_batch_tasks(paths, "librosa", output_format="mp3")
+
+    assert [_names(task_paths) for task_paths, _, _ in tasks] == [["c"], ["a", "b"]]
+    for task_paths, task_inputs, _ in tasks:
+        assert len(task_paths) == len(task_inputs)
+        for path, (info, file_hash) in zip(task_paths, task_inputs):
+            assert info["duration"] == utils.probe_index.probe_files([path])[path]["duration"]
+            assert file_hash == compute_file_hash(path)
+
+def test_clips_with_different_working_rates_are_not_stacked(inputs, monkeypatch):
+    monkeypatch.setitem(BATCH_CONFIG, "max_workers", 1)
+    paths = inputs(a=_info(2, 44100), b=_info(3, 22050), c=_info(4, 44100), d=_info(5, 22050))
+    tasks, _ = plan_batch_tasks(paths, "librosa", output_format="mp3")
+
+    groups = sorted(sorted(_names(task_paths)) for task_paths, _, _ in tasks)
+    assert groups == [["a", "c"], ["b", "d"]]
+
+def test_unstackable_engine_or_single_clip_limit_runs_files_separately(inputs, monkeypatch):
+    paths = inputs(a=_info(2), b=_info(3), c=_info(4))
+    tasks, _ = plan_batch_tasks(paths, "ffmpeg", output_format="mp3")
+    assert all(stack is None for _, _, stack in tasks)
+
+    monkeypatch.setitem(PITCH_CONFIG, "stack_max_clips", 1)
+    tasks, _ = plan_batch_tasks(paths, "librosa", output_format="mp3")
+    assert all(stack is None for _, _, stack in tasks)
+    assert [_names(task_paths) for task_paths, _, _ in tasks] == [["c"], ["b"], ["a"]]
+
+def test_unknown_duration_runs_alone_and_first(inputs):
+    paths = inputs(a=_info(2), b=_info(3), unknown=_info(None), long=_info(100))
+    tasks, _ = plan_batch_tasks(paths, "librosa", output_format="mp3")
+
+    assert _names(tasks[0][0]) == ["unknown"] and tasks[0][2] is None
+    assert _names(tasks[1][0]) == ["long"]
+
+def test_unreadable_broken_and_too_long_inputs_are_rejected_in_order(inputs, monkeypatch):
+    monkeypatch.setitem(PITCH_CONFIG, "max_input_duration", 600)
+    paths = inputs(ok=_info(2), unreadable=OSError("permission denied"), broken=None, huge=_info(601))
+    tasks, rejected = plan_batch_tasks(paths, "librosa", output_format="mp3")
+
+    assert [_names(task_paths) for task_paths, _, _ in tasks] == [["ok"]]
+    assert _names([path for path, _ in rejected]) == ["unreadable", "broken", "huge"]
+    assert "permission denied" in rejected[0][1]
+    assert "오디오 스트림" in rejected[1][1]
+    assert "너무 깁니다" in rejected[2][1]
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from utils.output_manifest import (
+    MANIFEST_FILENAME, get_manifest_path, is_output_current, load_manifest, record_output
+)
+from utils.result_cache import compute_file_hash, make_cache_key
+
+def _write(path, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+def _content_key(input_path: str) -> str:
+    """입력 내용 해시 기반 키 (modules.pitch_core.make_output_key와 같은 방식)"""
+    return make_cache_key(compute_file_hash(input_path), 2.0, "librosa", "mp3|192k")
+
+def test_recorded_output_is_current(tmp_path):
+    _write(tmp_path / "song_pitch_+2.0.mp3", b"out")
+    manifest = load_manifest(str(tmp_path))
+    record_output(str(tmp_path), manifest, "song_pitch_+2.0.mp3", "/in/song.mp3", "key-1")
+
+    reloaded = load_manifest(str(tmp_path))
+    assert reloaded == {"song_pitch_+2.0.mp3": {"source": "/in/song.mp3", "key": "key-1"}}
+    assert is_output_current(str(tmp_path), reloaded, "song_pitch_+2.0.mp3", "key-1")
+
+def test_different_key_is_not_current(tmp_path):
+    _write(tmp_path / "a.mp3", b"out")
+    manifest = {}
+    record_output(str(tmp_path), manifest, "a.mp3", "/in/a.mp3", "old-key")
+    assert not is_output_current(str(tmp_path), manifest, "a.mp3", "new-key")
+
+def test_missing_output_file_is_not_current(tmp_path):
+    manifest = {}
+    record_output(str(tmp_path), manifest, "gone.mp3", "/in/gone.mp3", "key")
+    assert not is_output_current(str(tmp_path), manifest, "gone.mp3", "key")
+
+def test_unrecorded_output_is_not_current(tmp_path):
+    _write(tmp_path / "b.mp3", b"out")
+    assert not is_output_current(str(tmp_path), {}, "b.mp3", "key")
+
+def test_changed_input_content_makes_output_stale(tmp_path):
+    input_path = _write(tmp_path / "in.wav", b"original")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    _write(output_dir / "in_pitch_+2.0.mp3", b"out")
+    manifest = {}
+    record_output(str(output_dir), manifest, "in_pitch_+2.0.mp3", input_path, _content_key(input_path))
+    assert is_output_current(str(output_dir), manifest, "in_pitch_+2.0.mp3", _content_key(input_path))
+
+    # 같은 크기로 내용만 바꾸고 수정 시각을 옮겨 해시가 다시 계산되도록 함
+    _write(input_path, b"modified")
+    stat = os.stat(input_path)
+    os.utime(input_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not is_output_current(str(output_dir), manifest, "in_pitch_+2.0.mp3", _content_key(input_path))
+
+def test_touched_input_with_same_content_stays_current(tmp_path):
+    input_path = _write(tmp_path / "in.wav", b"same")
+    _write(tmp_path / "in_pitch_+2.0.mp3", b"out")
+    manifest = {}
+    record_output(str(tmp_path), manifest, "in_pitch_+2.0.mp3", input_path, _content_key(input_path))
+
+    stat = os.stat(input_path)
+    os.utime(input_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert is_output_current(str(tmp_path), manifest, "in_pitch_+2.0.mp3", _content_key(input_path))
+
+@pytest.mark.parametrize("content", [b"{not json", b"[1, 2, 3]"])
+def test_corrupt_manifest_loads_empty(tmp_path, content):
+    _write(get_manifest_path(str(tmp_path)), content)
+    assert load_manifest(str(tmp_path)) == {}
+
+def test_save_leaves_no_partial_files(tmp_path):
+    manifest = {}
+    for index in range(3):
+        record_output(str(tmp_path), manifest, f"{index}.mp3", f"/in/{index}.mp3", "key")
+    assert sorted(os.listdir(tmp_path)) == [MANIFEST_FILENAME]
+    assert len(load_manifest(str(tmp_path))) == 3
+
+def _is_up_to_date():
+    # headless_batch는 피치 조정 경로(soxr 등)를 함께 불러옴
+    pytest.importorskip("soxr")
+    from modules.headless_batch import _is_up_to_date
+    return _is_up_to_date
+
+def test_mtime_mode_skips_only_outputs_newer_than_input(tmp_path):
+    is_up_to_date = _is_up_to_date()
+    input_path = _write(tmp_path / "in.wav", b"in")
+    output_path = _write(tmp_path / "in_pitch_+2.0.mp3", b"out")
+    stat = os.stat(input_path)
+    os.utime(output_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert is_up_to_date(input_path, output_path, "mtime", {}, None)
+
+    # 입력이 출력보다 나중에 수정되면 다시 처리
+    os.utime(input_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert not is_up_to_date(input_path, output_path, "mtime", {}, None)
+
+def test_hash_mode_uses_manifest_key_and_none_mode_never_skips(tmp_path):
+    is_up_to_date = _is_up_to_date()
+    input_path = _write(tmp_path / "in.wav", b"in")
+    output_path = _write(tmp_path / "in_pitch_+2.0.mp3", b"out")
+    manifest = {}
+    record_output(str(tmp_path), manifest, "in_pitch_+2.0.mp3", input_path, "key")
+    assert is_up_to_date(input_path, output_path, "hash", manifest, "key")
+    assert not is_up_to_date(input_path, output_path, "hash", manifest, "other-key")
+    assert not is_up_to_date(input_path, output_path, "none", manifest, "key")
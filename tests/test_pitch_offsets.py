@@ -0,0 +1,38 @@
+import pytest
+
+# pitch_shifter는 Gradio UI 처리 모듈이므로 Gradio와 오디오 라이브러리가 설치된 환경에서만 실행
+pytest.importorskip("gradio")
+pytest.importorskip("soxr")
+
+from config.settings import PITCH_CONFIG
+from modules.pitch_shifter import parse_pitch_offsets
+
+def test_range_is_inclusive_in_semitone_steps():
+    assert parse_pitch_offsets("-3~3") == [-3.0, -2.0, -1.0, 0.0, 1.0, 2.0, 3.0]
+
+def test_reversed_range_is_swapped():
+    assert parse_pitch_offsets("2~-2") == parse_pitch_offsets("-2~2")
+
+def test_fractional_range_keeps_start():
+    assert parse_pitch_offsets("-1.5~1") == [-1.5, -0.5, 0.5]
+
+def test_values_and_ranges_are_merged_sorted_and_deduplicated():
+    assert parse_pitch_offsets("2, 0, -1~1, 0,  2") == [-1.0, 0.0, 1.0, 2.0]
+
+def test_empty_text_and_empty_items():
+    assert parse_pitch_offsets("") == []
+    assert parse_pitch_offsets(" , ,") == []
+
+@pytest.mark.parametrize("text", [
+    str(PITCH_CONFIG["max_pitch"] + 1),
+    str(PITCH_CONFIG["min_pitch"] - 0.5),
+    f"{PITCH_CONFIG['max_pitch'] - 1}~{PITCH_CONFIG['max_pitch'] + 2}",
+])
+def test_out_of_range_values_are_rejected(text):
+    with pytest.raises(ValueError, match="피치 범위"):
+        parse_pitch_offsets(text)
+
+@pytest.mark.parametrize("text", ["abc", "1~", "~2", "1~x"])
+def test_malformed_values_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_pitch_offsets(text)
@@ -1,9 +1,89 @@
+import io
+import itertools
 import numpy as np
+import soxr
+import re
 import wave
 import subprocess
-import imageio_ffmpeg as ffmpeg
-from pydub import AudioSegment
-from typing import Tuple, Optional
+import struct
+import os
+from typing import Tuple, Optional, Dict, Any, Iterator, Callable, List, NamedTuple
+
+from utils.encoder_service import (
+    get_ffmpeg_path, encode_pcm, encode_file, mp3_codec_args,
+    open_stream_encoder,
+    get_output_format, get_output_muxer, output_codec_args
+)
+from utils.tracing import trace_stage
+
+# prepare_pcm 블록 크기 (프레임, 블록마다 float 임시 배열이 이 크기로만 생성됨)
+_PREPARE_BLOCK_FRAMES = 1 << 16
+
+# MP3(MPEG-1/2/2.5)가 지원하는 샘플레이트 (이 밖의 레이트는 인코더가 다시 변환함)
+MP3_SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+
+# Opus가 입력으로 받는 샘플레이트 (내부적으로는 48kHz로 처리)
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# soundfile(libsndfile)로 직접 여는 형식: 헤더 조회와 프레임 범위 읽기에 ffmpeg 프로세스를 쓰지 않음
+_SOUNDFILE_FORMATS = (".wav", ".flac")
+
+# WAV/FLAC을 직접 읽을 때 한 번에 변환하는 프레임 수 (다채널 → 모노 변환용 버퍼 크기)
+_DIRECT_READ_FRAMES = 1 << 16
+
+# 출력 형식별 최대 채널 수 (MP3는 스테레오까지, 나머지는 7.1까지)
+_MAX_OUTPUT_CHANNELS = {"mp3": 2, "wav": 8, "flac": 8, "opus": 8}
+
+# ffmpeg 채널 레이아웃 이름 → 채널 수
+_CHANNEL_LAYOUTS = {
+    "mono": 1, "stereo": 2, "2.1": 3, "3.0": 3, "quad": 4,
+    "4.0": 4, "5.0": 5, "5.1": 6, "6.1": 7, "7.1": 8
+}
+
+def snap_to_mp3_rate(sample_rate: int) -> int:
+    """MP3가 지원하는 샘플레이트로 맞춤 (대역을 잃지 않도록 같거나 높은 레이트 중 가장 가까운 값)"""
+    for rate in MP3_SAMPLE_RATES:
+        if rate >= sample_rate:
+            return rate
+    return MP3_SAMPLE_RATES[-1]
+
+def snap_to_output_rate(sample_rate: int, output_format: Optional[str] = None) -> int:
+    """출력 형식이 지원하는 샘플레이트로 맞춤 (WAV/FLAC은 그대로)"""
+    output_format = get_output_format(output_format)
+    if output_format == "mp3":
+        return snap_to_mp3_rate(sample_rate)
+    if output_format == "opus":
+        return next((rate for rate in OPUS_SAMPLE_RATES if rate >= sample_rate), OPUS_SAMPLE_RATES[-1])
+    return sample_rate
+
+def plan_output_channels(source_channels: int, output_format: Optional[str] = None) -> int:
+    """원본 채널 수를 유지하되 출력 형식이 지원하는 최대 채널 수로 제한 (MP3는 스테레오로 다운믹스)"""
+    return max(1, min(source_channels, _MAX_OUTPUT_CHANNELS.get(get_output_format(output_format), 2)))
+
+def plan_working_rate(source_rate: int, requested_rate: Optional[int] = None,
+                      max_rate: Optional[int] = None) -> int:
+    """
+    처리 작업 하나에서 사용할 샘플레이트 결정
+    
+    디코딩 → 피치 조정 → 인코딩을 모두 이 레이트로 처리하므로 샘플레이트 변환은
+    디코딩 직후 최대 한 번만 일어납니다. 요청 레이트가 원본보다 높아도 업샘플링하지 않으며,
+    결과는 인코더가 다시 변환하지 않도록 MP3 지원 레이트로 맞춥니다.
+    """
+    rate = min(requested_rate or source_rate, source_rate)
+    if max_rate:
+        rate = min(rate, max_rate)
+    return snap_to_mp3_rate(rate)
+
+def resample_audio(audio_array: np.ndarray, original_rate: int, target_rate: int) -> np.ndarray:
+    """soxr 고품질(HQ) 샘플레이트 변환 (같은 레이트면 그대로 반환, 다채널은 (채널, 샘플) 배열)"""
+    if original_rate == target_rate:
+        return audio_array
+    with trace_stage("resample", audio_array.nbytes):
+        if audio_array.ndim == 2:
+            # soxr는 (프레임, 채널) 배열을 받으므로 채널 전체를 한 번에 변환한 뒤 다시 채널 우선으로 배치
+            resampled = soxr.resample(np.ascontiguousarray(audio_array.T), original_rate, target_rate, "HQ")
+            return np.ascontiguousarray(resampled.T)
+        return soxr.resample(audio_array, original_rate, target_rate, "HQ")
 
 def convert_audio_to_16bit(audio_array: np.ndarray) -> np.ndarray:
     """오디오 배열을 16-bit PCM으로 변환"""
@@ -15,10 +95,56 @@ def create_stereo_from_mono(mono_array: np.ndarray) -> np.ndarray:
     """모노 오디오를 스테레오로 변환"""
     return np.column_stack((mono_array, mono_array))
 
+def prepare_pcm(audio_array: np.ndarray, original_rate: int, target_rate: int, channels: int,
+                block_frames: int = _PREPARE_BLOCK_FRAMES) -> np.ndarray:
+    """
+    녹음 데이터를 인코더에 바로 넣을 수 있는 16-bit PCM (frames, channels) 배열로 변환
+    
+    클리핑/스케일 변환/채널 변환을 블록 단위로 한 번에 처리하여 전체 길이의 float 임시 배열을
+    만들지 않습니다. 리샘플이 필요 없으면 최종 채널 배치의 버퍼 하나에 바로 기록하고,
+    필요하면 채널을 줄인 상태에서 리샘플한 뒤 채널을 늘립니다.
+    이미 원하는 형식인 int16 입력은 복사하지 않습니다.
+    """
+    x = audio_array if audio_array.ndim == 2 else audio_array[:, np.newaxis]
+    n_frames, in_channels = x.shape
+    work_channels = min(in_channels, channels)
+    resample = target_rate != original_rate
+    fill_channels = work_channels if resample else channels
+    
+    if x.dtype == np.int16 and in_channels == fill_channels:
+        pcm = x
+    else:
+        if np.issubdtype(x.dtype, np.integer):
+            scale = 32767.0 / np.iinfo(x.dtype).max
+        else:
+            scale = 32767.0
+        pcm = np.empty((n_frames, fill_channels), dtype=np.int16)
+        for start in range(0, n_frames, block_frames):
+            block = x[start:start + block_frames].astype(np.float32)
+            if work_channels == 1 and in_channels > 1:
+                block = block.mean(axis=1, keepdims=True)
+            elif work_channels < in_channels:
+                block = block[:, :work_channels]
+            block *= scale
+            np.clip(block, -32768, 32767, out=block)
+            pcm[start:start + block_frames, :work_channels] = block
+            # 마지막 채널을 복제하여 채널 수 맞춤 (모노 → 스테레오)
+            pcm[start:start + block_frames, work_channels:] = block[:, -1:]
+    
+    if resample:
+        pcm = soxr.resample(pcm, original_rate, target_rate, "HQ")
+        if channels > work_channels:
+            expanded = np.empty((len(pcm), channels), dtype=np.int16)
+            expanded[:, :work_channels] = pcm
+            expanded[:, work_channels:] = pcm[:, -1:]
+            pcm = expanded
+    
+    return np.ascontiguousarray(pcm)
+
 def save_wav_file(file_path: str, audio_data: np.ndarray, sample_rate: int, channels: int) -> bool:
     """WAV 파일로 저장"""
     try:
-        with wave.open(file_path, 'wb') as wav_file:
+        with trace_stage("wav_write", audio_data.nbytes), wave.open(file_path, 'wb') as wav_file:
             wav_file.setnchannels(channels)
             wav_file.setsampwidth(2)  # 16-bit
             wav_file.setframerate(sample_rate)
@@ -29,43 +155,496 @@ def save_wav_file(file_path: str, audio_data: np.ndarray, sample_rate: int, chan
 
 def convert_wav_to_mp3(wav_path: str, mp3_path: str, bitrate: str, 
                       sample_rate: int, channels: int) -> Tuple[bool, str]:
-    """WAV 파일을 MP3로 변환"""
+    """WAV 파일을 MP3로 변환 (인코더 풀 사용)"""
     try:
-        ffmpeg_exe = ffmpeg.get_ffmpeg_exe()
-        
-        cmd = [
-            ffmpeg_exe,
-            '-i', wav_path,
-            '-codec:a', 'mp3',
-            '-b:a', f'{bitrate}k',
-            '-ar', str(sample_rate),
-            '-ac', str(channels),
-            '-y',  # 덮어쓰기 허용
-            mp3_path
-        ]
+        codec_args = mp3_codec_args(f'{bitrate}k') + ['-ar', str(sample_rate), '-ac', str(channels)]
         
         # 고품질 설정 추가
         if int(bitrate) >= 320:
-            cmd.extend(['-q:a', '0'])
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            return False, f"MP3 변환 실패: {result.stderr}"
+            codec_args.extend(['-q:a', '0'])
         
+        with trace_stage("mp3_encode", os.path.getsize(wav_path)):
+            encode_file(wav_path, mp3_path, codec_args)
         return True, "변환 성공"
+    except RuntimeError as e:
+        return False, f"MP3 변환 실패: {str(e)}"
+    except Exception as e:
+        return False, f"변환 중 오류: {str(e)}"
+
+def recording_codec_args(bitrate: str, output_format: str = "mp3") -> list:
+    """녹음용 인코딩 인자 (샘플레이트 변환은 인코더에 넣기 전에 끝냄, WAV/FLAC은 비트레이트 무시)"""
+    codec_args = output_codec_args(output_format, f'{bitrate}k')
+    
+    # 고품질 설정 추가
+    if get_output_format(output_format) == "mp3" and int(bitrate) >= 320:
+        codec_args.extend(['-q:a', '0'])
+    return codec_args
+
+def convert_pcm_to_audio(pcm: np.ndarray, output_path: str, bitrate: str,
+                         sample_rate: int, output_format: str = "mp3") -> Tuple[bool, str]:
+    """
+    16-bit PCM 배열을 임시 WAV 없이 인코더로 바로 전달하여 출력 형식으로 변환
+    
+    WAV는 인코더 프로세스 없이 PCM을 그대로 저장합니다.
+    """
+    output_format = get_output_format(output_format)
+    try:
+        if output_format == "wav":
+            if not save_wav_file(output_path, pcm, sample_rate, 1 if pcm.ndim == 1 else pcm.shape[1]):
+                return False, "WAV 저장 실패"
+            return True, "변환 성공"
+        with trace_stage(f"{output_format}_encode", pcm.nbytes):
+            encode_pcm(pcm, sample_rate, recording_codec_args(bitrate, output_format), output_path,
+                       get_output_muxer(output_format))
+        return True, "변환 성공"
+    except RuntimeError as e:
+        return False, f"{output_format.upper()} 변환 실패: {str(e)}"
     except Exception as e:
         return False, f"변환 중 오류: {str(e)}"
 
 def convert_mp3_to_wav(mp3_path: str, wav_path: str) -> bool:
     """MP3 파일을 WAV로 변환 (librosa 호환성을 위해)"""
+    from pydub import AudioSegment
     try:
-        audio = AudioSegment.from_mp3(mp3_path)
-        audio.export(wav_path, format='wav')
+        with trace_stage("decode", os.path.getsize(mp3_path)):
+            audio = AudioSegment.from_mp3(mp3_path)
+            audio.export(wav_path, format='wav')
         return True
     except Exception:
         return False
 
+def _probe_with_soundfile(file_path: str) -> Optional[Dict[str, Any]]:
+    """WAV/FLAC 헤더만 읽어 스트림 정보 조회 (ffmpeg 프로세스 없음, 실패하면 None)"""
+    import soundfile as sf
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        return None
+    if info.samplerate <= 0 or info.channels <= 0:
+        return None
+    return {
+        "codec": "flac" if info.format == "FLAC" else f"pcm_{info.subtype.lower()}",
+        "sample_rate": int(info.samplerate),
+        "channels": int(info.channels),
+        "duration": info.frames / info.samplerate
+    }
+
+def probe_audio(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    오디오 스트림 정보 조회 (샘플레이트, 채널 수, 길이, 코덱) - 디코딩 없이 헤더만 읽음
+    
+    WAV/FLAC은 soundfile로 헤더를 바로 읽고, 그 밖의 형식(또는 soundfile이 읽지 못한 파일)은
+    ffmpeg로 조회합니다. 스트림을 찾지 못하면 None입니다.
+    """
+    if os.path.splitext(file_path)[1].lower() in _SOUNDFILE_FORMATS:
+        with trace_stage("probe"):
+            info = _probe_with_soundfile(file_path)
+        if info is not None:
+            return info
+    try:
+        with trace_stage("probe"):
+            result = subprocess.run(
+                [get_ffmpeg_path(), '-hide_banner', '-i', file_path],
+                capture_output=True, text=True, errors='replace'
+            )
+        stream = re.search(r"Stream #\S+.*?Audio: (\w+).*?, (\d+) Hz, ([^,]+)", result.stderr)
+        if not stream:
+            return None
+        
+        layout = stream.group(3).strip()
+        channels = _CHANNEL_LAYOUTS.get(layout.split('(')[0])
+        if channels is None:
+            count = re.match(r"(\d+) channels", layout)
+            channels = int(count.group(1)) if count else 2
+        
+        duration = None
+        match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+        if match:
+            hours, minutes, seconds = match.groups()
+            duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        
+        return {
+            "codec": stream.group(1),
+            "sample_rate": int(stream.group(2)),
+            "channels": channels,
+            "duration": duration
+        }
+    except Exception:
+        return None
+
+class _DirectReader(NamedTuple):
+    """ffmpeg 없이 프레임 범위를 바로 읽는 WAV/FLAC 리더 (read(out): out에 읽은 프레임 수)"""
+    sample_rate: int
+    frames: int
+    read: Callable[[np.ndarray], int]
+    close: Callable[[], None]
+
+def _parse_wav_layout(file_path: str) -> Optional[Tuple[int, int, np.dtype, float, int, int]]:
+    """
+    WAV 헤더에서 PCM 데이터 위치/형식 조회 (numpy.memmap으로 바로 읽을 수 있는 형식만)
+    
+    Returns:
+        (데이터 시작 위치, 프레임 수, 샘플 dtype, float 변환 배율, 채널 수, 샘플레이트)
+        16/32-bit 정수, 32-bit float이 아니면 None (soundfile로 읽음)
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+        file_size = os.fstat(f.fileno()).st_size
+    
+    if fmt is None or len(fmt) < 16:
+        return None
+    format_tag, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == 0xFFFE and len(fmt) >= 26:  # WAVE_FORMAT_EXTENSIBLE: 하위 형식 GUID의 앞 2바이트
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+    layouts = {(1, 16): (np.int16, 1 / 32768), (1, 32): (np.int32, 1 / 2147483648), (3, 32): (np.float32, 1.0)}
+    if (format_tag, bits) not in layouts or channels < 1 or block_align != channels * bits // 8:
+        return None
+    dtype, scale = layouts[(format_tag, bits)]
+    # 4GB를 넘는 파일은 data 크기 필드가 맞지 않으므로 실제 파일 크기 기준
+    data_size = min(chunk_size, file_size - offset)
+    return offset, data_size // block_align, np.dtype(dtype), scale, channels, sample_rate
+
+def _open_wav_memmap(file_path: str, channels: int = 1) -> Optional[_DirectReader]:
+    """PCM WAV 데이터 구간을 numpy.memmap으로 열기 (읽을 때 페이지 캐시에서 바로 변환, 전체 복사 없음)"""
+    try:
+        layout = _parse_wav_layout(file_path)
+    except (OSError, struct.error):
+        return None
+    if layout is None or layout[1] == 0:
+        return None
+    offset, frames, dtype, scale, source_channels, sample_rate = layout
+    if channels not in (1, source_channels):
+        return None  # 다운믹스(예: 5.1 → 스테레오)는 ffmpeg가 처리
+    samples = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(frames, source_channels))
+    position = 0
+    
+    def read(out: np.ndarray) -> int:
+        nonlocal position
+        if samples is None:
+            return 0
+        count = min(out.shape[-1], frames - position)
+        for start in range(0, count, _DIRECT_READ_FRAMES):
+            chunk = samples[position + start:position + min(count, start + _DIRECT_READ_FRAMES)]
+            if out.ndim == 2:
+                # 원본 채널 유지: 채널 우선 배치로 옮기면서 float로 변환
+                np.multiply(chunk.T, scale, out=out[:, start:start + len(chunk)], casting='unsafe')
+                continue
+            target = out[start:start + len(chunk)]
+            np.multiply(chunk[:, 0], scale, out=target, casting='unsafe')
+            for channel in range(1, source_channels):
+                target += chunk[:, channel] * np.float32(scale)
+            if source_channels > 1:
+                target /= source_channels
+        position += count
+        return count
+    
+    def close() -> None:
+        # 배열이 mmap 버퍼를 참조하고 있어 mmap.close()는 쓸 수 없음 → 참조를 놓아 매핑 해제
+        nonlocal samples
+        samples = None
+    
+    return _DirectReader(sample_rate, frames, read, close)
+
+def _open_soundfile_reader(file_path: str, channels: int = 1) -> Optional[_DirectReader]:
+    """FLAC, 24-bit WAV 등을 soundfile로 열어 프레임 범위 단위로 읽기"""
+    import soundfile as sf
+    try:
+        sound_file = sf.SoundFile(file_path)
+    except Exception:
+        return None
+    source_channels = sound_file.channels
+    if channels not in (1, source_channels):
+        sound_file.close()
+        return None  # 다운믹스(예: 5.1 → 스테레오)는 ffmpeg가 처리
+    weights = np.full(source_channels, 1 / source_channels, dtype=np.float32)
+    buffer = np.empty((_DIRECT_READ_FRAMES, source_channels), dtype=np.float32) if source_channels > 1 else None
+    
+    def read(out: np.ndarray) -> int:
+        if buffer is None:
+            return len(sound_file.read(out=out[:, np.newaxis]))
+        # 다채널은 고정 크기 버퍼로 나눠 읽으며 채널 평균(또는 채널 우선 배치)으로 기록
+        position = 0
+        while position < out.shape[-1]:
+            frames = sound_file.read(out=buffer[:out.shape[-1] - position])
+            if not len(frames):
+                break
+            if out.ndim == 2:
+                out[:, position:position + len(frames)] = frames.T
+            else:
+                np.dot(frames, weights, out=out[position:position + len(frames)])
+            position += len(frames)
+        return position
+    
+    return _DirectReader(sound_file.samplerate, sound_file.frames, read, sound_file.close)
+
+def _open_direct_reader(file_path: str, channels: int = 1) -> Optional[_DirectReader]:
+    """
+    WAV/FLAC 입력을 ffmpeg 없이 여는 리더 (다른 형식이거나 열 수 없으면 None → ffmpeg 사용)
+    
+    16/32-bit PCM WAV는 numpy.memmap, 나머지(FLAC, 24-bit WAV 등)는 soundfile 프레임 범위 읽기입니다.
+    channels가 1이면 모노로 섞어 읽고, 원본 채널 수와 같으면 채널을 그대로 읽습니다.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in _SOUNDFILE_FORMATS:
+        return None
+    if extension == ".wav":
+        reader = _open_wav_memmap(file_path, channels)
+        if reader is not None:
+            return reader
+    return _open_soundfile_reader(file_path, channels)
+
+def _empty_audio(frames: int, channels: int = 1) -> np.ndarray:
+    """float32 오디오 버퍼 (모노는 (샘플,), 다채널은 (채널, 샘플))"""
+    return np.empty((channels, frames) if channels > 1 else frames, dtype=np.float32)
+
+def _iter_direct_blocks(reader: _DirectReader, block_frames: int, channels: int = 1) -> Iterator[np.ndarray]:
+    """리더에서 블록 크기만큼씩 읽어 float32 블록으로 반환 (끝나거나 중단되면 리더를 닫음)"""
+    try:
+        while True:
+            block = _empty_audio(block_frames, channels)
+            frames = reader.read(block)
+            if not frames:
+                break
+            yield block[..., :frames]
+    finally:
+        reader.close()
+
+def _split_channels(pcm: np.ndarray, channels: int) -> np.ndarray:
+    """ffmpeg가 출력한 인터리브 PCM을 (채널, 샘플) 배열로 변환 (모노는 그대로)"""
+    if channels == 1:
+        return pcm
+    return np.ascontiguousarray(pcm[:len(pcm) // channels * channels].reshape(-1, channels).T)
+
+def decode_audio_to_array(file_path: str, sample_rate: Optional[int] = None,
+                          source_rate: Optional[int] = None, channels: int = 1) -> Tuple[np.ndarray, int]:
+    """
+    오디오 파일을 디코딩하여 float32 배열로 반환 (임시 파일 없음)
+    
+    WAV/FLAC은 최종 배열에 바로 읽고 (memmap/soundfile, ffmpeg 프로세스와 파이프 복사 없음),
+    그 밖의 형식은 ffmpeg로 디코딩합니다.
+    원본 샘플레이트로 디코딩한 뒤, 출력 샘플레이트가 다르면 soxr(HQ)로 한 번만 변환합니다.
+    
+    Args:
+        file_path: 입력 오디오 파일 경로
+        sample_rate: 출력 샘플레이트 (None이면 원본 유지)
+        source_rate: 원본 샘플레이트 (None이면 조회)
+        channels: 출력 채널 수 (1이면 모노로 섞음, 2 이상이면 (채널, 샘플) 배열)
+    
+    Returns:
+        (audio_array, sample_rate)
+    """
+    reader = _open_direct_reader(file_path, channels)
+    if reader is not None:
+        try:
+            with trace_stage("decode") as record:
+                y = _empty_audio(reader.frames, channels)
+                y = y[..., :reader.read(y)]
+                record["bytes"] = y.nbytes
+        finally:
+            reader.close()
+        source_rate = reader.sample_rate
+        sample_rate = sample_rate or source_rate
+        return resample_audio(y, source_rate, sample_rate), sample_rate
+    
+    return _decode_with_ffmpeg(file_path, sample_rate, source_rate, channels)
+
+def decode_audio_window(file_path: str, start_seconds: float, duration_seconds: float,
+                        sample_rate: Optional[int] = None, source_rate: Optional[int] = None,
+                        channels: int = 1) -> Tuple[np.ndarray, int]:
+    """
+    파일의 일부 구간만 디코딩 (ffmpeg 입력 탐색, 파일 앞부분을 디코딩하지 않음)
+    
+    긴 파일의 미리 듣기처럼 짧은 구간만 필요할 때 사용합니다. 인자와 반환값은 decode_audio_to_array와 같습니다.
+    """
+    return _decode_with_ffmpeg(file_path, sample_rate, source_rate, channels,
+                               ['-ss', f"{max(start_seconds, 0.0):.3f}", '-t', f"{duration_seconds:.3f}"])
+
+def _decode_with_ffmpeg(file_path: str, sample_rate: Optional[int], source_rate: Optional[int],
+                        channels: int, input_args: Optional[List[str]] = None) -> Tuple[np.ndarray, int]:
+    """ffmpeg로 원본 샘플레이트 float32 PCM을 디코딩한 뒤 출력 샘플레이트로 변환"""
+    if source_rate is None:
+        info = probe_audio(file_path)
+        if info is None:
+            raise ValueError("오디오 스트림을 찾을 수 없습니다")
+        source_rate = info["sample_rate"]
+    
+    cmd = [
+        get_ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+        *(input_args or []), '-i', file_path,
+        '-vn', '-ac', str(channels), '-ar', str(source_rate),
+        '-f', 'f32le', 'pipe:1'
+    ]
+    with trace_stage("decode") as record:
+        result = subprocess.run(cmd, capture_output=True)
+        record["bytes"] = len(result.stdout)
+    if result.returncode != 0:
+        raise RuntimeError(f"디코딩 실패: {result.stderr.decode(errors='replace')}")
+    
+    y = _split_channels(np.frombuffer(result.stdout, dtype=np.float32), channels)
+    sample_rate = sample_rate or source_rate
+    return resample_audio(y, source_rate, sample_rate), sample_rate
+
+def write_wav_pcm(audio_array: np.ndarray, sample_rate: int,
+                  output_path: Optional[str] = None) -> Optional[bytes]:
+    """
+    float32 또는 int16 오디오 배열을 16-bit WAV로 바로 저장 (인코더 프로세스 없음)
+    
+    output_path가 없으면 WAV 데이터를 반환합니다. 다채널은 (프레임, 채널) 배열입니다.
+    """
+    if audio_array.dtype != np.int16:
+        audio_array = (np.clip(audio_array, -1.0, 1.0) * 32767).astype(np.int16)
+    channels = 1 if audio_array.ndim == 1 else audio_array.shape[1]
+    target = output_path or io.BytesIO()
+    with wave.open(target, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)  # 16-bit
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.ascontiguousarray(audio_array).tobytes())
+    return None if output_path else target.getvalue()
+
+def encode_audio_array(audio_array: np.ndarray, sample_rate: int, output_path: Optional[str] = None,
+                       output_format: Optional[str] = None, bitrate: Optional[str] = None) -> Optional[bytes]:
+    """
+    float 오디오 배열을 출력 형식으로 인코딩 (None이면 기본 형식)
+    
+    WAV는 PCM을 바로 기록하고, 나머지 형식은 인코더 풀의 ffmpeg로 인코딩합니다.
+    다채널은 피치 엔진과 같은 (채널, 샘플) 배열이며 인코더에는 인터리브하여 전달합니다.
+    output_path가 주어지면 해당 파일에 저장하고, 없으면 인코딩된 데이터를 반환
+    """
+    output_format = get_output_format(output_format)
+    if audio_array.ndim == 2:
+        audio_array = audio_array.T
+    if output_format == "wav":
+        with trace_stage("wav_write", audio_array.size * 2):
+            return write_wav_pcm(audio_array, sample_rate, output_path)
+    with trace_stage(f"{output_format}_encode", audio_array.size * 4):
+        return encode_pcm(audio_array, sample_rate, output_codec_args(output_format, bitrate),
+                          output_path, get_output_muxer(output_format))
+
+def encode_array_to_mp3(audio_array: np.ndarray, sample_rate: int, bitrate: str = "192k",
+                        output_path: Optional[str] = None) -> Optional[bytes]:
+    """float 오디오 배열을 인코더 풀에서 MP3로 인코딩 (encode_audio_array 참고)"""
+    return encode_audio_array(audio_array, sample_rate, output_path, "mp3", bitrate)
+
+def iter_decoded_blocks(file_path: str, sample_rate: int, block_frames: int,
+                        source_rate: Optional[int] = None, channels: int = 1) -> Iterator[np.ndarray]:
+    """
+    오디오 파일을 디코딩하면서 float32 블록 단위로 반환 (다채널은 (채널, 샘플) 블록)
+    
+    전체 파일을 메모리에 올리지 않으므로 파일 길이와 무관하게 메모리 사용량이 일정합니다.
+    WAV/FLAC은 블록 크기만큼씩 프레임 범위를 바로 읽고 (PCM WAV는 memmap으로 페이지 캐시에서 변환),
+    그 밖의 형식은 ffmpeg 파이프로 디코딩합니다.
+    source_rate가 sample_rate와 다르면 soxr 스트림 리샘플러(HQ)로 이어서 변환합니다.
+    """
+    reader = _open_direct_reader(file_path, channels)
+    if reader is not None:
+        blocks = _iter_direct_blocks(reader, block_frames, channels)
+        if reader.sample_rate != sample_rate:
+            blocks = _iter_resampled_blocks(blocks, reader.sample_rate, sample_rate, block_frames, channels)
+        yield from blocks
+        return
+    
+    if source_rate is not None and source_rate != sample_rate:
+        yield from _iter_resampled_blocks(
+            iter_decoded_blocks(file_path, source_rate, block_frames, channels=channels),
+            source_rate, sample_rate, block_frames, channels
+        )
+        return
+    
+    cmd = [
+        get_ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+        '-i', file_path,
+        '-vn', '-ac', str(channels), '-ar', str(sample_rate),
+        '-f', 'f32le', 'pipe:1'
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    frame_bytes = 4 * channels
+    block_bytes = block_frames * frame_bytes
+    completed = False
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield _split_channels(np.frombuffer(data[:len(data) // frame_bytes * frame_bytes],
+                                                dtype=np.float32), channels)
+        completed = True
+    finally:
+        process.stdout.close()
+        if not completed:
+            process.kill()  # 소비자가 중간에 멈춘 경우
+        process.wait()
+    
+    if process.returncode != 0:
+        raise RuntimeError("디코딩 실패")
+
+def _iter_resampled_blocks(blocks: Iterator[np.ndarray], original_rate: int, target_rate: int,
+                           block_frames: int, channels: int = 1) -> Iterator[np.ndarray]:
+    """블록 경계에 이음새 없이 샘플레이트를 변환하고 block_frames 단위로 다시 나눔"""
+    resampler = soxr.ResampleStream(original_rate, target_rate, channels, dtype="float32", quality="HQ")
+    # soxr 스트림은 (프레임, 채널) 배열을 주고받으므로 다채널 블록은 전치하여 전달
+    empty = np.empty((0, channels) if channels > 1 else 0, dtype=np.float32)
+    pending = _empty_audio(0, channels)
+    for block in itertools.chain(blocks, [None]):
+        last = block is None
+        if last:
+            chunk = empty
+        else:
+            chunk = np.ascontiguousarray(block.T) if channels > 1 else block
+        out = resampler.resample_chunk(chunk, last=last)
+        if channels > 1:
+            out = out.T
+        pending = np.concatenate([pending, out], axis=-1) if pending.shape[-1] else out
+        while pending.shape[-1] >= block_frames or (last and pending.shape[-1]):
+            yield pending[..., :block_frames]
+            pending = pending[..., block_frames:]
+
+def open_output_stream_encoder(output_path: str, sample_rate: int, channels: int = 1,
+                               output_format: Optional[str] = None,
+                               bitrate: Optional[str] = None) -> subprocess.Popen:
+    """
+    표준 입력으로 float32 PCM 블록을 받아 출력 형식으로 인코딩하는 ffmpeg 프로세스 시작
+    
+    블록을 process.stdin에 순서대로 쓴 뒤 finish_stream_encoder()로 종료합니다.
+    (WAV도 같은 방식이며, ffmpeg는 PCM을 옮겨 담기만 하므로 인코딩 비용은 거의 없음)
+    """
+    return open_stream_encoder(output_path, sample_rate, channels,
+                               output_codec_args(output_format, bitrate), get_output_muxer(output_format))
+
+def open_recording_stream_encoder(output_path: str, sample_rate: int, channels: int,
+                                  bitrate: str, output_format: str = "mp3") -> subprocess.Popen:
+    """녹음 청크(16-bit PCM)를 계속 받아 출력 형식으로 인코딩하는 ffmpeg 프로세스 시작"""
+    return open_stream_encoder(output_path, sample_rate, channels, recording_codec_args(bitrate, output_format),
+                               get_output_muxer(output_format), input_format='s16le')
+
+def open_recording_resampler(original_rate: int, target_rate: int,
+                             channels: int) -> Optional[soxr.ResampleStream]:
+    """
+    녹음 청크용 스트림 리샘플러 (변환이 필요 없으면 None)
+    
+    필터 상태를 청크 사이에 이어서 사용하므로 청크 경계에 이음새가 없습니다.
+    """
+    if original_rate == target_rate:
+        return None
+    return soxr.ResampleStream(original_rate, target_rate, channels, dtype="int16", quality="HQ")
+
 def get_audio_duration(audio_array: np.ndarray, sample_rate: int) -> float:
     """오디오 길이 계산 (초 단위)"""
     return len(audio_array) / sample_rate
@@ -77,6 +656,13 @@ def parse_sample_rate_option(option: str, original_rate: int) -> int:
     else:
         return int(option.split()[0])
 
+def parse_bitrate_option(option: Optional[str]) -> Optional[str]:
+    """비트레이트 옵션 파싱 ("192" → "192k", "기본값"/빈 값 → None이면 형식 기본값 사용)"""
+    if not option or option == "기본값":
+        return None
+    option = str(option).strip().lower()
+    return option if option.endswith('k') else f"{option}k"
+
 def parse_channel_option(option: str) -> int:
     """채널 옵션 파싱"""
     return 1 if option == "모노 (Mono)" else 2
\ No newline at end of file
@@ -0,0 +1,266 @@
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+import imageio_ffmpeg as ffmpeg
+
+from config.settings import ENCODER_CONFIG, OUTPUT_CONFIG
+
+# 출력 형식별 (ffmpeg 인코더, 컨테이너) - 형식별 설정값은 OUTPUT_CONFIG["formats"]
+_FORMAT_ENCODERS = {
+    "mp3": ("libmp3lame", "mp3"),
+    "wav": ("pcm_s16le", "wav"),
+    "flac": ("flac", "flac"),
+    "opus": ("libopus", "ogg"),
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# 인코더 사용량 통계
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "active": 0,
+    "max_active": 0,
+    "streams_active": 0,
+    "streams_total": 0,
+    "encode_seconds": 0.0,
+    "wait_seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def get_ffmpeg_path() -> str:
+    """ffmpeg 실행 파일 경로 (최초 1회만 조회)"""
+    return ffmpeg.get_ffmpeg_exe()
+
+def _get_executor() -> ThreadPoolExecutor:
+    """인코딩 작업 큐를 처리하는 워커 풀 반환"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=ENCODER_CONFIG["max_workers"],
+                thread_name_prefix="encoder"
+            )
+        return _executor
+
+def _reset_after_fork() -> None:
+    """
+    fork로 만든 자식 프로세스(배치 워커)에서 인코더 풀 초기화
+    
+    부모의 ThreadPoolExecutor 객체는 복사되지만 워커 스레드는 복사되지 않으므로,
+    그대로 쓰면 제출한 작업이 실행되지 않고 영원히 대기합니다.
+    """
+    global _executor, _executor_lock, _stats_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    with _stats_lock:
+        _stats.update({key: 0.0 if isinstance(value, float) else 0 for key, value in _stats.items()})
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def build_encode_args(codec_args: List[str], output_path: Optional[str], output_format: str) -> List[str]:
+    """출력 코덱 인자 + 출력 대상(파일 또는 표준 출력) 구성"""
+    return codec_args + ['-f', output_format, '-y', output_path or 'pipe:1']
+
+def mp3_codec_args(bitrate: str) -> List[str]:
+    """MP3 인코딩 인자"""
+    return ['-codec:a', 'libmp3lame', '-b:a', bitrate]
+
+def get_output_format(output_format: Optional[str] = None) -> str:
+    """출력 형식 이름 확인 (None이면 기본 형식, 지원하지 않는 형식은 ValueError)"""
+    output_format = (output_format or OUTPUT_CONFIG["default_format"]).lower()
+    if output_format not in _FORMAT_ENCODERS or output_format not in OUTPUT_CONFIG["formats"]:
+        raise ValueError(f"지원하지 않는 출력 형식: {output_format}")
+    return output_format
+
+def get_output_extension(output_format: Optional[str] = None) -> str:
+    """출력 형식의 파일 확장자 (.mp3, .wav, .flac, .opus)"""
+    return f".{get_output_format(output_format)}"
+
+def get_output_bitrate(output_format: Optional[str] = None, bitrate: Optional[str] = None) -> Optional[str]:
+    """요청한 비트레이트 또는 형식 기본값 (비트레이트가 없는 형식(WAV/FLAC)은 None)"""
+    spec = OUTPUT_CONFIG["formats"][get_output_format(output_format)]
+    if "bitrate" not in spec:
+        return None
+    return bitrate or spec["bitrate"]
+
+def output_codec_args(output_format: Optional[str] = None, bitrate: Optional[str] = None) -> List[str]:
+    """출력 형식의 인코딩 인자 (인코더 + 비트레이트 + compression_level)"""
+    output_format = get_output_format(output_format)
+    args = ['-codec:a', _FORMAT_ENCODERS[output_format][0]]
+    bitrate = get_output_bitrate(output_format, bitrate)
+    if bitrate:
+        args += ['-b:a', bitrate]
+    level = OUTPUT_CONFIG["formats"][output_format].get("compression_level")
+    if level is not None:
+        args += ['-compression_level', str(level)]
+    return args
+
+def get_output_muxer(output_format: Optional[str] = None) -> str:
+    """출력 형식의 ffmpeg 컨테이너 이름 (-f 인자)"""
+    return _FORMAT_ENCODERS[get_output_format(output_format)][1]
+
+def describe_output_settings(output_format: Optional[str] = None, bitrate: Optional[str] = None) -> str:
+    """
+    결과 캐시/처리 기록 키에 넣는 출력 설정 문자열
+    
+    기본 설정의 MP3는 비트레이트만 사용하므로 이전 버전에서 만든 키와 같습니다.
+    """
+    output_format = get_output_format(output_format)
+    bitrate = get_output_bitrate(output_format, bitrate)
+    if output_format == "mp3" and OUTPUT_CONFIG["formats"]["mp3"].get("compression_level") is None:
+        return bitrate
+    return f"{output_format}:" + " ".join(output_codec_args(output_format, bitrate))
+
+def _run_process(cmd: List[str], input_data=None) -> Tuple[int, bytes, bytes]:
+    """
+    ffmpeg 실행 후 (종료 코드, 표준 출력, 표준 오류) 반환
+
+    subprocess.run(input=...)은 입력을 PIPE_BUF(512바이트) 단위로 나눠 쓰므로
+    큰 PCM 버퍼는 별도 스레드에서 한 번에 쓰고 출력은 이 스레드에서 읽습니다.
+    """
+    if input_data is None:
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True)
+        return result.returncode, result.stdout, result.stderr
+
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+
+    def feed():
+        try:
+            process.stdin.write(input_data)
+        except (BrokenPipeError, OSError):
+            pass  # ffmpeg가 먼저 종료된 경우 (오류는 stderr로 확인)
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    stderr_chunks = []
+    reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    reader.start()
+    stdout = process.stdout.read()
+    writer.join()
+    reader.join()
+    process.wait()
+    return process.returncode, stdout, b"".join(stderr_chunks)
+
+def _run_job(cmd: List[str], input_data, submitted_at: float) -> bytes:
+    """워커 스레드에서 ffmpeg 실행 (대기/인코딩 시간 기록)"""
+    started_at = time.perf_counter()
+    with _stats_lock:
+        _stats["wait_seconds"] += started_at - submitted_at
+        _stats["active"] += 1
+        _stats["max_active"] = max(_stats["max_active"], _stats["active"])
+
+    try:
+        returncode, stdout, stderr = _run_process(cmd, input_data)
+        if returncode != 0:
+            raise RuntimeError(f"인코딩 실패: {stderr.decode(errors='replace')}")
+        with _stats_lock:
+            _stats["completed"] += 1
+        return stdout
+    except Exception:
+        with _stats_lock:
+            _stats["failed"] += 1
+        raise
+    finally:
+        with _stats_lock:
+            _stats["active"] -= 1
+            _stats["encode_seconds"] += time.perf_counter() - started_at
+
+def _submit(cmd: List[str], input_data=None) -> bytes:
+    """인코딩 작업을 큐에 넣고 완료될 때까지 대기"""
+    with _stats_lock:
+        _stats["submitted"] += 1
+    future = _get_executor().submit(_run_job, cmd, input_data, time.perf_counter())
+    return future.result()
+
+def encode_pcm(audio_array: np.ndarray, sample_rate: int, codec_args: List[str],
+               output_path: Optional[str] = None, output_format: str = "mp3") -> Optional[bytes]:
+    """
+    float32 또는 int16 오디오 배열을 인코더 풀에서 인코딩
+
+    output_path가 주어지면 해당 파일에 저장하고, 없으면 인코딩된 데이터를 반환
+    """
+    if audio_array.dtype == np.int16:
+        pcm, input_format = np.ascontiguousarray(audio_array), 's16le'
+    else:
+        pcm, input_format = np.ascontiguousarray(audio_array, dtype=np.float32), 'f32le'
+    channels = 1 if pcm.ndim == 1 else pcm.shape[1]
+    cmd = [
+        get_ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+        '-f', input_format, '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0'
+    ] + build_encode_args(codec_args, output_path, output_format)
+
+    data = _submit(cmd, memoryview(pcm).cast('B'))
+    return None if output_path else data
+
+def encode_file(input_path: str, output_path: str, codec_args: List[str],
+                output_format: str = "mp3", input_args: Optional[List[str]] = None) -> None:
+    """오디오 파일을 인코더 풀에서 다른 형식으로 인코딩"""
+    cmd = [get_ffmpeg_path(), '-hide_banner', '-loglevel', 'error'] + (input_args or []) + [
+        '-i', input_path
+    ] + build_encode_args(codec_args, output_path, output_format)
+    _submit(cmd)
+
+def open_stream_encoder(output_path: str, sample_rate: int, channels: int,
+                        codec_args: List[str], output_format: str = "mp3",
+                        input_format: str = "f32le") -> subprocess.Popen:
+    """
+    표준 입력으로 PCM 블록(기본 float32, input_format='s16le'이면 int16)을 받는 스트리밍 인코더 시작
+
+    블록을 process.stdin에 순서대로 쓴 뒤 finish_stream_encoder()로 종료합니다.
+    """
+    cmd = [
+        get_ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+        '-f', input_format, '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0'
+    ] + build_encode_args(codec_args, output_path, output_format)
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    with _stats_lock:
+        _stats["streams_active"] += 1
+        _stats["streams_total"] += 1
+    return process
+
+def finish_stream_encoder(process: subprocess.Popen, abort: bool = False) -> None:
+    """스트리밍 인코더의 입력을 닫고 종료를 기다림 (abort=True면 강제 종료)"""
+    try:
+        if abort:
+            process.kill()
+            process.wait()
+            return
+        _, stderr = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"인코딩 실패: {stderr.decode(errors='replace')}")
+    finally:
+        with _stats_lock:
+            _stats["streams_active"] -= 1
+
+def get_encoder_stats() -> dict:
+    """인코더 풀 사용량 통계 반환"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["max_workers"] = ENCODER_CONFIG["max_workers"]
+    stats["queued"] = max(0, stats["submitted"] - stats["completed"] - stats["failed"] - stats["active"])
+    return stats
+
+def format_encoder_stats() -> str:
+    """상태 메시지에 표시할 인코더 통계 문자열"""
+    stats = get_encoder_stats()
+    return (f"인코더: 사용 중 {stats['active']}/{stats['max_workers']} · 대기 {stats['queued']} · "
+            f"완료 {stats['completed']} · 실패 {stats['failed']} · "
+            f"평균 대기 {stats['wait_seconds'] / max(1, stats['submitted']):.3f}초")
@@ -1,11 +1,39 @@
+import errno
 import os
+import shutil
 import tempfile
+import time
+import uuid
 import zipfile
 from typing import List, Tuple, Optional
 
+from utils.scratch_space import create_scratch_file
+
+# 파일 복사 단위 (커널 복사 호출 1회당)
+_COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+def _get_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# 사용자 폴더에 놓는 파일의 권한 (open()으로 만든 파일과 같이 umask를 따름)
+# mkstemp로 만든 임시 파일은 0600이므로 최종 이름으로 바꾸기 전에 적용 (umask는 시작 시 한 번만 조회)
+_DEFAULT_FILE_MODE = 0o666 & ~_get_umask()
+
+# ZIP에 압축 없이 저장할 확장자 (다시 압축해도 크기가 거의 줄지 않음)
+_COMPRESSED_EXTENSIONS = {'.mp3', '.m4a', '.aac', '.ogg', '.opus', '.flac'}
+
 def create_temp_file(suffix: str = ".mp3") -> str:
-    """임시 파일 경로 생성"""
-    return tempfile.mktemp(suffix=suffix)
+    """현재 작업 폴더에 빈 임시 파일을 만들고 경로 반환 (작업 밖이면 작업 공간의 공용 폴더)"""
+    return create_scratch_file(suffix)
+
+def apply_default_file_mode(file_path: str) -> None:
+    """mkstemp로 만든 파일(0600)을 일반 파일 권한(0666 & ~umask)으로 변경"""
+    try:
+        os.chmod(file_path, _DEFAULT_FILE_MODE)
+    except OSError:
+        pass  # 권한을 바꿀 수 없는 파일 시스템이면 그대로 사용
 
 def safe_delete_file(file_path: str) -> None:
     """안전하게 파일 삭제"""
@@ -23,31 +51,117 @@ def get_file_size_mb(file_path: str) -> float:
         return 0.0
 
 def generate_filename(base_name: str, suffix: str, extension: str = "mp3") -> str:
-    """파일명 생성"""
-    import numpy as np
-    random_id = np.random.randint(1000, 9999)
-    return f"{base_name}_{suffix}_{random_id}.{extension}"
+    """파일명 생성 (생성 시각 + 임의 ID로 동시에 만들어도 겹치지 않음)"""
+    unique_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    return f"{base_name}_{suffix}_{unique_id}.{extension}"
+
+def get_zip_compression(filename: str) -> int:
+    """이미 압축된 오디오는 그대로 저장(ZIP_STORED), 나머지는 압축(ZIP_DEFLATED)"""
+    if os.path.splitext(filename)[1].lower() in _COMPRESSED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+def open_zip_writer(zip_path: str) -> zipfile.ZipFile:
+    """파일을 하나씩 추가할 수 있는 ZIP 작성기 열기 (close() 시 목차 기록)"""
+    return zipfile.ZipFile(zip_path, 'w', allowZip64=True)
+
+def add_file_to_zip(zipf: zipfile.ZipFile, file_path: str, arcname: str) -> None:
+    """파일을 청크 단위로 읽어 ZIP에 추가 (전체를 메모리에 올리지 않음)"""
+    zipf.write(file_path, arcname, compress_type=get_zip_compression(arcname))
 
 def create_zip_file(files: List[Tuple[str, str]], zip_path: str) -> bool:
     """여러 파일을 ZIP으로 압축"""
     try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        with open_zip_writer(zip_path) as zipf:
             for filepath, filename in files:
                 if os.path.exists(filepath):
-                    zipf.write(filepath, filename)
+                    add_file_to_zip(zipf, filepath, filename)
         return True
     except Exception:
         return False
 
+def copy_file_fast(src_path: str, dst_path: str, chunk_size: int = _COPY_CHUNK_SIZE) -> None:
+    """
+    커널 내부 복사로 파일 복사 (copy_file_range → sendfile → 일반 버퍼 복사 순으로 시도)
+    
+    파일 전체를 파이썬 메모리로 읽지 않고 chunk_size 단위로 복사합니다.
+    """
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        size = os.fstat(src.fileno()).st_size
+        for copy in (_copy_with_copy_file_range, _copy_with_sendfile):
+            try:
+                copy(src.fileno(), dst.fileno(), size, chunk_size)
+                return
+            except (AttributeError, OSError):
+                # 지원하지 않는 플랫폼/파일 시스템이면 처음부터 다음 방법으로 다시 복사
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+        shutil.copyfileobj(src, dst, chunk_size)
+
+def _copy_with_copy_file_range(src_fd: int, dst_fd: int, size: int, chunk_size: int) -> None:
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(src_fd, dst_fd, min(chunk_size, size - offset), offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+
+def _copy_with_sendfile(src_fd: int, dst_fd: int, size: int, chunk_size: int) -> None:
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst_fd, src_fd, offset, min(chunk_size, size - offset))
+        if sent == 0:
+            break
+        offset += sent
+
+def _create_partial_path(dst_dir: str, new_filename: str) -> str:
+    """출력 디렉토리 안의 임시 파일 경로 (완성 전에는 최종 이름으로 보이지 않도록)"""
+    fd, partial_path = tempfile.mkstemp(dir=dst_dir, prefix=f".{new_filename}.", suffix=".part")
+    os.close(fd)
+    return partial_path
+
 def copy_file_to_directory(src_path: str, dst_dir: str, new_filename: str) -> Optional[str]:
-    """파일을 지정된 디렉토리로 복사"""
+    """파일을 지정된 디렉토리로 복사 (임시 이름으로 복사한 뒤 최종 이름으로 변경)"""
+    partial_path = None
+    try:
+        if not os.path.exists(dst_dir):
+            return None
+        
+        dst_path = os.path.join(dst_dir, new_filename)
+        partial_path = _create_partial_path(dst_dir, new_filename)
+        copy_file_fast(src_path, partial_path)
+        apply_default_file_mode(partial_path)
+        os.replace(partial_path, dst_path)
+        return dst_path
+    except Exception:
+        safe_delete_file(partial_path)
+        return None
+
+def move_file_to_directory(src_path: str, dst_dir: str, new_filename: str) -> Optional[str]:
+    """
+    파일을 지정된 디렉토리로 이동
+    
+    같은 파일 시스템이면 이름 변경만으로 끝나고(복사 없음),
+    다른 파일 시스템이면 임시 이름으로 복사한 뒤 이름을 바꾸고 원본을 삭제합니다.
+    """
     try:
         if not os.path.exists(dst_dir):
             return None
         
         dst_path = os.path.join(dst_dir, new_filename)
-        with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
-            dst.write(src.read())
+        try:
+            # 작업 공간의 임시 파일(mkstemp, 0600)도 일반 파일 권한으로 이동
+            apply_default_file_mode(src_path)
+            os.replace(src_path, dst_path)
+            return dst_path
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        
+        dst_path = copy_file_to_directory(src_path, dst_dir, new_filename)
+        if dst_path:
+            safe_delete_file(src_path)
         return dst_path
     except Exception:
         return None
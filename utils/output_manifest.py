@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+from typing import Dict
+
+from utils.file_utils import apply_default_file_mode, safe_delete_file
+
+# 출력 폴더마다 저장되는 처리 기록 파일 (출력 파일명 → 입력/설정 정보)
+MANIFEST_FILENAME = ".recodicon_manifest.json"
+
+def get_manifest_path(directory: str) -> str:
+    """출력 폴더의 처리 기록 파일 경로"""
+    return os.path.join(directory, MANIFEST_FILENAME)
+
+def load_manifest(directory: str) -> Dict[str, dict]:
+    """출력 폴더의 처리 기록 불러오기 (없거나 손상되었으면 빈 기록)"""
+    try:
+        with open(get_manifest_path(directory), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+def save_manifest(directory: str, entries: Dict[str, dict]) -> None:
+    """
+    처리 기록 저장
+
+    임시 파일에 쓴 뒤 이름을 바꾸므로 중간에 중단되어도 이전 기록이 손상되지 않습니다.
+    """
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=MANIFEST_FILENAME, suffix=".part")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+        apply_default_file_mode(temp_path)
+        os.replace(temp_path, get_manifest_path(directory))
+    except OSError:
+        safe_delete_file(temp_path)
+
+def is_output_current(directory: str, manifest: Dict[str, dict], output_filename: str, key: str) -> bool:
+    """같은 입력/설정(key)으로 만든 출력 파일이 폴더에 남아 있는지 확인"""
+    entry = manifest.get(output_filename)
+    return (entry is not None and entry.get("key") == key
+            and os.path.isfile(os.path.join(directory, output_filename)))
+
+def record_output(directory: str, manifest: Dict[str, dict], output_filename: str,
+                  source: str, key: str) -> None:
+    """완료된 출력을 처리 기록에 추가하고 바로 저장 (중단되어도 여기까지는 이어서 처리 가능)"""
+    manifest[output_filename] = {"source": source, "key": key}
+    save_manifest(directory, manifest)
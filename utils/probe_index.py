@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config.settings import CACHE_CONFIG
+from utils.audio_utils import probe_audio
+from utils.file_utils import safe_delete_file
+from utils.result_cache import compute_file_hash, get_cache_dir
+
+# 입력 파일 스트림 정보 색인 (파일 내용 해시 → probe_audio 결과)
+# 배치 계획 단계에서 디코딩 없이 길이/샘플레이트를 알 수 있도록 캐시 폴더에 저장됩니다.
+PROBE_INDEX_FILENAME = "probe_index.json"
+
+# 색인에 보관하는 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 삭제)
+_MAX_ENTRIES = 20000
+
+# 동시에 조회하는 최대 파일 수 (ffmpeg 프로세스 대기가 대부분이므로 스레드 사용)
+_PROBE_THREADS = 8
+
+_index: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+_index_lock = threading.Lock()
+
+def _reset_after_fork() -> None:
+    """fork로 만든 자식 프로세스(배치 워커)에서 잠금 초기화 (부모가 잠근 상태로 복사되지 않도록)"""
+    global _index_lock
+    _index_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _get_index_path() -> str:
+    """색인 파일 경로"""
+    return os.path.join(get_cache_dir(), PROBE_INDEX_FILENAME)
+
+def _read_index_file() -> Dict[str, Optional[Dict[str, Any]]]:
+    """디스크의 색인 불러오기 (없거나 손상되었으면 빈 색인)"""
+    try:
+        with open(_get_index_path(), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+def _get_index() -> Dict[str, Optional[Dict[str, Any]]]:
+    """메모리 색인 반환 (처음 호출 시 디스크에서 불러옴, _index_lock을 잡은 상태에서 호출)"""
+    global _index
+    if _index is None:
+        _index = _read_index_file() if CACHE_CONFIG.get("enabled", True) else {}
+    return _index
+
+def save_probe_index() -> None:
+    """메모리 색인을 디스크에 저장 (결과 캐시가 꺼져 있으면 저장하지 않음)"""
+    if not CACHE_CONFIG.get("enabled", True):
+        return
+    temp_path = None
+    try:
+        with _index_lock:
+            # 다른 프로세스가 그 사이에 추가한 항목과 합친 뒤 임시 파일에서 이름 변경 (동시에 저장해도 손상되지 않음)
+            entries = _read_index_file()
+            entries.update(_get_index())
+            while len(entries) > _MAX_ENTRIES:
+                entries.pop(next(iter(entries)))
+            fd, temp_path = tempfile.mkstemp(dir=get_cache_dir(), prefix=PROBE_INDEX_FILENAME, suffix=".part")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, _get_index_path())
+    except OSError:
+        safe_delete_file(temp_path)
+
+def probe_audio_cached(file_path: str, save: bool = True) -> Optional[Dict[str, Any]]:
+    """색인을 거쳐 오디오 스트림 정보 조회 (스트림을 찾지 못하면 None, 파일을 읽을 수 없으면 OSError)"""
+    file_hash = compute_file_hash(file_path)
+    with _index_lock:
+        index = _get_index()
+        if index.get(file_hash):
+            # 최근 사용 순서 갱신 (이전 버전이 저장한 실패 결과(None)는 다시 조회)
+            info = index[file_hash] = index.pop(file_hash)
+            return dict(info)
+
+    info = probe_audio(file_path)
+    if info is None:
+        # 실패는 저장하지 않음 (ffmpeg 실행 실패 같은 일시적인 오류도 None이므로 멀쩡한 파일이 계속 거부될 수 있음)
+        return None
+    with _index_lock:
+        index = _get_index()
+        index[file_hash] = info
+        if len(index) > _MAX_ENTRIES:
+            index.pop(next(iter(index)))
+    if save:  # 여러 파일을 조회할 때는 probe_files가 마지막에 한 번 저장
+        save_probe_index()
+    return dict(info)
+
+def probe_files(file_paths: List[str]) -> Dict[str, Any]:
+    """여러 파일의 스트림 정보를 동시에 조회하고 색인을 한 번 저장 ({경로: 결과, None 또는 OSError})"""
+    def probe(path: str):
+        try:
+            return probe_audio_cached(path, save=False)
+        except OSError as e:
+            return e
+
+    if not file_paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(file_paths), _PROBE_THREADS)) as pool:
+        results = dict(zip(file_paths, pool.map(probe, file_paths)))
+    save_probe_index()
+    return results
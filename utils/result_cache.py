@@ -0,0 +1,142 @@
+import os
+import tempfile
+import threading
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from config.settings import CACHE_CONFIG
+from utils.file_utils import create_temp_file, safe_delete_file, copy_file_fast
+
+# 현재 프로세스의 캐시 적중/미스 횟수
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+# 파일 해시 메모 ((경로, 크기, 수정 시각) → 해시), 오래된 항목부터 삭제
+_HASH_MEMO_SIZE = 4096
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+def get_cache_dir() -> str:
+    """캐시 디렉토리 경로 반환 (없으면 생성)"""
+    cache_dir = CACHE_CONFIG.get("directory") or os.path.join(tempfile.gettempdir(), "recodicon_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    파일 내용의 SHA-256 해시 계산
+
+    같은 프로세스에서 경로/크기/수정 시각이 그대로인 파일은 다시 읽지 않고 이전 해시를 사용합니다.
+    (배치 계획, 처리 기록, 결과 캐시가 같은 파일의 해시를 여러 번 요청함)
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _stats_lock:
+        cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    file_hash = digest.hexdigest()
+    with _stats_lock:
+        if len(_hash_memo) >= _HASH_MEMO_SIZE:
+            _hash_memo.pop(next(iter(_hash_memo)))
+        _hash_memo[memo_key] = file_hash
+    return file_hash
+
+def make_cache_key(file_hash: str, pitch_shift: float, engine: str, bitrate: str,
+                   sample_rate: Optional[int] = None) -> str:
+    """입력 해시 + 처리 설정으로 캐시 키 생성 (sample_rate: 요청한 처리 샘플레이트, 원본 유지면 None)"""
+    params = f"{file_hash}|{pitch_shift:+.4f}|{engine}|{bitrate}"
+    if sample_rate:
+        params += f"|{sample_rate}"
+    return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+def _cache_path(key: str, extension: str) -> str:
+    """캐시 키에 해당하는 파일 경로"""
+    return os.path.join(get_cache_dir(), f"{key}{extension}")
+
+def get_cached_result(key: str, extension: str = ".mp3") -> Optional[str]:
+    """
+    캐시된 결과를 새 임시 파일로 복사하여 반환 (없으면 None)
+
+    호출자가 결과 파일을 삭제하거나 이동해도 캐시 항목은 유지됩니다.
+    """
+    if not CACHE_CONFIG.get("enabled", True):
+        return None
+
+    cached_path = _cache_path(key, extension)
+    output_path = None
+    try:
+        output_path = create_temp_file(extension)
+        copy_file_fast(cached_path, output_path)
+        os.utime(cached_path)  # LRU 순서 갱신
+    except OSError:
+        safe_delete_file(output_path)
+        with _stats_lock:
+            _stats["misses"] += 1
+        return None
+
+    with _stats_lock:
+        _stats["hits"] += 1
+    return output_path
+
+def store_result(key: str, result_path: str, extension: str = ".mp3") -> None:
+    """처리 결과를 캐시에 저장하고 용량 한도를 넘으면 오래된 항목부터 삭제"""
+    if not CACHE_CONFIG.get("enabled", True):
+        return
+
+    cached_path = _cache_path(key, extension)
+    temp_path = None
+    try:
+        # 임시 이름으로 복사한 뒤 이름 변경 (다른 프로세스가 불완전한 파일을 읽지 않도록)
+        fd, temp_path = tempfile.mkstemp(dir=get_cache_dir(), suffix=".part")
+        os.close(fd)
+        copy_file_fast(result_path, temp_path)
+        os.replace(temp_path, cached_path)
+    except OSError:
+        safe_delete_file(temp_path)
+        return
+
+    evict_cache(CACHE_CONFIG.get("max_size_mb", 1024) * 1024 * 1024)
+
+def evict_cache(max_bytes: int) -> None:
+    """최근에 사용되지 않은 항목부터 삭제하여 캐시 크기를 max_bytes 이하로 유지"""
+    entries = []
+    total = 0
+    for entry in os.scandir(get_cache_dir()):
+        if not entry.is_file() or entry.name.endswith(".part"):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass
+
+def get_cache_stats() -> dict:
+    """캐시 적중/미스 횟수 반환"""
+    with _stats_lock:
+        return dict(_stats)
+
+def add_cache_stats(stats: dict) -> None:
+    """다른 프로세스(배치 워커)에서 집계한 적중/미스 횟수를 이 프로세스의 통계에 더함"""
+    with _stats_lock:
+        for name in ("hits", "misses"):
+            _stats[name] += stats.get(name, 0)
+
+def format_cache_stats() -> str:
+    """상태 메시지에 표시할 캐시 통계 문자열"""
+    stats = get_cache_stats()
+    return f"캐시: 적중 {stats['hits']}회 / 미스 {stats['misses']}회"
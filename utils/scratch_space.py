@@ -0,0 +1,292 @@
+import contextvars
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.settings import SCRATCH_CONFIG
+
+# 작업 밖에서 만든 임시 파일(실시간 녹음 등)을 두는 폴더 이름
+_SHARED_DIR = "shared"
+
+# 사용량 조회 결과를 재사용하는 시간 (초, 매 요청마다 폴더 전체를 훑지 않도록)
+_USAGE_CACHE_SECONDS = 1.0
+
+# 공간을 기다리는 동안 사용량을 다시 확인하는 간격 (초, 다른 프로세스가 비운 공간도 확인)
+_ADMISSION_POLL_SECONDS = 1.0
+
+# 현재 요청의 작업 폴더 (스레드/비동기 작업마다 분리됨)
+_current_job_dir: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "recodicon_scratch_job", default=None
+)
+
+# 이 프로세스에서 실행 중인 작업 폴더 (경로 → 시작 시각), 작업이 끝나면 대기 중인 작업에 알림
+_active_jobs: Dict[str, float] = {}
+_jobs_changed = threading.Condition()
+
+# 현재 프로세스의 작업 공간 통계
+_stats = {"jobs_started": 0, "jobs_waited": 0, "jobs_rejected": 0, "reaped_files": 0, "reaped_bytes": 0}
+_usage = {"bytes": 0, "checked_at": 0.0}
+
+_reaper: Optional[threading.Thread] = None
+
+def get_scratch_root() -> str:
+    """작업 공간 최상위 폴더 경로 반환 (없으면 생성)"""
+    root = SCRATCH_CONFIG.get("root")
+    if not root:
+        base = tempfile.gettempdir()
+        if SCRATCH_CONFIG.get("use_tmpfs") and os.path.isdir("/dev/shm"):
+            base = "/dev/shm"
+        root = os.path.join(base, "recodicon_scratch")
+    os.makedirs(root, exist_ok=True)
+    return root
+
+def _get_shared_dir() -> str:
+    shared_dir = os.path.join(get_scratch_root(), _SHARED_DIR)
+    os.makedirs(shared_dir, exist_ok=True)
+    return shared_dir
+
+def _get_limit_bytes() -> Optional[int]:
+    max_size_mb = SCRATCH_CONFIG.get("max_size_mb")
+    return int(max_size_mb * 1024 * 1024) if max_size_mb else None
+
+def _measure(path: str) -> Tuple[int, int, float]:
+    """폴더 안의 (파일 수, 전체 크기, 가장 최근 수정 시각)"""
+    files, size = 0, 0
+    try:
+        newest = os.path.getmtime(path)
+    except OSError:
+        return 0, 0, 0.0
+    for dir_path, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(dir_path, filename))
+            except OSError:
+                continue  # 측정 중에 삭제된 파일
+            files += 1
+            size += stat.st_size
+            newest = max(newest, stat.st_mtime)
+    return files, size, newest
+
+def get_scratch_usage(refresh: bool = False) -> int:
+    """작업 공간 전체 사용량 (바이트, 다른 프로세스가 만든 파일 포함)"""
+    now = time.monotonic()
+    with _jobs_changed:
+        if not refresh and now - _usage["checked_at"] < _USAGE_CACHE_SECONDS:
+            return _usage["bytes"]
+    _, size, _ = _measure(get_scratch_root())
+    with _jobs_changed:
+        _usage.update(bytes=size, checked_at=now)
+    return size
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+def reap_scratch(pressure: bool = False) -> Tuple[int, int]:
+    """보관 시간(output_ttl)이 지난 작업 폴더와 공용 파일 삭제, (삭제한 파일 수, 바이트) 반환"""
+    root = get_scratch_root()
+    # 이 프로세스에서 실행 중인 작업은 건드리지 않음 (다른 프로세스의 작업은 수정 시각으로만 보호됨)
+    with _jobs_changed:
+        active = set(_active_jobs)
+
+    # 삭제 후보: (가장 최근 수정 시각, 경로, 파일 수, 크기)
+    candidates: List[Tuple[float, str, int, int]] = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.path in active:
+                continue
+            if entry.name == _SHARED_DIR and entry.is_dir(follow_symlinks=False):
+                with os.scandir(entry.path) as shared_entries:
+                    for shared in shared_entries:
+                        files, size, newest = _measure(shared.path)
+                        candidates.append((newest, shared.path, max(files, 1), size))
+                continue
+            files, size, newest = _measure(entry.path)
+            candidates.append((newest, entry.path, max(files, 1), size))
+    candidates.sort()
+
+    now = time.time()
+    expired_before = now - SCRATCH_CONFIG.get("output_ttl", 3600)
+    evictable_before = now - SCRATCH_CONFIG.get("evict_grace", 60)
+    limit = _get_limit_bytes()
+    used = get_scratch_usage(refresh=True) if pressure and limit is not None else 0
+    removed_files, removed_bytes = 0, 0
+    for newest, path, files, size in candidates:
+        # pressure면 한도 아래로 내려갈 때까지 evict_grace가 지난 항목도 오래된 순서대로 삭제
+        over_limit = pressure and limit is not None and used >= limit
+        if newest >= expired_before and not (over_limit and newest < evictable_before):
+            continue
+        _remove(path)
+        used -= size
+        removed_files += files
+        removed_bytes += size
+
+    with _jobs_changed:
+        _stats["reaped_files"] += removed_files
+        _stats["reaped_bytes"] += removed_bytes
+        _usage["checked_at"] = 0.0
+        _jobs_changed.notify_all()
+    return removed_files, removed_bytes
+
+def _reap_loop() -> None:
+    while True:
+        try:
+            reap_scratch()
+        except OSError:
+            pass  # 정리 실패는 다음 주기에 다시 시도
+        time.sleep(SCRATCH_CONFIG.get("reap_interval", 300))
+
+def _ensure_reaper() -> None:
+    """정리 스레드 시작 (처음 작업이 시작될 때 한 번, 이전 실행에서 남은 파일도 정리)"""
+    global _reaper
+    with _jobs_changed:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_loop, name="recodicon-scratch-reaper", daemon=True)
+            _reaper.start()
+
+def _wait_for_space(name: str) -> None:
+    """작업 공간 사용량이 한도 아래로 내려갈 때까지 대기 (시간 초과 시 RuntimeError)"""
+    limit = _get_limit_bytes()
+    if limit is None or get_scratch_usage() < limit:
+        return
+
+    deadline = time.monotonic() + (SCRATCH_CONFIG.get("admission_timeout") or 0)
+    with _jobs_changed:
+        _stats["jobs_waited"] += 1
+    while True:
+        reap_scratch(pressure=True)
+        used = get_scratch_usage(refresh=True)
+        if used < limit:
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            with _jobs_changed:
+                _stats["jobs_rejected"] += 1
+            raise RuntimeError(f"작업 공간이 가득 차서 {name} 작업을 시작할 수 없습니다 "
+                               f"({used / (1024 * 1024):.0f}MB / {limit / (1024 * 1024):.0f}MB). "
+                               f"잠시 후 다시 시도해주세요.")
+        with _jobs_changed:
+            _jobs_changed.wait(min(remaining, _ADMISSION_POLL_SECONDS))
+
+def start_scratch_job(name: str, job_id: Optional[str] = None) -> str:
+    """공간을 확인한 뒤 작업 폴더를 만들어 실행 중으로 등록 (job_id가 같으면 같은 폴더를 다시 사용)"""
+    _wait_for_space(name)
+    # job_id는 이어서 처리할 수 있도록 항목 키로 이름을 정하는 배치 작업 보관 폴더용
+    if job_id is None:
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:12]}"
+    job_dir = os.path.join(get_scratch_root(), f"{name}-{job_id}")
+    os.makedirs(job_dir, exist_ok=True)
+    with _jobs_changed:
+        _active_jobs[job_dir] = time.time()
+        _stats["jobs_started"] += 1
+    _ensure_reaper()
+    return job_dir
+
+def finish_scratch_job(job_dir: str) -> None:
+    """작업을 끝난 상태로 변경 (결과 파일은 다운로드할 수 있도록 남기고 보관 시간 후 정리 스레드가 삭제)"""
+    try:
+        os.utime(job_dir)  # 보관 시간은 작업이 끝난 시각부터
+    except OSError:
+        pass
+    with _jobs_changed:
+        _active_jobs.pop(job_dir, None)
+        _usage["checked_at"] = 0.0
+        _jobs_changed.notify_all()
+
+@contextmanager
+def attach_scratch_dir(job_dir: Optional[str]) -> Iterator[Optional[str]]:
+    """블록 안에서 만드는 임시 파일이 주어진 작업 폴더에 생기도록 연결 (워커 프로세스용)"""
+    if job_dir is None:
+        yield None
+        return
+    token = _current_job_dir.set(job_dir)
+    try:
+        yield job_dir
+    finally:
+        _current_job_dir.reset(token)
+
+@contextmanager
+def scratch_job(name: str) -> Iterator[str]:
+    """요청 단위 작업 폴더 생성 (블록 안의 임시 파일은 이 폴더에 생성, 공간이 부족하면 RuntimeError)"""
+    job_dir = start_scratch_job(name)  # 한도를 넘었으면 admission_timeout초 동안 공간이 나기를 기다림
+    try:
+        with attach_scratch_dir(job_dir):
+            yield job_dir
+    finally:
+        finish_scratch_job(job_dir)
+
+def scratch_scoped(name: str):
+    """(결과, 상태 메시지)를 반환하는 처리 함수를 작업 폴더 안에서 실행하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                job_dir = start_scratch_job(name)
+            except (RuntimeError, OSError) as e:
+                return None, str(e)  # 작업 공간이 부족하여 시작하지 못함
+            try:
+                with attach_scratch_dir(job_dir):
+                    return func(*args, **kwargs)
+            finally:
+                finish_scratch_job(job_dir)
+        return wrapper
+    return decorator
+
+def bind_scratch_dir(func):
+    """다른 스레드에서 실행될 함수가 현재 작업 폴더에 임시 파일을 만들도록 연결"""
+    job_dir = _current_job_dir.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with attach_scratch_dir(job_dir):
+            return func(*args, **kwargs)
+    return wrapper
+
+def get_current_scratch_dir() -> Optional[str]:
+    """현재 작업 폴더 (작업 밖이면 None)"""
+    return _current_job_dir.get()
+
+def _target_dir() -> str:
+    job_dir = _current_job_dir.get()
+    if job_dir is None:
+        return _get_shared_dir()
+    os.makedirs(job_dir, exist_ok=True)
+    return job_dir
+
+def create_scratch_file(suffix: str = ".mp3") -> str:
+    """현재 작업 폴더(작업 밖이면 공용 폴더)에 빈 임시 파일을 만들고 경로 반환"""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=_target_dir())
+    os.close(fd)
+    return path
+
+def scratch_path(filename: str) -> str:
+    """현재 작업 폴더(작업 밖이면 공용 폴더) 안의 파일 경로 (사용자에게 보이는 이름을 그대로 유지)"""
+    return os.path.join(_target_dir(), filename)
+
+def get_scratch_stats() -> dict:
+    """현재 프로세스의 작업 공간 통계"""
+    used = get_scratch_usage()
+    with _jobs_changed:
+        stats = dict(_stats)
+        stats["active_jobs"] = len(_active_jobs)
+    stats["used_bytes"] = used
+    stats["limit_bytes"] = _get_limit_bytes()
+    return stats
+
+def format_scratch_stats() -> str:
+    """상태 메시지에 표시할 작업 공간 통계 문자열"""
+    stats = get_scratch_stats()
+    limit = f"{stats['limit_bytes'] / (1024 * 1024):.0f}MB" if stats["limit_bytes"] else "제한 없음"
+    return (f"작업 공간: {stats['used_bytes'] / (1024 * 1024):.1f}MB / {limit} · "
+            f"실행 중 {stats['active_jobs']}개 · 정리 {stats['reaped_files']}개")
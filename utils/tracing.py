@@ -0,0 +1,222 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Iterator, List, Optional
+
+from config.settings import TRACE_CONFIG
+
+try:
+    import resource  # Windows에는 없음
+except ImportError:
+    resource = None
+
+# 현재 요청의 추적 정보 (스레드/비동기 작업마다 분리됨)
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    "recodicon_trace", default=None
+)
+
+# 프로세스 전체 단계별 누적 통계 (/metrics 용)
+_totals: Dict[str, Dict[str, float]] = {}
+_totals_lock = threading.Lock()
+
+_logger: Optional[logging.Logger] = None
+_logger_lock = threading.Lock()
+
+class Trace:
+    """요청 하나에서 실행된 단계별 측정 기록"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: List[dict] = []
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self.stages.append(record)
+
+def _peak_rss_mb() -> Optional[float]:
+    """현재 프로세스의 최대 RSS (MB)"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def _get_logger() -> logging.Logger:
+    """추적 결과를 JSON 한 줄씩 기록하는 회전 로그"""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            log_path = TRACE_CONFIG.get("log_file") or os.path.join(tempfile.gettempdir(), "recodicon_trace.log")
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+            handler = RotatingFileHandler(
+                log_path,
+                maxBytes=TRACE_CONFIG["log_max_bytes"],
+                backupCount=TRACE_CONFIG["log_backup_count"],
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _logger = logging.getLogger("recodicon.trace")
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+            _logger.addHandler(handler)
+        return _logger
+
+def _add_to_totals(record: dict) -> None:
+    with _totals_lock:
+        totals = _totals.setdefault(record["stage"], {"count": 0, "wall": 0.0, "cpu": 0.0, "bytes": 0})
+        totals["count"] += 1
+        totals["wall"] += record["wall"]
+        totals["cpu"] += record["cpu"]
+        totals["bytes"] += record["bytes"]
+
+@contextmanager
+def start_trace(name: str) -> Iterator[Trace]:
+    """
+    요청 단위 추적 시작
+
+    블록 안에서 실행되는 trace_stage() 기록이 이 Trace에 모이고,
+    블록이 끝나면 전체 기록이 회전 로그에 JSON 한 줄로 저장됩니다.
+    """
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    error = None
+    try:
+        yield trace
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        _current_trace.reset(token)
+        if TRACE_CONFIG.get("enabled", True):
+            entry = {
+                "trace": name,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(trace.started_at)),
+                "pid": os.getpid(),
+                "total_wall": round(time.time() - trace.started_at, 4),
+                "stages": trace.stages,
+            }
+            if error:
+                entry["error"] = error
+            try:
+                _get_logger().info(json.dumps(entry, ensure_ascii=False))
+            except OSError:
+                pass  # 로그 기록 실패는 처리 결과에 영향을 주지 않음
+
+@contextmanager
+def trace_stage(stage: str, bytes_processed: int = 0) -> Iterator[dict]:
+    """
+    처리 단계 하나의 벽시계 시간, CPU 시간, 처리 바이트 수 측정
+
+    처리량을 미리 알 수 없으면 블록 안에서 record["bytes"]를 설정합니다.
+    CPU 시간은 현재 프로세스 기준이며 ffmpeg 자식 프로세스 사용량은 포함되지 않습니다.
+    """
+    record = {"stage": stage, "bytes": bytes_processed}
+    if not TRACE_CONFIG.get("enabled", True):
+        yield record
+        return
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record["wall"] = round(time.perf_counter() - wall_start, 4)
+        record["cpu"] = round(time.process_time() - cpu_start, 4)
+        record["peak_rss_mb"] = _peak_rss_mb()
+        _add_to_totals(record)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(record)
+
+def format_trace(trace: Trace) -> str:
+    """상태 메시지에 붙일 단계별 측정 요약"""
+    lines = ["⏱️ 단계별 처리 시간:"]
+    for record in trace.stages:
+        size = f" · {record['bytes'] / (1024 * 1024):.1f}MB" if record["bytes"] else ""
+        lines.append(f"  - {record['stage']}: {record['wall']:.3f}초 (CPU {record['cpu']:.3f}초){size}")
+    peak = _peak_rss_mb()
+    if peak is not None:
+        lines.append(f"  - 최대 메모리: {peak:.0f}MB")
+    return "\n".join(lines)
+
+def append_trace_to_status(status: str, trace: Trace) -> str:
+    """설정에 따라 상태 메시지 뒤에 측정 요약을 덧붙임"""
+    if not TRACE_CONFIG.get("show_in_status") or not trace.stages:
+        return status
+    return f"{status}\n{format_trace(trace)}"
+
+def render_metrics() -> str:
+    """단계별 누적 통계를 Prometheus 텍스트 형식으로 반환"""
+    with _totals_lock:
+        totals = {stage: dict(values) for stage, values in _totals.items()}
+
+    lines = [
+        "# HELP recodicon_stage_calls_total 처리 단계 실행 횟수",
+        "# TYPE recodicon_stage_calls_total counter",
+    ]
+    lines += [f'recodicon_stage_calls_total{{stage="{stage}"}} {values["count"]}'
+              for stage, values in sorted(totals.items())]
+    lines += [
+        "# HELP recodicon_stage_wall_seconds_total 처리 단계 누적 벽시계 시간",
+        "# TYPE recodicon_stage_wall_seconds_total counter",
+    ]
+    lines += [f'recodicon_stage_wall_seconds_total{{stage="{stage}"}} {values["wall"]:.4f}'
+              for stage, values in sorted(totals.items())]
+    lines += [
+        "# HELP recodicon_stage_cpu_seconds_total 처리 단계 누적 CPU 시간",
+        "# TYPE recodicon_stage_cpu_seconds_total counter",
+    ]
+    lines += [f'recodicon_stage_cpu_seconds_total{{stage="{stage}"}} {values["cpu"]:.4f}'
+              for stage, values in sorted(totals.items())]
+    lines += [
+        "# HELP recodicon_stage_bytes_total 처리 단계 누적 처리 바이트",
+        "# TYPE recodicon_stage_bytes_total counter",
+    ]
+    lines += [f'recodicon_stage_bytes_total{{stage="{stage}"}} {values["bytes"]}'
+              for stage, values in sorted(totals.items())]
+
+    peak = _peak_rss_mb()
+    if peak is not None:
+        lines += [
+            "# HELP recodicon_peak_rss_bytes 프로세스 최대 RSS",
+            "# TYPE recodicon_peak_rss_bytes gauge",
+            f"recodicon_peak_rss_bytes {int(peak * 1024 * 1024)}",
+        ]
+    return "\n".join(lines) + "\n"
+
+def bind_trace(func):
+    """다른 스레드에서 실행될 함수가 현재 Trace에 기록하도록 연결"""
+    trace = _current_trace.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_trace.set(trace)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_trace.reset(token)
+    return wrapper
+
+def traced(name: str):
+    """
+    (결과, 상태 메시지)를 반환하는 처리 함수를 요청 단위로 추적하는 데코레이터
+
+    설정에서 show_in_status가 켜져 있으면 상태 메시지 뒤에 단계별 측정 요약을 붙입니다.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_trace(name) as trace:
+                result = func(*args, **kwargs)
+            if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], str):
+                return result[0], append_trace_to_status(result[1], trace)
+            return result
+        return wrapper
+    return decorator